@@ -32,7 +32,11 @@ function createDetailRow(label, value) {
     `;
 }
 
-fetch('http://localhost:5001/complaints')
+const apiUser = JSON.parse(localStorage.getItem('currentUser') || 'null');
+
+fetch('http://localhost:5001/complaints', {
+    headers: { 'Authorization': `Bearer ${apiUser && apiUser.token}` }
+})
   .then(response => response.json())
   .then(data => {
     const casesList = document.getElementById('casesList');
@@ -56,8 +60,8 @@ fetch('http://localhost:5001/complaints')
         detailsHtml += createDetailRow('Handler', complaint.handler);
         detailsHtml += createDetailRow('Status', complaint.status);
 
-        // Transactions are a JSON string, so we parse and display them
-        const transactions = JSON.parse(complaint.transactions || '[]');
+        // Transactions arrive decoded; older servers sent them as a JSON string
+        const transactions = typeof complaint.transactions === 'string' ? JSON.parse(complaint.transactions || '[]') : (complaint.transactions || []);
         detailsHtml += `<div class="mt-3 pt-3 border-t"><strong class="text-gray-800">Transactions (${transactions.length}):</strong></div>`;
         if (transactions.length > 0) {
             transactions.forEach((tx, i) => {
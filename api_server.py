@@ -1,6 +1,7 @@
 from flask import Flask, jsonify
 from database import Database
 from flask_cors import CORS
+from json_response import json_response, compact_shape, wants_compact
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
@@ -12,12 +13,9 @@ def index():
 
 @app.route('/complaints', methods=['GET'])
 def get_complaints():
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM complaints")
-    complaints = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(complaints)
+    if wants_compact():
+        return json_response(lambda: compact_shape(db.get_all_complaints(), Database.COMPLAINT_COLUMNS))
+    return json_response(db.get_all_complaints)
 
 if __name__ == '__main__':
     app.run(port=5001, debug=True)
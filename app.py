@@ -1,21 +1,43 @@
-from flask import Flask, request, send_from_directory, jsonify, session
+from flask import Flask, request, send_from_directory, jsonify, session, Response, stream_with_context, g
 from flask_cors import CORS
 from twilio.twiml.messaging_response import MessagingResponse
 from twilio.rest import Client
+from twilio.request_validator import RequestValidator
+import atexit
 import os
 from dotenv import load_dotenv
-from database import Database
+from database import Database, SessionConflict
 from validators import Validators
-from pdf_generator import PDFGenerator
+from pdf_service import PDFRenderService, PDFRenderError
+from auth import TokenAuth
+from message_dedup import MessageDeduplicator
+from striped_lock import StripedLock
+from rate_limit import TokenBucketLimiter, LoadShedder
+from static_assets import StaticAssets
+from scheduler import PeriodicTask
+from stale_monitor import StaleCaseMonitor
+from backup import BackupManager
+from blob_cache import BlobCache
+from summary_renderer import SummaryRenderer, summary_sections, with_footer
+from pdf_bundle import BundleWriter
+from json_response import json_response, wants_compact
+from delivery_tracker import DeliveryTracker
+from assignment import AssignmentPolicy, AutoAssigner
 import requests
 import secrets
+import random
+import re
+import threading
+import time
 from datetime import datetime, timedelta
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)  # Needed for session management
+# Needed for session management and signing dashboard tokens; set SECRET_KEY
+# so tokens survive restarts
+app.secret_key = os.getenv('SECRET_KEY') or secrets.token_hex(16)
 CORS(app)  # Enable Cross-Origin Resource Sharing
 
 # Twilio Configuration
@@ -27,10 +49,97 @@ NGROK_URL = os.getenv('NGROK_URL', 'http://localhost:5001')
 # Initialize Twilio client
 twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
+# Checks the X-Twilio-Signature Twilio adds to its callbacks
+twilio_validator = RequestValidator(TWILIO_AUTH_TOKEN) if TWILIO_AUTH_TOKEN else None
+
 # Initialize Database
 db = Database()
 db.create_users_table()  # Ensure users table exists
 
+# Remembers replies per inbound MessageSid so Twilio retries aren't processed twice
+message_dedup = MessageDeduplicator(db)
+
+# Per-sender serialization of webhook messages
+sender_locks = StripedLock(int(os.getenv('SENDER_LOCK_STRIPES', 64)))
+SESSION_WRITE_ATTEMPTS = 8
+
+# Per-sender rate limit (messages per second, with a burst allowance) and a
+# cap on webhook requests processed at once
+sender_limiter = TokenBucketLimiter(
+    rate=float(os.getenv('WEBHOOK_SENDER_RATE', 0.5)),
+    burst=float(os.getenv('WEBHOOK_SENDER_BURST', 5))
+)
+load_shedder = LoadShedder(int(os.getenv('WEBHOOK_MAX_IN_FLIGHT', 32)))
+
+# Dashboard authentication (tokens expire after AUTH_TOKEN_MAX_AGE seconds)
+auth = TokenAuth(app.secret_key, db, max_age=int(os.getenv('AUTH_TOKEN_MAX_AGE', 8 * 60 * 60)))
+
+# Pending complaints older than STALE_CASE_SECONDS are flagged and pushed to admin dashboards
+stale_monitor = StaleCaseMonitor(db, int(os.getenv('STALE_CASE_SECONDS', 1800)))
+# An alert stream holds a worker thread; it ends after this long and the browser reconnects
+STALE_STREAM_SECONDS = int(os.getenv('STALE_STREAM_SECONDS', 300))
+
+# Attender claims return to the Pending queue unless renewed within QUEUE_LEASE_SECONDS
+QUEUE_LEASE_SECONDS = int(os.getenv('QUEUE_LEASE_SECONDS', 1800))
+QUEUE_MAX_CLAIM = 20
+QUEUE_MAX_PAGE = 100
+
+# Unassigned Pending complaints are handed to the least loaded attenders every
+# ASSIGN_INTERVAL_SECONDS (0 leaves assignment to admins and attenders)
+ASSIGN_INTERVAL_SECONDS = float(os.getenv('ASSIGN_INTERVAL_SECONDS', 0))
+auto_assigner = AutoAssigner(db, AssignmentPolicy(
+    max_open_cases=int(os.getenv('ASSIGN_MAX_OPEN_CASES', 20)),
+    batch_size=int(os.getenv('ASSIGN_BATCH_SIZE', 200)),
+    min_age_seconds=int(os.getenv('ASSIGN_AFTER_SECONDS', 0)),
+    affinity=os.getenv('ASSIGN_DISTRICT_AFFINITY', 'prefer'),
+    affinity_slack=int(os.getenv('ASSIGN_AFFINITY_SLACK', 2)),
+    lease_seconds=int(os.getenv('ASSIGN_LEASE_SECONDS', QUEUE_LEASE_SECONDS)) or None
+))
+
+# Completed complaints move to the archive database after ARCHIVE_AFTER_DAYS
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+
+# Verified online snapshots every BACKUP_INTERVAL_HOURS (0 disables), keeping BACKUP_KEEP of each
+BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', 24))
+backups = BackupManager(
+    [db.db_name, db.archive_name],
+    backup_dir=os.getenv('BACKUP_DIR', 'backups'),
+    keep=int(os.getenv('BACKUP_KEEP', 7)),
+    # Every worker schedules backups; whichever runs first takes them
+    min_interval=BACKUP_INTERVAL_HOURS * 60 * 60 / 2
+)
+
+# Complaint PDFs render in worker processes, off the request threads' GIL
+pdf_service = PDFRenderService(
+    workers=int(os.getenv('PDF_WORKERS', 0)) or None,
+    max_pending=int(os.getenv('PDF_MAX_PENDING', 0)) or None,
+    timeout=float(os.getenv('PDF_RENDER_TIMEOUT', 30))
+)
+
+# Recently generated PDFs kept in memory for Twilio's media fetch
+pdf_cache = BlobCache(
+    max_bytes=int(os.getenv('PDF_CACHE_MB', 64)) * 1024 * 1024,
+    ttl=int(os.getenv('PDF_CACHE_TTL', 600))
+)
+
+# Twilio status callbacks for sent PDFs, written in batches every
+# DELIVERY_FLUSH_SECONDS; failed PDFs are re-sent PDF_RESEND_AFTER seconds
+# later, up to PDF_MAX_SEND_ATTEMPTS sends in all
+DELIVERY_FLUSH_SECONDS = float(os.getenv('DELIVERY_FLUSH_SECONDS', 2))
+DELIVERY_EVENTS_KEEP_DAYS = int(os.getenv('DELIVERY_EVENTS_KEEP_DAYS', 30))
+delivery = DeliveryTracker(
+    db,
+    max_attempts=int(os.getenv('PDF_MAX_SEND_ATTEMPTS', 3)),
+    resend_after=int(os.getenv('PDF_RESEND_AFTER', 60))
+)
+
+# Rendered complaint summaries, reused while a session is unchanged
+summary_renderer = SummaryRenderer()
+
+# Dashboard pages and scripts, served from memory
+STATIC_FILES = ['login.html', 'register.html', 'admin.html', 'attender.html', 'api_fetch.js', 'copy.png']
+static_assets = StaticAssets(app.root_path, STATIC_FILES)
+
 # Conversation States
 STATE_START = 'start'
 STATE_MONEY_LOSS = 'money_loss'
@@ -40,6 +149,7 @@ STATE_DOB = 'dob'
 STATE_FATHER_NAME = 'father_name'
 STATE_DISTRICT = 'district'
 STATE_PIN_CODE = 'pin_code'
+STATE_PIN_CONFIRM = 'pin_confirm'
 STATE_TRANSACTION_COUNT = 'transaction_count'
 STATE_TRANS_DATE = 'trans_date'
 STATE_TRANS_TIME = 'trans_time'
@@ -49,78 +159,198 @@ STATE_TRANS_AMOUNT = 'trans_amount'
 STATE_TRANS_ID = 'trans_id'
 STATE_CONFIRM = 'confirm'
 STATE_EDIT = 'edit'
+STATE_SUBMITTING = 'submitting'
+
+ALREADY_SUBMITTING_REPLY = ("⏳ Your complaint has already been submitted and its PDF is on the way.\n\n"
+                            "_Type 'Hi' after it arrives to register a new complaint._")
+
+
+def canned_reply(text):
+    """Build a fixed TwiML reply once, for answers that must stay cheap"""
+    resp = MessagingResponse()
+    resp.message(text)
+    return str(resp)
+
 
+RATE_LIMITED_REPLY = canned_reply("⏳ You're sending messages too quickly. Please wait a few seconds and try again.")
+OVERLOADED_REPLY = canned_reply("⚠️ We're handling a lot of complaints right now. Please resend your message in a minute.")
 
-def upload_pdf_temp(pdf_buffer, phone_number, complaint_id):
+
+def upload_pdf_temp(pdf_bytes, phone_number, complaint_id):
     """Save PDF temporarily to a local folder"""
-    filename = f"complaint_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
+    # The complaint ID keeps simultaneous confirmations from sharing a name
+    filename = f"complaint_{complaint_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
     filepath = os.path.join('temp_pdfs', filename)
     
     # Create temp folder if it doesn't exist
     os.makedirs('temp_pdfs', exist_ok=True)
     
     with open(filepath, 'wb') as f:
-        f.write(pdf_buffer.getvalue())
+        f.write(pdf_bytes)
+    
+    # Twilio fetches the media within seconds; serve that from memory
+    pdf_cache.put(filename, pdf_bytes)
     
     return filepath, filename
 
 
-def send_pdf_to_whatsapp(phone_number, pdf_filename, complaint_id):
+PDF_CAPTION = "📄 Your Cyber Crime Complaint Form\n"
+
+
+def pdf_public_url(pdf_filename):
+    """Public URL Twilio fetches a generated PDF from"""
+    return f"{NGROK_URL}/download/{pdf_filename}"
+
+
+def status_callback_url():
+    """Public URL Twilio reports a sent message's delivery status to"""
+    return f"{NGROK_URL}/twilio/status"
+
+
+def signed_by_twilio(url, form, signature):
+    """True if `signature` (the X-Twilio-Signature header) is Twilio's, made with
+    our auth token, for a POST of `form` to the public `url`"""
+    if twilio_validator is None or not signature:
+        return False
+    return twilio_validator.validate(url, form, signature)
+
+
+def send_pdf_to_whatsapp(phone_number, pdf_filename, complaint_id, attempt=1):
     """Send PDF file to WhatsApp via Twilio"""
     try:
-        # Create public URL for PDF
-        pdf_public_url = f"{NGROK_URL}/download/{pdf_filename}"
-        
         # Send PDF with caption
         message = twilio_client.messages.create(
             from_=TWILIO_WHATSAPP_NUMBER,
-            body=f"📄 Your Cyber Crime Complaint Form\n",
-            media_url=[pdf_public_url],
+            body=PDF_CAPTION,
+            media_url=[pdf_public_url(pdf_filename)],
+            status_callback=status_callback_url(),
             to=phone_number
         )
         
+        delivery.record_sent(message.sid, complaint_id, phone_number, pdf_filename, attempt)
         return True, message.sid
     except Exception as e:
         print(f"Error sending PDF: {e}")
         return False, str(e)
 
 
+def resend_pdf(message):
+    """Send a PDF again after Twilio reported it undelivered; returns the new SID or None"""
+    filename = message['pdf_filename']
+    if pdf_cache.get(filename) is None and not os.path.exists(os.path.join('temp_pdfs', filename)):
+        return None
+    success, sid = send_pdf_to_whatsapp(message['phone_number'], filename, message['complaint_id'], message['attempt'] + 1)
+    return sid if success else None
+
+
+class ComplaintSubmission:
+    """A confirmed complaint waiting to be saved, rendered and sent"""
+
+    def __init__(self, from_number, session_data):
+        self.from_number = from_number
+        self.complaint_data = {
+            'phone_number': from_number,
+            'name': session_data['name'],
+            'mobile_no': session_data['mobile_no'],
+            'dob': session_data['dob'],
+            'father_name': session_data['father_name'],
+            'district': session_data['district'],
+            'pin_code': session_data['pin_code'],
+            'transactions': session_data['transactions']
+        }
+
+
+def submission_reply(complaint_id, rendered, sent):
+    """TwiML reply for a submitted complaint, given whether its PDF was rendered and sent"""
+    resp = MessagingResponse()
+    resp.message("✅ Generating your complaint PDF...")
+    
+    if sent:
+        # Success message
+        success_msg = f"✅ *DATA COLLECTED SUCCESSFUL!*\n\n"
+#        success_msg += f"📋 Complaint ID: *{complaint_id}*\n\n"
+        success_msg += "📞 For further assistance:\n"
+        success_msg += "🔗 https://cybercrime.gov.in\n\n"
+        success_msg += "Thank you for using our service! Stay safe online! 🛡️\n\n"
+        success_msg += "_Type 'Hi' to register a new complaint._"
+        resp.message(success_msg)
+    else:
+        # Fallback if PDF sending fails
+        fallback_msg = f"✅ Complaint registered with ID: {complaint_id}\n\n"
+        if rendered:
+            fallback_msg += "⚠️ PDF saved locally. Please contact support."
+        else:
+            fallback_msg += "⚠️ PDF could not be generated. Please contact support."
+        resp.message(fallback_msg)
+    
+    return str(resp)
+
+
+def submit_complaint(submission):
+    """Save a confirmed complaint, send its PDF and end the session; returns the TwiML reply"""
+    from_number = submission.from_number
+    try:
+        complaint_id = db.save_complaint(submission.complaint_data)
+    except Exception:
+        # Nothing was saved; let the user (or Twilio's retry) confirm again
+        db.save_session_fields(from_number, STATE_CONFIRM)
+        raise
+    
+    # Generate PDF in the render pool
+    try:
+        pdf_bytes = pdf_service.render(submission.complaint_data)
+    except PDFRenderError as e:
+        print(f"Error generating PDF for complaint {complaint_id}: {e}")
+        pdf_bytes = None
+    
+    if pdf_bytes is not None:
+        pdf_path, pdf_filename = upload_pdf_temp(pdf_bytes, from_number.replace('whatsapp:', ''), complaint_id)
+        
+        # Send PDF to WhatsApp
+        success, msg_id = send_pdf_to_whatsapp(from_number, pdf_filename, complaint_id)
+    else:
+        success = False
+    
+    db.delete_session(from_number)
+    summary_renderer.forget(from_number)
+    
+    return submission_reply(complaint_id, pdf_bytes is not None, success)
+
+
+SESSION_TIMEOUT_MESSAGE = "Due to inactivity on the channel, your session has timed out. Just type 'Hi' to restart your conversation."
+
+
+def session_timed_out(state, data):
+    """True if a stored session has been inactive for more than 30 minutes"""
+    if state and data:
+        last_activity = datetime.fromisoformat(data.get('last_activity', datetime.now().isoformat()))
+        return datetime.now() - last_activity > timedelta(minutes=30)
+    return False
+
+
 def check_session_timeout(phone_number):
     """Check if session has timed out (30 minutes)"""
     state, data = db.get_session(phone_number)
     
-    if state and data:
-        last_activity = datetime.fromisoformat(data.get('last_activity', datetime.now().isoformat()))
-        if datetime.now() - last_activity > timedelta(minutes=30):
-            db.delete_session(phone_number)
-            return True, "Due to inactivity on the channel, your session has timed out. Just type 'Hi' to restart your conversation."
+    if session_timed_out(state, data):
+        db.delete_session(phone_number)
+        return True, SESSION_TIMEOUT_MESSAGE
     
     return False, None
 
 
 def format_summary_message(session_data):
     """Format a summary of all collected data"""
-    summary = "📋 *SUMMARY OF YOUR COMPLAINT*\n\n"
-    summary += "👤 *PERSONAL INFORMATION:*\n"
-    summary += f"1.1 Name: {session_data.get('name', 'N/A')}\n"
-    summary += f"1.2 Mobile: {session_data.get('mobile_no', 'N/A')}\n"
-    summary += f"1.3 DOB: {session_data.get('dob', 'N/A')}\n"
-    summary += f"1.4 Father's Name: {session_data.get('father_name', 'N/A')}\n"
-    summary += f"1.5 District: {session_data.get('district', 'N/A')}\n"
-    summary += f"1.6 PIN Code: {session_data.get('pin_code', 'N/A')}\n\n"
-    
-    summary += "💳 *TRANSACTION DETAILS:*\n"
-    transactions = session_data.get('transactions', [])
-    for idx, trans in enumerate(transactions, 1):
-        summary += f"\n📌 Transaction #{idx}:\n"
-        summary += f"2.{idx}.1 Date: {trans.get('date', 'N/A')}\n"
-        summary += f"2.{idx}.2 Time: {trans.get('time', 'N/A')}\n"
-        summary += f"2.{idx}.3 Bank: {trans.get('bank_name', 'N/A')}\n"
-        summary += f"2.{idx}.4 Account: {trans.get('account_no', 'N/A')}\n"
-        summary += f"2.{idx}.5 Amount: {trans.get('amount', 'N/A')}\n"
-        summary += f"2.{idx}.6 Trans ID: {trans.get('transaction_id', 'N/A')}\n"
-    
-    return summary
+    return ''.join(summary_sections(session_data))
+
+
+def send_summary(resp, from_number, version, session_data, footer=None):
+    """Add the summary (saved at `version`) to the reply, split into WhatsApp-sized messages"""
+    chunks = summary_renderer.render(from_number, version, session_data)
+    if footer:
+        chunks = with_footer(chunks, footer)
+    for chunk in chunks:
+        resp.message(chunk)
 
 
 def edit_field(session_data, field_num, new_value):
@@ -195,13 +425,147 @@ def edit_field(session_data, field_num, new_value):
         return False, f"Error editing field: {str(e)}"
 
 
+def edited_session_parts(session_data, field_num):
+    """Return the (fields, transactions) changed by a successful edit_field call"""
+    parts = field_num.split('.')
+
+    if len(parts) == 3:
+        trans_num = int(parts[1]) - 1
+        return {}, {trans_num: session_data['transactions'][trans_num]}
+
+    field_key = {
+        '1': 'name',
+        '2': 'mobile_no',
+        '3': 'dob',
+        '4': 'father_name',
+        '5': 'district',
+        '6': 'pin_code'
+    }[parts[1]]
+    return {field_key: session_data[field_key]}, {}
+
+
+def parse_edits(incoming_msg):
+    """Split an edit message into (serial_number, new_value) pairs.
+
+    Several edits can be sent at once, one per line or separated by ';'.
+    A part without '=' is returned with a new_value of None.
+    """
+    edits = []
+    for part in re.split(r'[;\n]', incoming_msg):
+        part = part.strip()
+        if not part:
+            continue
+        if '=' in part:
+            field_num, new_value = part.split('=', 1)
+            edits.append((field_num.strip(), new_value.strip()))
+        else:
+            edits.append((part, None))
+    return edits
+
+
+def apply_edits(session_data, edits):
+    """Validate and apply a batch of edits, all or nothing.
+
+    Returns (success, messages, fields, transactions). On success
+    session_data is updated and `fields`/`transactions` hold everything
+    that changed, for a single save_session_fields call; otherwise
+    session_data is untouched and `messages` holds a (serial_number, error)
+    pair per bad edit.
+    """
+    # Edit a copy, so one bad edit leaves the session as it was
+    draft = dict(session_data)
+    draft['transactions'] = [dict(trans) for trans in session_data.get('transactions', [])]
+
+    messages, errors = [], []
+    fields, transactions = {}, {}
+    for field_num, new_value in edits:
+        if new_value is None:
+            errors.append((field_num, "Use serial_number = new_value"))
+            continue
+        success, message = edit_field(draft, field_num, new_value)
+        if not success:
+            errors.append((field_num, message))
+            continue
+        messages.append(message)
+        changed_fields, changed_transactions = edited_session_parts(draft, field_num)
+        fields.update(changed_fields)
+        transactions.update(changed_transactions)
+
+    # Check that District and PIN code still agree, whichever of them changed;
+    # a mismatch is only pointed out, since the PIN index isn't exhaustive
+    if not errors and ('district' in fields or 'pin_code' in fields):
+        warning = Validators.pincode_mismatch(draft['pin_code'], draft['district'])
+        if warning:
+            messages.append(f"⚠️ {warning}. Kept as entered; edit 1.5 or 1.6 if that's a mistake")
+        else:
+            district = Validators.district_served_by(draft['pin_code'], draft['district'])
+            if district and district != draft['district']:
+                draft['district'] = fields['district'] = district
+
+    if errors:
+        return False, errors, {}, {}
+
+    session_data.update(draft)
+    return True, messages, fields, transactions
+
+
 @app.route('/webhook', methods=['POST'])
 def webhook():
     """Main webhook endpoint for Twilio WhatsApp messages"""
     # Get incoming message details
     incoming_msg = request.form.get('Body', '').strip()
     from_number = request.form.get('From', '')
+    message_sid = request.form.get('MessageSid')
+    
+    # Shed load before touching the database
+    if not sender_limiter.allow(from_number):
+        return RATE_LIMITED_REPLY
+    if not load_shedder.try_enter():
+        return OVERLOADED_REPLY
     
+    try:
+        if not message_sid:
+            return handle_message(from_number, incoming_msg)
+        
+        # Twilio retries slow deliveries; answer repeats with the original reply
+        is_new, cached_reply = message_dedup.begin(message_sid)
+        if not is_new:
+            # An empty reply while the first delivery is still being processed
+            return cached_reply if cached_reply is not None else str(MessagingResponse())
+        
+        try:
+            reply = handle_message(from_number, incoming_msg)
+        except Exception:
+            message_dedup.abandon(message_sid)
+            raise
+        
+        message_dedup.finish(message_sid, reply)
+        return reply
+    finally:
+        load_shedder.leave()
+
+
+def handle_message(from_number, incoming_msg):
+    """Process one message with per-sender ordering.
+    
+    Messages from the same number are serialized by a striped lock in this
+    process; sessions are versioned, so a write that lost a race with
+    another worker raises SessionConflict and the message is re-run against
+    the fresh session.
+    """
+    with sender_locks.for_key(from_number):
+        for attempt in range(SESSION_WRITE_ATTEMPTS):
+            try:
+                return process_message(from_number, incoming_msg)
+            except SessionConflict:
+                if attempt == SESSION_WRITE_ATTEMPTS - 1:
+                    raise
+                # Jittered backoff so competing workers don't collide again
+                time.sleep(random.uniform(0, 0.005) * (attempt + 1))
+
+
+def process_message(from_number, incoming_msg):
+    """Advance the conversation for one inbound message and return the TwiML reply"""
     # Clean expired sessions
     db.clean_expired_sessions(30)
     
@@ -213,8 +577,22 @@ def webhook():
         return str(resp)
     
     # Get current session state
-    state, session_data = db.get_session(from_number)
+    state, session_data, version = db.get_session_with_version(from_number)
+    
+    result = advance_conversation(db, from_number, incoming_msg, state, session_data, version)
+    if isinstance(result, ComplaintSubmission):
+        return submit_complaint(result)
+    return result
+
+
+def advance_conversation(store, from_number, incoming_msg, state, session_data, version):
+    """Handle one message against the loaded session and return the TwiML reply.
     
+    Session writes go through `store`: the Database here, or a recorder
+    that an async server replays later. When the user confirms, the session
+    is claimed (moved to STATE_SUBMITTING) and a ComplaintSubmission is
+    returned instead of a reply, for the caller to save, render and send.
+    """
     # Update last activity
     session_data['last_activity'] = datetime.now().isoformat()
     
@@ -224,13 +602,19 @@ def webhook():
     new_state = state
     
     # Handle conversation flow
-    if not state or incoming_msg.lower() in ['hi', 'hello', 'start']:
+    if state == STATE_SUBMITTING:
+        # Another copy of the confirmation claimed the session and is saving
+        # the complaint; the session is deleted once its PDF is sent
+        resp.message(ALREADY_SUBMITTING_REPLY)
+        return str(resp)
+    
+    elif not state or incoming_msg.lower() in ['hi', 'hello', 'start']:
         # Start conversation
         reply = "👋 Hello! Welcome to Cyber Crime Complaint Registration Bot.\n\n"
         reply += "Have you suffered a *money loss* due to cyber crime?\n\n"
         reply += "Reply:\n1️⃣ *Yes* - Register a complaint\n2️⃣ *No* - Track existing complaint"
         new_state = STATE_MONEY_LOSS
-        db.save_session(from_number, new_state, session_data)
+        store.save_session(from_number, new_state, session_data, expected_version=version)
     
     elif state == STATE_MONEY_LOSS:
         if incoming_msg.lower() in ['yes', '1', 'yes.']:
@@ -239,13 +623,13 @@ def webhook():
             reply += "Please enter your *full name*:\n"
             reply += "_Example: Rajesh Kumar or JEEVIKESH S or jeevikesh .S_"
             new_state = STATE_NAME
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, expected_version=version)
         
         elif incoming_msg.lower() in ['no', '2', 'no.']:
             reply = "To track your complaint, please visit the official NCRP website:\n\n"
             reply += "🔗 https://cybercrime.gov.in\n\n"
             reply += "Type 'Hi' anytime to start a new complaint registration."
-            db.delete_session(from_number)
+            store.delete_session(from_number)
             new_state = None
         
         else:
@@ -259,7 +643,7 @@ def webhook():
             session_data['name'] = result
             reply = "Please enter your *mobile number* (10 digits):"
             new_state = STATE_MOBILE
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, {'name': result}, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid name:"
             new_state = STATE_NAME
@@ -271,7 +655,7 @@ def webhook():
             reply = "Please enter your *Date of Birth* (D-M-YYYY):\n"
             reply += "_Examples: 2-3-2001 or 02-03-2001 or 2-03-2001_"
             new_state = STATE_DOB
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, {'mobile_no': result}, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid mobile number:"
             new_state = STATE_MOBILE
@@ -282,7 +666,7 @@ def webhook():
             session_data['dob'] = result
             reply = "Please enter your *Father's Name*:"
             new_state = STATE_FATHER_NAME
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, {'dob': result}, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter date in D-M-YYYY format:"
             new_state = STATE_DOB
@@ -293,34 +677,77 @@ def webhook():
             session_data['father_name'] = result
             reply = "Please enter your *District*:"
             new_state = STATE_DISTRICT
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, {'father_name': result}, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid name:"
             new_state = STATE_FATHER_NAME
     
+    elif state == STATE_DISTRICT and Validators.district_for_pincode(incoming_msg):
+        # A PIN code that serves a single district fills in both fields
+        district, district_state = Validators.district_for_pincode(incoming_msg)
+        pin_code = incoming_msg.strip()
+        session_data['district'] = district
+        session_data['pin_code'] = pin_code
+        reply = f"📍 PIN code {pin_code}: *{district}*, {district_state}\n\n"
+        reply += "💳 *Transaction Details*\n\n"
+        reply += "How many *fraudulent transactions* were made?\n"
+        reply += "_Enter a number (e.g., 2)_"
+        new_state = STATE_TRANSACTION_COUNT
+        store.save_session_fields(from_number, new_state, {'district': district, 'pin_code': pin_code}, expected_version=version)
+    
+    elif state == STATE_DISTRICT and re.match(r"^\s*[0-9]{6}\s*$", incoming_msg):
+        # Most bundled PIN prefixes serve several districts, so a PIN alone
+        # usually can't name the district
+        reply = f"📍 We couldn't tell your district from PIN code {incoming_msg.strip()}.\n\n"
+        reply += "Please type your *District* name (you'll be asked for the PIN code next):"
+        new_state = STATE_DISTRICT
+    
     elif state == STATE_DISTRICT:
         is_valid, result = Validators.validate_district(incoming_msg)
         if is_valid:
             session_data['district'] = result
             reply = "Please enter your *PIN Code* (6 digits):"
             new_state = STATE_PIN_CODE
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, {'district': result}, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid district name:"
             new_state = STATE_DISTRICT
     
-    elif state == STATE_PIN_CODE:
+    elif state == STATE_PIN_CONFIRM and incoming_msg.lower() in ['yes', 'y', 'keep']:
+        # The user stands by a PIN code the index places in another district
+        reply = "💳 *Transaction Details*\n\n"
+        reply += "How many *fraudulent transactions* were made?\n"
+        reply += "_Enter a number (e.g., 2)_"
+        new_state = STATE_TRANSACTION_COUNT
+        store.save_session_fields(from_number, new_state, expected_version=version)
+    
+    elif state in (STATE_PIN_CODE, STATE_PIN_CONFIRM):
         is_valid, result = Validators.validate_pincode(incoming_msg)
-        if is_valid:
+        warning = Validators.pincode_mismatch(result, session_data.get('district')) if is_valid else None
+        if warning:
+            # Only a hint: the bundled index doesn't cover every post office
             session_data['pin_code'] = result
-            reply = "💳 *Transaction Details*\n\n"
+            reply = f"⚠️ {warning}.\n\n"
+            reply += "Reply *Yes* to keep it, or send the correct PIN code:"
+            new_state = STATE_PIN_CONFIRM
+            store.save_session_fields(from_number, new_state, {'pin_code': result}, expected_version=version)
+        elif is_valid:
+            session_data['pin_code'] = result
+            fields = {'pin_code': result}
+            reply = ""
+            # The PIN code settles the spelling of a district typed with a typo
+            district = Validators.district_served_by(result, session_data.get('district'))
+            if district and district != session_data.get('district'):
+                session_data['district'] = fields['district'] = district
+                reply = f"📍 District recorded as *{district}*\n\n"
+            reply += "💳 *Transaction Details*\n\n"
             reply += "How many *fraudulent transactions* were made?\n"
             reply += "_Enter a number (e.g., 2)_"
             new_state = STATE_TRANSACTION_COUNT
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, fields, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid PIN code:"
-            new_state = STATE_PIN_CODE
+            new_state = state
     
     elif state == STATE_TRANSACTION_COUNT:
         is_valid, result = Validators.validate_number(incoming_msg, "Transaction count")
@@ -333,7 +760,11 @@ def webhook():
             reply += "Enter *Transaction Date* (D-M-YYYY):\n"
             reply += "_Examples: 25-10-2024 or 2-3-2024_"
             new_state = STATE_TRANS_DATE
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, {
+                'transaction_count': result,
+                'transactions': [],
+                'current_transaction': 0
+            }, expected_version=version)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid number:"
             new_state = STATE_TRANSACTION_COUNT
@@ -349,7 +780,11 @@ def webhook():
             reply = "Enter *Transaction Time*:\n"
             reply += "_Examples: 14:30, 2:30 PM, 02:03 pm, 2:3 PM_"
             new_state = STATE_TRANS_TIME
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(
+                from_number, new_state,
+                transactions={current_trans: session_data['transactions'][current_trans]},
+                expected_version=version
+            )
         else:
             reply = f"❌ {result}\n\nPlease enter date in D-M-YYYY format:"
             new_state = STATE_TRANS_DATE
@@ -362,7 +797,11 @@ def webhook():
             
             reply = "Enter *Bank Name*:"
             new_state = STATE_TRANS_BANK
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(
+                from_number, new_state,
+                transactions={current_trans: session_data['transactions'][current_trans]},
+                expected_version=version
+            )
         else:
             reply = f"❌ {result}\n\nPlease enter time (Examples: 14:30, 2:30 PM, 02:03 pm):"
             new_state = STATE_TRANS_TIME
@@ -376,7 +815,11 @@ def webhook():
             reply = "Enter *Bank Account Number*:\n"
             reply += "_Formats:\n• Generic: 9-18 digits (123456789012)\n• SBI: 17 digits with leading zeros\n• ICICI: 12 digits (123456789012)_"
             new_state = STATE_TRANS_ACCOUNT
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(
+                from_number, new_state,
+                transactions={current_trans: session_data['transactions'][current_trans]},
+                expected_version=version
+            )
         else:
             reply = f"❌ {result}\n\nPlease enter a valid bank name:"
             new_state = STATE_TRANS_BANK
@@ -389,7 +832,11 @@ def webhook():
             
             reply = "Enter *Amount Debited* (in ₹):"
             new_state = STATE_TRANS_AMOUNT
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(
+                from_number, new_state,
+                transactions={current_trans: session_data['transactions'][current_trans]},
+                expected_version=version
+            )
         else:
             reply = f"❌ {result}\n\nPlease enter a valid account number:"
             new_state = STATE_TRANS_ACCOUNT
@@ -403,7 +850,11 @@ def webhook():
             reply = "Enter *Transaction ID / Reference Number*:\n"
             reply += "_Formats:\n• Account #: 9-18 digits (123456789012)\n• SBI: 17 digits with zeros\n• UPI: Alphanumeric (1234ABCD5678EFGH)\n• Generic: TXN1234567890_"
             new_state = STATE_TRANS_ID
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(
+                from_number, new_state,
+                transactions={current_trans: session_data['transactions'][current_trans]},
+                expected_version=version
+            )
         else:
             reply = f"❌ {result}\n\nPlease enter a valid amount:"
             new_state = STATE_TRANS_AMOUNT
@@ -423,22 +874,30 @@ def webhook():
                 reply = f"📝 *Transaction #{next_trans + 1}*\n\n"
                 reply += "Enter *Transaction Date* (D-M-YYYY):"
                 new_state = STATE_TRANS_DATE
-                db.save_session(from_number, new_state, session_data)
+                store.save_session_fields(
+                    from_number, new_state,
+                    {'current_transaction': next_trans},
+                    {current_trans: session_data['transactions'][current_trans]},
+                    expected_version=version
+                )
             else:
                 # All transactions collected, show summary
-                summary = format_summary_message(session_data)
+                new_state = STATE_CONFIRM
+                store.save_session_fields(
+                    from_number, new_state,
+                    {'current_transaction': next_trans},
+                    {current_trans: session_data['transactions'][current_trans]},
+                    expected_version=version
+                )
                 
-                # Send summary first
-                resp.message(summary)
+                # Send summary first (the save above moved the session to version + 1)
+                send_summary(resp, from_number, version + 1, session_data)
                 
                 # Ask for confirmation - YES to generate PDF, NO to edit
                 confirm_msg = "📋 Do you want to generate PDF or edit information?\n\n"
                 confirm_msg += "Reply:\n*Yes* - to generate PDF\n*No* - to edit information"
                 resp.message(confirm_msg)
                 
-                new_state = STATE_CONFIRM
-                db.save_session(from_number, new_state, session_data)
-                
                 return str(resp)
         else:
             reply = f"❌ {result}\n\nPlease enter a valid transaction ID:"
@@ -447,51 +906,11 @@ def webhook():
     elif state == STATE_CONFIRM:
         # YES = Generate PDF, NO = Edit
         if incoming_msg.lower() in ['yes', 'confirm']:
-            # YES - Generate PDF and send to WhatsApp
-            reply = "✅ Generating your complaint PDF..."
-            resp.message(reply)
-            
-            # Prepare complaint data
-            complaint_data = {
-                'phone_number': from_number,
-                'name': session_data['name'],
-                'mobile_no': session_data['mobile_no'],
-                'dob': session_data['dob'],
-                'father_name': session_data['father_name'],
-                'district': session_data['district'],
-                'pin_code': session_data['pin_code'],
-                'transactions': session_data['transactions']
-            }
-            
-            # Save to database
-            complaint_id = db.save_complaint(complaint_data)
-            
-            # Generate PDF
-            pdf_buffer = PDFGenerator.generate_complaint_pdf(complaint_data)
-            pdf_path, pdf_filename = upload_pdf_temp(pdf_buffer, from_number.replace('whatsapp:', ''), complaint_id)
-            
-            # Send PDF to WhatsApp
-            success, msg_id = send_pdf_to_whatsapp(from_number, pdf_filename, complaint_id)
-            
-            if success:
-                # Success message
-                success_msg = f"✅ *DATA COLLECTED SUCCESSFUL!*\n\n"
-#                success_msg += f"📋 Complaint ID: *{complaint_id}*\n\n"
-                success_msg += "📞 For further assistance:\n"
-                success_msg += "🔗 https://cybercrime.gov.in\n\n"
-                success_msg += "Thank you for using our service! Stay safe online! 🛡️\n\n"
-                success_msg += "_Type 'Hi' to register a new complaint._"
-                resp.message(success_msg)
-            else:
-                # Fallback if PDF sending fails
-                fallback_msg = f"✅ Complaint registered with ID: {complaint_id}\n\n"
-                fallback_msg += "⚠️ PDF saved locally. Please contact support."
-                resp.message(fallback_msg)
-            
-            db.delete_session(from_number)
-            new_state = None
-            
-            return str(resp)
+            # Claim the session first: a concurrent confirmation conflicts on
+            # this versioned write, and its retry finds STATE_SUBMITTING
+            # instead of saving a second complaint
+            store.save_session_fields(from_number, STATE_SUBMITTING, expected_version=version)
+            return ComplaintSubmission(from_number, session_data)
         
         elif incoming_msg.lower() in ['no', 'edit']:
             # NO - Allow editing before PDF generation
@@ -503,10 +922,11 @@ def webhook():
             reply += "• 2.1.2 = 02:03 PM\n"
             reply += "• 2.1.4 = 123456789012\n"
             reply += "• 2.1.6 = TXN1234567890\n\n"
+            reply += "Send several edits in one message, one per line or separated by ';'\n\n"
             reply += "Type *'done'* when finished\n"
             reply += "Type *'summary'* to view all data"
             new_state = STATE_EDIT
-            db.save_session(from_number, new_state, session_data)
+            store.save_session_fields(from_number, new_state, expected_version=version)
         
         else:
             reply = "Please reply with *Yes* to generate PDF or *No* to edit information."
@@ -514,43 +934,45 @@ def webhook():
     
     elif state == STATE_EDIT:
         if incoming_msg.lower() == 'done':
+            new_state = STATE_CONFIRM
+            store.save_session_fields(from_number, new_state, expected_version=version)
+            
             # Show updated summary
-            summary = format_summary_message(session_data)
-            resp.message(summary)
+            send_summary(resp, from_number, version + 1, session_data)
             
             confirm_msg = "Generate PDF with updated data?\n\n"
             confirm_msg += "Reply:\n*Yes* - to generate PDF\n*No* - to edit more"
             resp.message(confirm_msg)
             
-            new_state = STATE_CONFIRM
-            db.save_session(from_number, new_state, session_data)
-            
             return str(resp)
         
         elif incoming_msg.lower() == 'summary':
-            reply = format_summary_message(session_data)
-            reply += "\n\n*To edit:* type serial_number = new_value\n"
-            reply += "Examples: 1.1 = New Name or 2.1.2 = 02:03 PM\n"
-            reply += "Type 'done' when finished"
-            new_state = STATE_EDIT
+            footer = "\n\n*To edit:* type serial_number = new_value\n"
+            footer += "Examples: 1.1 = New Name or 2.1.2 = 02:03 PM\n"
+            footer += "Type 'done' when finished"
+            send_summary(resp, from_number, version, session_data, footer)
+            return str(resp)
         
         else:
-            # Parse edit command (format: serial_number = new_value)
+            # Parse edit commands (format: serial_number = new_value, one
+            # per line or separated by ';')
             if '=' in incoming_msg:
-                parts = incoming_msg.split('=', 1)
-                field_num = parts[0].strip()
-                new_value = parts[1].strip()
-                
-                success, message = edit_field(session_data, field_num, new_value)
+                edits = parse_edits(incoming_msg)
+                success, messages, fields, transactions = apply_edits(session_data, edits)
                 
                 if success:
-                    reply = message + "\n\n"
+                    reply = "\n".join(messages) + "\n\n"
                     reply += "Continue editing or type 'done' to finish.\n"
                     reply += "Type 'summary' to review all data."
-                    db.save_session(from_number, STATE_EDIT, session_data)
+                    store.save_session_fields(from_number, STATE_EDIT, fields, transactions, expected_version=version)
                 else:
-                    reply = f"❌ {message}\n\n"
+                    if len(edits) == 1:
+                        reply = f"❌ {messages[0][1]}\n\n"
+                    else:
+                        reply = "❌ No changes were saved. Please fix:\n"
+                        reply += "\n".join(f"• {field_num}: {error}" for field_num, error in messages) + "\n\n"
                     reply += "Format: *serial_number = new_value*\n"
+                    reply += "Several edits can go in one message, one per line or separated by ';'\n"
                     reply += "Examples:\n• 1.1 = JOHN SMITH\n• 2.1.2 = 02:03 PM\n• 2.1.4 = 123456789012"
                     new_state = STATE_EDIT
             else:
@@ -568,7 +990,7 @@ def webhook():
     
     else:
         reply = "Something went wrong. Please type 'Hi' to restart."
-        db.delete_session(from_number)
+        store.delete_session(from_number)
         new_state = None
     
     # Send response
@@ -580,21 +1002,123 @@ def webhook():
 @app.route('/download/<filename>')
 def download_pdf(filename):
     """Serve PDF files for download"""
+    pdf_bytes = pdf_cache.get(filename)
+    if pdf_bytes is not None:
+        delivery.media_fetched(filename)
+        return Response(pdf_bytes, mimetype='application/pdf', headers={
+            'Content-Disposition': f'attachment; filename={filename}'
+        })
+    
     pdf_dir = os.path.join(os.getcwd(), 'temp_pdfs')
     try:
-        return send_from_directory(pdf_dir, filename, as_attachment=True)
+        response = send_from_directory(pdf_dir, filename, as_attachment=True)
     except Exception as e:
         return f"File not found: {e}", 404
+    delivery.media_fetched(filename)
+    return response
+
+
+@app.route('/twilio/status', methods=['POST'])
+def delivery_status():
+    """Twilio status callback for a sent PDF message; buffered, written in batches"""
+    # Anyone could otherwise mark PDFs failed (and have them re-sent) or delivered
+    if not signed_by_twilio(status_callback_url(), request.form, request.headers.get('X-Twilio-Signature')):
+        return 'Invalid Twilio signature', 403
+    delivery.status_callback(
+        request.form.get('MessageSid'),
+        request.form.get('MessageStatus'),
+        request.form.get('ErrorCode')
+    )
+    return '', 204
+
+
+@app.route('/delivery/stats')
+@auth.require('admin')
+def delivery_stats():
+    """API endpoint for PDF delivery outcomes and latency percentiles (?hours=24)."""
+    try:
+        hours = float(request.args.get('hours', 24))
+    except ValueError:
+        return jsonify({'error': 'hours must be a number'}), 400
+    return json_response(lambda: delivery.stats(hours))
 
 
 @app.route('/complaints')
+@auth.require('admin', 'attender')
 def get_complaints():
     """API endpoint to get all complaints for the admin dashboard."""
-    complaints = db.get_all_complaints()
-    return jsonify(complaints)
+    compact = wants_compact()
+    etag = f"complaints-{'compact' if compact else 'records'}-{db.data_version('complaints')}"
+    return json_response(lambda: db.get_all_complaints_json(compact), etag)
+
+
+@app.route('/complaints/<int:complaint_id>')
+@auth.require('admin', 'attender')
+def get_complaint(complaint_id):
+    """API endpoint for one complaint, whether it is still active or archived."""
+    complaint = db.get_complaint(complaint_id)
+    if complaint is None:
+        return jsonify({'error': f'Complaint {complaint_id} not found'}), 404
+    return json_response(lambda: complaint)
+
+
+@app.route('/complaints/bundle')
+@auth.require('admin')
+def complaint_bundle():
+    """API endpoint streaming selected complaints as one PDF with a table of contents."""
+    status = request.args.get('status') or None
+    district = request.args.get('district') or None
+    try:
+        ids = [int(value) for value in request.args['ids'].split(',') if value.strip()] if request.args.get('ids') else None
+    except ValueError:
+        return jsonify({'error': 'ids must be comma-separated complaint IDs'}), 400
+
+    title = ' - '.join(['Case bundle'] + [value for value in (status, district) if value])
+    bundle = BundleWriter(db, title=title, status=status, district=district, complaint_ids=ids)
+    filename = f"case_bundle_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
+    return Response(stream_with_context(iter(bundle)), mimetype='application/pdf', headers={
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
+
+
+@app.route('/complaints/stale')
+@auth.require('admin', 'attender')
+def get_stale_complaints():
+    """API endpoint for the Pending complaints that have waited past the threshold."""
+    return json_response(lambda: {
+        'threshold_seconds': stale_monitor.threshold_seconds,
+        'complaints': stale_monitor.current(),
+    })
+
+
+@app.route('/complaints/stale/count')
+@auth.require('admin', 'attender')
+def get_stale_count():
+    """API endpoint for how many complaints are stale, as of the monitor's last check."""
+    return json_response(lambda: {
+        'threshold_seconds': stale_monitor.threshold_seconds,
+        'count': stale_monitor.count(),
+    })
+
+
+@app.route('/events/stale')
+@auth.require('admin', allow_query_token=True)
+def stale_events():
+    """Server-Sent Events stream announcing newly stale complaints."""
+    listener = stale_monitor.subscribe()
+    stream = stale_monitor.stream(
+        listener,
+        lifetime=STALE_STREAM_SECONDS,
+        last_event_id=request.headers.get('Last-Event-ID'),
+    )
+    response = Response(stream_with_context(stream), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @app.route('/complaints/<int:complaint_id>/claim', methods=['POST'])
+@auth.require('admin', 'attender')
 def claim_complaint(complaint_id):
     """API endpoint for an attender to claim a case or admin to assign it."""
     data = request.get_json()
@@ -604,6 +1128,12 @@ def claim_complaint(complaint_id):
     if not handler or not status:
         return jsonify({'error': 'Missing handler or status'}), 400
 
+    if g.user['role'] == 'attender':
+        # Attenders can only take an unassigned Pending case, for themselves
+        if db.claim_complaint(complaint_id, g.user['username'], QUEUE_LEASE_SECONDS):
+            return jsonify({'message': f'Complaint {complaint_id} claimed successfully.'}), 200
+        return jsonify({'error': f'Complaint {complaint_id} is already claimed'}), 409
+
     success = db.update_complaint_handler_status(complaint_id, handler, status)
 
     if success:
@@ -612,7 +1142,94 @@ def claim_complaint(complaint_id):
         return jsonify({'error': 'Failed to update complaint in database'}), 500
 
 
+def page_args():
+    """Read ?limit=&offset= for paged queue endpoints, clamped to sane bounds"""
+    limit = request.args.get('limit', 50, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return max(1, min(limit, QUEUE_MAX_PAGE)), max(0, offset)
+
+
+@app.route('/queue/claim', methods=['POST'])
+@auth.require('attender')
+def claim_next():
+    """API endpoint for an attender to claim the next N oldest Pending cases."""
+    data = request.get_json(silent=True) or {}
+    count = data.get('count', 1)
+    if not isinstance(count, int) or count < 1:
+        return jsonify({'error': 'count must be a positive integer'}), 400
+
+    claimed = db.claim_next_complaints(g.user['username'], min(count, QUEUE_MAX_CLAIM), QUEUE_LEASE_SECONDS)
+    return json_response(lambda: {'claimed': claimed, 'lease_seconds': QUEUE_LEASE_SECONDS})
+
+
+@app.route('/queue/renew', methods=['POST'])
+@auth.require('attender')
+def renew_claims():
+    """API endpoint that keeps an attender's claims leased while their dashboard is open."""
+    renewed = db.renew_leases(g.user['username'], QUEUE_LEASE_SECONDS)
+    return jsonify({'renewed': renewed, 'lease_seconds': QUEUE_LEASE_SECONDS}), 200
+
+
+@app.route('/queue/mine')
+@auth.require('attender')
+def my_queue():
+    """API endpoint for one page of the attender's own cases (?status=In Progress by default)."""
+    status = request.args.get('status', 'In Progress')
+    limit, offset = page_args()
+    return json_response(lambda: db.get_handler_complaints(g.user['username'], status, limit, offset))
+
+
+@app.route('/queue/pending')
+@auth.require('admin', 'attender')
+def pending_queue():
+    """API endpoint for one page of unassigned Pending cases, oldest first."""
+    limit, offset = page_args()
+    return json_response(lambda: db.get_pending_complaints(limit, offset))
+
+
+@app.route('/assignment')
+@auth.require('admin')
+def assignment_status():
+    """API endpoint for the auto-assignment policy and each attender's open cases."""
+    return json_response(lambda: {'interval_seconds': ASSIGN_INTERVAL_SECONDS, **auto_assigner.status()})
+
+
+@app.route('/assignment/run', methods=['POST'])
+@auth.require('admin')
+def run_assignment():
+    """API endpoint to assign a batch of Pending complaints now, whether or not the schedule is on."""
+    assigned = auto_assigner.run()
+    return json_response(lambda: {
+        'assigned': [{'id': complaint_id, 'handler': handler} for complaint_id, handler in assigned]
+    })
+
+
+@app.route('/users/<username>/districts', methods=['POST'])
+@auth.require('admin')
+def set_attender_districts(username):
+    """API endpoint to set the districts an attender is preferred for ({"districts": [...]})."""
+    data = request.get_json(silent=True) or {}
+    districts = data.get('districts')
+    if not isinstance(districts, list):
+        return jsonify({'error': 'districts must be a list of district names'}), 400
+
+    canonical = []
+    for district in districts:
+        is_valid, result = Validators.validate_district(str(district))
+        if not is_valid:
+            return jsonify({'error': f'{district}: {result}'}), 400
+        if result not in canonical:
+            canonical.append(result)
+
+    user = db.get_user(username)
+    if not user or user['role'] != 'attender':
+        return jsonify({'error': f'No attender named {username}'}), 404
+    db.set_user_districts(username, canonical)
+    return jsonify({'username': username, 'districts': canonical}), 200
+
+
 @app.route('/complaints/<int:complaint_id>/status', methods=['POST'])
+@auth.require('admin', 'attender')
 def update_status(complaint_id):
     """API endpoint to update a case's status and transactions."""
     data = request.get_json()
@@ -625,22 +1242,57 @@ def update_status(complaint_id):
     else:
         return jsonify({'error': 'Failed to update complaint status'}), 500
 
+USER_ROLES = ('admin', 'attender')
+
+
 @app.route('/register', methods=['POST'])
 def register_user():
-    """API endpoint to register a new user."""
+    """API endpoint to register a new user.
+
+    Only an admin may register users, except on a fresh install: until an
+    admin exists, anyone may create that first admin account.
+    """
+    if not db.get_users_by_role('admin'):
+        return register_first_admin()
+    return register_by_admin()
+
+
+def registration_form():
+    """(username, password, role) from the request, or an error response"""
     data = request.get_json()
     username = data.get('username')
     password = data.get('password')
     role = data.get('role')
     
     if not all([username, password, role]):
-        return jsonify({'error': 'Missing username, password, or role'}), 400
-    
+        return None, (jsonify({'error': 'Missing username, password, or role'}), 400)
+    if role not in USER_ROLES:
+        return None, (jsonify({'error': f"Role must be one of: {', '.join(USER_ROLES)}"}), 400)
     if db.get_user(username):
-        return jsonify({'error': 'Username already exists'}), 409
-    
+        return None, (jsonify({'error': 'Username already exists'}), 409)
+    return (username, password, role), None
+
+
+def register_first_admin():
+    form, error = registration_form()
+    if error:
+        return error
+    username, password, role = form
+    if role != 'admin':
+        return jsonify({'error': 'No admin exists yet; register an admin account first'}), 403
+    if not db.add_first_admin(username, password):
+        # Another request created the first admin meanwhile
+        return jsonify({'error': 'Authentication required'}), 401
+    return jsonify({'message': f'User {username} registered successfully as admin'}), 201
+
+
+@auth.require('admin')
+def register_by_admin():
+    form, error = registration_form()
+    if error:
+        return error
+    username, password, role = form
     db.add_user(username, password, role)
-    
     return jsonify({'message': f'User {username} registered successfully as {role}'}), 201
 
 
@@ -657,36 +1309,109 @@ def login_user():
     if user and user['role'] == role and db.check_password(user['password_hash'], password):
         # Store user info in session
         session['user'] = {'username': user['username'], 'role': user['role']}
-        return jsonify({'message': 'Login successful', 'user': session['user']}), 200
+        token = auth.issue_token(user)
+        return jsonify({'message': 'Login successful', 'user': session['user'], 'token': token}), 200
     else:
         return jsonify({'error': 'Invalid credentials or role'}), 401
 
 
 @app.route('/users/attenders')
+@auth.require('admin')
 def get_attenders():
     """API endpoint to get all users with the 'attender' role."""
-    attenders = db.get_users_by_role('attender')
-    # We only need the usernames
-    attender_usernames = [user['username'] for user in attenders]
-    return jsonify(attender_usernames)
+    def attender_usernames():
+        # We only need the usernames
+        return [user['username'] for user in db.get_users_by_role('attender')]
+    
+    etag = f"attenders-{db.data_version('users')}"
+    return json_response(attender_usernames, etag)
 
 
 @app.route('/<path:filename>')
 def serve_static(filename):
-    """Serves static files like admin.html, attender.html."""
-    return send_from_directory('.', filename)
+    """Serves the allow-listed dashboard files like admin.html, attender.html."""
+    response = static_assets.response(filename)
+    if response is None:
+        return "Not found", 404
+    return response
 
 
 @app.route('/')
 def root():
     """Redirect root to login page."""
-    return send_from_directory('.', 'login.html')
+    return static_assets.response('login.html')
 
 
 @app.route('/login.html')
 def login_page():
     """Serves the login.html page as the default page."""
-    return send_from_directory('.', 'login.html')
+    return static_assets.response('login.html')
+
+
+def archive_and_optimize():
+    """Move old completed complaints to the archive, then tidy the hot database"""
+    moved = db.archive_completed_complaints(ARCHIVE_AFTER_DAYS)
+    if moved:
+        print(f"Archived {moved} completed complaints")
+    db.optimize_storage()
+    db.clean_delivery_events(DELIVERY_EVENTS_KEEP_DAYS)
+    db.clean_complaint_changes()
+
+
+def auto_assign():
+    """Hand a batch of unassigned Pending complaints to the least loaded attenders"""
+    assigned = auto_assigner.run()
+    if assigned:
+        print(f"Auto-assigned {len(assigned)} complaints")
+
+
+def flush_delivery_status():
+    """Write buffered delivery callbacks, then re-send PDFs that failed"""
+    delivery.flush()
+    delivery.resend_failed(resend_pdf)
+
+
+# Process that started the background tasks; a forked worker starts its own
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def start_background_tasks():
+    """Start the periodic maintenance threads, once per server process"""
+    global _background_pid
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        # Warm the PDF workers up now rather than on the first confirmation
+        pdf_service.start()
+        atexit.register(pdf_service.shutdown)
+        # Pick up edited dashboard files without touching the disk per request
+        PeriodicTask(2, static_assets.reload_changed, 'static-assets-reload').start()
+        # Flag newly stale complaints with one indexed query, for all dashboards at once
+        PeriodicTask(30, stale_monitor.check, 'stale-case-monitor').start()
+        # Hand abandoned attender claims back to the Pending queue
+        PeriodicTask(60, db.release_expired_claims, 'claim-lease-reaper').start()
+        # Spread Pending complaints over attenders by load in one transaction a batch
+        if ASSIGN_INTERVAL_SECONDS > 0:
+            PeriodicTask(ASSIGN_INTERVAL_SECONDS, auto_assign, 'auto-assigner').start()
+        # Batch Twilio's delivery callbacks into one write every few seconds
+        PeriodicTask(DELIVERY_FLUSH_SECONDS, flush_delivery_status, 'delivery-status-flush').start()
+        # Keep the hot database small: archive old completed complaints, then
+        # refresh planner statistics and release freed pages
+        PeriodicTask(60 * 60, archive_and_optimize, 'complaint-archiver').start()
+        # Snapshot the databases in small steps while the bot keeps writing
+        if BACKUP_INTERVAL_HOURS > 0:
+            PeriodicTask(BACKUP_INTERVAL_HOURS * 60 * 60, backups.run, 'database-backup').start()
+
+
+@app.before_request
+def ensure_background_tasks():
+    # Every process that serves requests (a gunicorn or waitress worker, the
+    # debug reloader's child) starts its tasks on its first request, whatever
+    # the server; a process that only imports the app starts none
+    if _background_pid != os.getpid():
+        start_background_tasks()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,308 @@
+"""Asyncio (ASGI) server for the Twilio webhook.
+
+The Flask webhook holds a worker thread for the whole of every message,
+including its SQLite calls and the Twilio API call that sends the PDF, so a
+burst of senders needs a thread each. This entry point serves /webhook and
+/download/<filename> from an event loop instead: SQLite calls run on a few
+database threads (AsyncDatabase), Twilio is called with the async HTTP
+client, and PDFs render in the existing worker processes. The conversation
+itself is app.advance_conversation, with the same Validators, summaries and
+PDFGenerator as the Flask server.
+
+Dashboards and background tasks stay on the Flask server, which can run
+alongside this one on the same database: complaints saved here reach the
+dashboards' ETags and cached lists through the database's change tracking
+(see Database.data_version). Point the Twilio webhook and
+NGROK_URL at this server, since it also serves the PDF downloads and
+receives their delivery status callbacks:
+
+    uvicorn asgi_webhook:app --port 5002
+"""
+import asyncio
+import os
+import random
+from urllib.parse import parse_qs
+
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from twilio.rest import Client
+from twilio.twiml.messaging_response import MessagingResponse
+
+import app as webapp
+from app import (
+    ComplaintSubmission, DELIVERY_FLUSH_SECONDS, OVERLOADED_REPLY, PDF_CAPTION, RATE_LIMITED_REPLY,
+    SESSION_TIMEOUT_MESSAGE, SESSION_WRITE_ATTEMPTS, TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_WHATSAPP_NUMBER,
+    pdf_public_url, session_timed_out, signed_by_twilio, status_callback_url, submission_reply
+)
+from async_database import AsyncDatabase
+from database import SessionConflict
+from pdf_service import PDFRenderError
+from rate_limit import LoadShedder
+from scheduler import PeriodicTask
+from striped_lock import AsyncStripedLock
+
+# Twilio's form posts are small; anything bigger is not a webhook
+MAX_BODY_BYTES = 64 * 1024
+
+adb = AsyncDatabase(webapp.db, threads=int(os.getenv('ASYNC_DB_THREADS', 4)))
+
+# Waiting requests cost a coroutine rather than a thread, so far more of them
+# can be in flight than on the Flask server
+load_shedder = LoadShedder(int(os.getenv('ASYNC_WEBHOOK_MAX_IN_FLIGHT', 512)))
+sender_locks = AsyncStripedLock(int(os.getenv('SENDER_LOCK_STRIPES', 64)))
+
+# Created at startup, so the HTTP session belongs to the server's event loop
+twilio_client = None
+
+
+class SessionWrites:
+    """Stands in for the Database in advance_conversation and records its
+    session writes, which are then replayed on the AsyncDatabase"""
+
+    def __init__(self):
+        self.calls = []
+
+    def save_session(self, *args, **kwargs):
+        self.calls.append(('save_session', args, kwargs))
+
+    def save_session_fields(self, *args, **kwargs):
+        self.calls.append(('save_session_fields', args, kwargs))
+
+    def delete_session(self, *args, **kwargs):
+        self.calls.append(('delete_session', args, kwargs))
+
+    async def replay(self, adb):
+        for name, args, kwargs in self.calls:
+            await getattr(adb, name)(*args, **kwargs)
+
+
+async def send_pdf_to_whatsapp(phone_number, pdf_filename, complaint_id):
+    """Send PDF file to WhatsApp via Twilio, without blocking the event loop"""
+    try:
+        message = await twilio_client.messages.create_async(
+            from_=TWILIO_WHATSAPP_NUMBER,
+            body=PDF_CAPTION,
+            media_url=[pdf_public_url(pdf_filename)],
+            status_callback=status_callback_url(),
+            to=phone_number
+        )
+        await adb.run(webapp.delivery.record_sent, message.sid, complaint_id, phone_number, pdf_filename)
+        return True, message.sid
+    except Exception as e:
+        print(f"Error sending PDF: {e}")
+        return False, str(e)
+
+
+async def submit_complaint(submission):
+    """Save a confirmed complaint, send its PDF and end the session; returns the TwiML reply"""
+    from_number = submission.from_number
+    try:
+        complaint_id = await adb.save_complaint(submission.complaint_data)
+    except Exception:
+        # Nothing was saved; let the user (or Twilio's retry) confirm again
+        await adb.save_session_fields(from_number, webapp.STATE_CONFIRM)
+        raise
+
+    try:
+        pdf_bytes = await webapp.pdf_service.render_async(submission.complaint_data)
+    except PDFRenderError as e:
+        print(f"Error generating PDF for complaint {complaint_id}: {e}")
+        pdf_bytes = None
+
+    if pdf_bytes is not None:
+        loop = asyncio.get_running_loop()
+        pdf_path, pdf_filename = await loop.run_in_executor(
+            None, webapp.upload_pdf_temp, pdf_bytes, from_number.replace('whatsapp:', ''), complaint_id
+        )
+        success, msg_id = await send_pdf_to_whatsapp(from_number, pdf_filename, complaint_id)
+    else:
+        success = False
+
+    await adb.delete_session(from_number)
+    webapp.summary_renderer.forget(from_number)
+
+    return submission_reply(complaint_id, pdf_bytes is not None, success)
+
+
+async def process_message(from_number, incoming_msg):
+    """Advance the conversation for one inbound message and return the TwiML reply"""
+    await adb.clean_expired_sessions(30)
+
+    state, session_data, version = await adb.get_session_with_version(from_number)
+    if session_timed_out(state, session_data):
+        await adb.delete_session(from_number)
+        resp = MessagingResponse()
+        resp.message(SESSION_TIMEOUT_MESSAGE)
+        return str(resp)
+
+    writes = SessionWrites()
+    result = webapp.advance_conversation(writes, from_number, incoming_msg, state, session_data, version)
+    try:
+        await writes.replay(adb)
+    except SessionConflict:
+        # A summary may have been cached for the version this attempt failed to write
+        webapp.summary_renderer.forget(from_number)
+        raise
+
+    if isinstance(result, ComplaintSubmission):
+        return await submit_complaint(result)
+    return result
+
+
+async def handle_message(from_number, incoming_msg):
+    """Process one message with per-sender ordering (see app.handle_message)"""
+    async with sender_locks.for_key(from_number):
+        for attempt in range(SESSION_WRITE_ATTEMPTS):
+            try:
+                return await process_message(from_number, incoming_msg)
+            except SessionConflict:
+                if attempt == SESSION_WRITE_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(random.uniform(0, 0.005) * (attempt + 1))
+
+
+async def webhook(form):
+    """Main webhook endpoint for Twilio WhatsApp messages"""
+    incoming_msg = form.get('Body', '').strip()
+    from_number = form.get('From', '')
+    message_sid = form.get('MessageSid')
+
+    # Shed load before touching the database
+    if not webapp.sender_limiter.allow(from_number):
+        return RATE_LIMITED_REPLY
+    if not load_shedder.try_enter():
+        return OVERLOADED_REPLY
+
+    try:
+        if not message_sid:
+            return await handle_message(from_number, incoming_msg)
+
+        # Twilio retries slow deliveries; answer repeats with the original reply
+        is_new, cached_reply = await adb.run(webapp.message_dedup.begin, message_sid)
+        if not is_new:
+            return cached_reply if cached_reply is not None else str(MessagingResponse())
+
+        try:
+            reply = await handle_message(from_number, incoming_msg)
+        except Exception:
+            await adb.run(webapp.message_dedup.abandon, message_sid)
+            raise
+
+        await adb.run(webapp.message_dedup.finish, message_sid, reply)
+        return reply
+    finally:
+        load_shedder.leave()
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def download_pdf(filename):
+    """Serve PDF files for download; returns (status, body, content_type, headers)"""
+    pdf_bytes = webapp.pdf_cache.get(filename)
+    if pdf_bytes is None:
+        if os.path.basename(filename) != filename or filename.startswith('.'):
+            return 404, b'File not found', 'text/plain', []
+        path = os.path.join(os.getcwd(), 'temp_pdfs', filename)
+        try:
+            pdf_bytes = await asyncio.get_running_loop().run_in_executor(None, read_file, path)
+        except OSError as e:
+            return 404, f"File not found: {e}".encode('utf-8'), 'text/plain', []
+    webapp.delivery.media_fetched(filename)
+    return 200, pdf_bytes, 'application/pdf', [(b'content-disposition', f'attachment; filename={filename}'.encode())]
+
+
+async def read_body(receive):
+    """The request body, or None if it is larger than MAX_BODY_BYTES"""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def respond(send, status, body, content_type, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def startup():
+    global twilio_client
+    webapp.db.clean_expired_sessions(30)
+    # Warm the PDF workers up before the first confirmation
+    webapp.pdf_service.start()
+    twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=AsyncTwilioHttpClient())
+    # Delivery callbacks received here are written (and failed PDFs re-sent)
+    # from this process's own buffer
+    PeriodicTask(DELIVERY_FLUSH_SECONDS, webapp.flush_delivery_status, 'delivery-status-flush').start()
+
+
+async def shutdown():
+    webapp.delivery.flush()
+    await twilio_client.http_client.close()
+    adb.close()
+    webapp.pdf_service.shutdown()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await startup()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """The ASGI application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path']
+    if path == '/webhook' and method == 'POST':
+        body = await read_body(receive)
+        if body is None:
+            await respond(send, 413, b'Request body too large', 'text/plain')
+            return
+        form = {key: values[0] for key, values in parse_qs(body.decode('utf-8'), keep_blank_values=True).items()}
+        reply = await webhook(form)
+        await respond(send, 200, reply.encode('utf-8'), 'text/xml; charset=utf-8')
+    elif path == '/twilio/status' and method == 'POST':
+        body = await read_body(receive)
+        form = {key: values[0] for key, values in parse_qs((body or b'').decode('utf-8'), keep_blank_values=True).items()}
+        signature = dict(scope['headers']).get(b'x-twilio-signature', b'').decode('latin-1')
+        if not signed_by_twilio(status_callback_url(), form, signature):
+            await respond(send, 403, b'Invalid Twilio signature', 'text/plain')
+            return
+        webapp.delivery.status_callback(form.get('MessageSid'), form.get('MessageStatus'), form.get('ErrorCode'))
+        await respond(send, 204, b'', 'text/plain')
+    elif path.startswith('/download/') and method == 'GET':
+        status, body, content_type, headers = await download_pdf(path[len('/download/'):])
+        await respond(send, status, body, content_type, headers)
+    else:
+        await respond(send, 404, b'Not found', 'text/plain')
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, port=int(os.getenv('ASGI_PORT', 5002)))
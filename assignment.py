@@ -0,0 +1,169 @@
+import heapq
+import itertools
+from fuzzy_index import normalize
+
+
+class AssignmentPolicy:
+    """How the auto-assigner hands out unassigned Pending complaints.
+
+    - max_open_cases: attenders with this many open cases get no more.
+    - batch_size: most complaints assigned per run (one transaction).
+    - min_age_seconds: how long a new complaint is left for attenders to
+      claim themselves; set it to STALE_CASE_SECONDS to auto-assign only
+      stale complaints.
+    - affinity: 'none' ignores districts; 'prefer' gives a complaint to the
+      least loaded attender covering its district unless they have more
+      than `affinity_slack` open cases over the least loaded attender of
+      all; 'only' keeps a covered district's complaints for the attenders
+      covering it, waiting for one of them to have room.
+    - lease_seconds: leased like attender claims, so cases of an attender
+      who isn't working go back to the queue; None never expires.
+    """
+
+    AFFINITIES = ('none', 'prefer', 'only')
+
+    def __init__(self, max_open_cases=20, batch_size=200, min_age_seconds=0,
+                 affinity='prefer', affinity_slack=2, lease_seconds=None):
+        if affinity not in self.AFFINITIES:
+            raise ValueError(f"affinity must be one of {', '.join(self.AFFINITIES)}")
+        self.max_open_cases = max_open_cases
+        self.batch_size = batch_size
+        self.min_age_seconds = min_age_seconds
+        self.affinity = affinity
+        self.affinity_slack = affinity_slack
+        self.lease_seconds = lease_seconds
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class AttenderHeap:
+    """Attenders ordered by open-case load, overall and per district.
+
+    One min-heap of (load, turn, username) holds every attender with room
+    for another case, and one more per district holds the attenders who
+    cover it, so the least loaded attender (for a district) is found in
+    O(log n). Giving an attender a case pushes a new entry rather than
+    updating the old one; entries whose load is out of date are dropped
+    when they reach the top. Ties go to whoever was given a case longest ago.
+    """
+
+    def __init__(self, attenders, max_load=None):
+        """`attenders` is (username, open cases, districts) for each attender"""
+        self.max_load = max_load
+        self._load = {}
+        self._districts = {}
+        self._heaps = {None: []}
+        self._turns = itertools.count()
+        for username, load, districts in sorted(attenders, key=lambda attender: (attender[1], attender[0])):
+            self._load[username] = load
+            self._districts[username] = {normalize(district) for district in districts} - {''}
+            for key in self._districts[username]:
+                self._heaps.setdefault(key, [])
+            self._push(username)
+
+    def _push(self, username):
+        load = self._load[username]
+        if self.max_load is not None and load >= self.max_load:
+            return
+        entry = (load, next(self._turns), username)
+        heapq.heappush(self._heaps[None], entry)
+        for key in self._districts[username]:
+            heapq.heappush(self._heaps[key], entry)
+
+    def covers(self, district):
+        """True if any attender covers `district`, with room or not"""
+        return normalize(district) in self._heaps
+
+    def least_loaded(self, district=None):
+        """(load, username) of the least loaded attender with room, among those covering
+        `district` if one is given; None if there is nobody"""
+        heap = self._heaps.get(normalize(district) if district else None)
+        while heap:
+            load, turn, username = heap[0]
+            if load == self._load[username]:
+                return load, username
+            heapq.heappop(heap)
+        return None
+
+    def add_case(self, username):
+        self._load[username] += 1
+        self._push(username)
+
+    def loads(self):
+        return dict(self._load)
+
+
+class AutoAssigner:
+    """Assigns unassigned Pending complaints to attenders by load.
+
+    Each run reads the attenders' open-case loads and up to `batch_size`
+    of the oldest assignable complaints, plans every assignment in memory
+    over an AttenderHeap, then applies them in one transaction. The
+    updates are conditional, so a complaint an attender claimed meanwhile
+    is skipped rather than taken from them.
+    """
+
+    def __init__(self, db, policy):
+        self.db = db
+        self.policy = policy
+
+    def choose(self, heap, district):
+        """The attender to give a complaint from `district`, or None to leave it Pending"""
+        anyone = heap.least_loaded()
+        if self.policy.affinity == 'none' or not district or not heap.covers(district):
+            return anyone[1] if anyone else None
+        local = heap.least_loaded(district)
+        if local is None:
+            return None if self.policy.affinity == 'only' else (anyone[1] if anyone else None)
+        if self.policy.affinity == 'only' or local[0] <= anyone[0] + self.policy.affinity_slack:
+            return local[1]
+        return anyone[1]
+
+    def plan(self, attenders, complaints):
+        """[(complaint id, username)] for `complaints` [(id, district)], oldest first.
+
+        `attenders` is (username, open cases, districts) for each attender.
+        """
+        heap = AttenderHeap(attenders, self.policy.max_open_cases)
+        assignments = []
+        for complaint_id, district in complaints:
+            if heap.least_loaded() is None:
+                break
+            username = self.choose(heap, district)
+            if username is not None:
+                heap.add_case(username)
+                assignments.append((complaint_id, username))
+        return assignments
+
+    def attenders(self):
+        """(username, open cases, districts) for every attender"""
+        loads = self.db.get_open_case_loads()
+        return [
+            (user['username'], loads.get(user['username'], 0),
+             [district for district in (user.get('districts') or '').split(',') if district])
+            for user in self.db.get_users_by_role('attender')
+        ]
+
+    def run(self):
+        """Assign one batch; returns the (complaint id, username) pairs applied"""
+        attenders = self.attenders()
+        if not attenders:
+            return []
+        complaints = self.db.get_assignable_complaints(self.policy.batch_size, self.policy.min_age_seconds)
+        if not complaints:
+            return []
+        assignments = self.plan(attenders, complaints)
+        if not assignments:
+            return []
+        return self.db.assign_complaints(assignments, self.policy.lease_seconds)
+
+    def status(self):
+        """The policy and each attender's open cases and districts"""
+        return {
+            'policy': self.policy.to_dict(),
+            'attenders': [
+                {'username': username, 'open_cases': load, 'districts': districts}
+                for username, load, districts in self.attenders()
+            ],
+        }
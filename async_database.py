@@ -0,0 +1,39 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Awaitable access to a Database for code running on an event loop.
+
+    sqlite3 calls block, so each one runs on a small dedicated pool of
+    database threads and the loop keeps serving other requests meanwhile.
+    Every Database method is available as a coroutine with the same
+    arguments (`await adb.get_session(phone)`), so the SQL and the session
+    versioning stay in one place. The pool size caps how many SQLite
+    calls run at once no matter how many requests are waiting, which
+    matches SQLite's single writer better than a thread per request.
+    """
+
+    def __init__(self, db, threads=4):
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='sqlite')
+
+    async def run(self, func, *args, **kwargs):
+        """Await a blocking callable that uses the database (e.g. MessageDeduplicator.begin)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self.db, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,69 @@
+from functools import wraps
+from flask import request, jsonify, g
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+
+class TokenAuth:
+    """Signed, expiring bearer tokens for the dashboard API.
+
+    Tokens carry the username and role and are verified in memory: the
+    signature and age are checked with HMAC, then the user is confirmed
+    against the database's cached user directory, so no query is made.
+    """
+
+    def __init__(self, secret_key, db, max_age=8 * 60 * 60):
+        self.serializer = URLSafeTimedSerializer(secret_key, salt='dashboard-auth')
+        self.db = db
+        self.max_age = max_age
+
+    def issue_token(self, user):
+        """Create a token for a user dict with 'username' and 'role'."""
+        return self.serializer.dumps({'u': user['username'], 'r': user['role']})
+
+    def verify_token(self, token):
+        """Return {'username', 'role'} for a valid token, otherwise None."""
+        try:
+            payload = self.serializer.loads(token, max_age=self.max_age)
+        except (BadSignature, SignatureExpired):
+            return None
+
+        user = self.db.get_user(payload.get('u'))
+        if not user or user['role'] != payload.get('r'):
+            return None
+
+        return {'username': user['username'], 'role': user['role']}
+
+    @staticmethod
+    def token_from_request(allow_query=False):
+        """Read the bearer token from the Authorization header.
+
+        With `allow_query`, an `access_token` query parameter is accepted too,
+        for clients such as EventSource that cannot set headers.
+        """
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            return header[7:].strip()
+        if allow_query:
+            return request.args.get('access_token')
+        return None
+
+    def require(self, *roles, allow_query_token=False):
+        """Decorator that rejects requests without a valid token for one of `roles`.
+
+        The verified user is available to the view as `flask.g.user`.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                token = self.token_from_request(allow_query_token)
+                user = self.verify_token(token) if token else None
+
+                if not user:
+                    return jsonify({'error': 'Authentication required'}), 401
+                if roles and user['role'] not in roles:
+                    return jsonify({'error': 'Not allowed for this role'}), 403
+
+                g.user = user
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
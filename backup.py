@@ -0,0 +1,145 @@
+"""Online backups of the complaint databases.
+
+    python backup.py                      # snapshot complaints.db and its archive into backups/
+    python backup.py --keep 14 --dir /mnt/backups
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+
+class BackupManager:
+    """Takes verified, timestamped snapshots of live SQLite databases.
+
+    Each database is copied with SQLite's online backup API in steps of
+    `pages` pages, sleeping `pause` seconds between steps so the copy never
+    monopolises the disk. The source connection holds one read transaction
+    for the whole copy: in WAL mode that pins a consistent snapshot without
+    blocking writers, and the copy doesn't restart when the bot writes.
+    Snapshots are written to a temporary name, checked with
+    `PRAGMA integrity_check` and only then renamed into place; the newest
+    `keep` snapshots of each database are retained.
+
+    Every server worker may schedule run(): a lock in backup_dir (an
+    exclusive transaction on a small SQLite file, released even if its
+    process dies) lets one process snapshot at a time, and a run within
+    `min_interval` seconds of the newest snapshot does nothing, so the
+    workers together take one set of snapshots per interval.
+    """
+
+    LOCK_NAME = '.backup.lock'
+
+    def __init__(self, db_paths, backup_dir='backups', keep=7, pages=256, pause=0.005, min_interval=0):
+        self.db_paths = list(db_paths)
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages = pages
+        self.pause = pause
+        self.min_interval = min_interval
+
+    def run(self):
+        """Snapshot every database; returns the paths of the new snapshots.
+
+        Returns [] without copying anything if another process holds the
+        lock or the newest snapshot is younger than `min_interval`.
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        lock = sqlite3.connect(os.path.join(self.backup_dir, self.LOCK_NAME), timeout=0, isolation_level=None)
+        try:
+            try:
+                lock.execute('BEGIN EXCLUSIVE')
+            except sqlite3.OperationalError:
+                return []
+            last = self.last_snapshot_time()
+            if last is not None and time.time() - last < self.min_interval:
+                return []
+
+            # Left by a process that died mid-copy; only the lock holder writes
+            for partial in glob.glob(os.path.join(self.backup_dir, '*.partial')):
+                os.remove(partial)
+
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            snapshots = []
+            for db_path in self.db_paths:
+                if not os.path.exists(db_path):
+                    continue
+                snapshot = self.snapshot(db_path, stamp)
+                self.prune(db_path)
+                snapshots.append(snapshot)
+            return snapshots
+        finally:
+            lock.close()
+
+    def snapshot(self, db_path, stamp):
+        """Copy one database to backup_dir/<name>-<stamp>.db and verify it"""
+        name = os.path.splitext(os.path.basename(db_path))[0]
+        target = os.path.join(self.backup_dir, f"{name}-{stamp}.db")
+        partial = f"{target}.{os.getpid()}.partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        source = sqlite3.connect(db_path, isolation_level=None)
+        dest = sqlite3.connect(partial, isolation_level=None)
+        try:
+            # Pin one read snapshot for every backup step
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(dest, pages=self.pages, progress=self._yield)
+            source.execute('COMMIT')
+
+            # A snapshot is a single self-contained file, not a WAL database
+            dest.execute('PRAGMA journal_mode = DELETE')
+            result = dest.execute('PRAGMA integrity_check').fetchone()[0]
+        finally:
+            source.close()
+            dest.close()
+
+        if result != 'ok':
+            os.remove(partial)
+            raise RuntimeError(f"Backup of {db_path} failed integrity check: {result}")
+
+        os.replace(partial, target)
+        return target
+
+    def snapshots(self, db_path):
+        """Snapshot paths of one database, oldest first"""
+        name = os.path.splitext(os.path.basename(db_path))[0]
+        pattern = os.path.join(self.backup_dir, f"{name}-[0-9]*-[0-9]*.db")
+        # Timestamps sort lexically
+        return sorted(glob.glob(pattern))
+
+    def last_snapshot_time(self):
+        """Modification time of the newest snapshot of any database, or None"""
+        return max((os.path.getmtime(path) for db_path in self.db_paths for path in self.snapshots(db_path)),
+                   default=None)
+
+    def prune(self, db_path):
+        """Delete all but the newest `keep` snapshots of one database"""
+        snapshots = self.snapshots(db_path)
+        for old in snapshots[:max(0, len(snapshots) - self.keep)]:
+            os.remove(old)
+
+    def _yield(self, status, remaining, total):
+        time.sleep(self.pause)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Take verified online snapshots of the complaint databases.')
+    parser.add_argument('databases', nargs='*', default=['complaints.db', 'complaints_archive.db'])
+    parser.add_argument('--dir', default=os.getenv('BACKUP_DIR', 'backups'), help='snapshot directory')
+    parser.add_argument('--keep', type=int, default=int(os.getenv('BACKUP_KEEP', 7)), help='snapshots kept per database')
+    parser.add_argument('--pages', type=int, default=256, help='pages copied per step')
+    parser.add_argument('--pause', type=float, default=0.005, help='seconds to sleep between steps')
+    args = parser.parse_args()
+
+    manager = BackupManager(args.databases, args.dir, args.keep, args.pages, args.pause)
+    started = time.perf_counter()
+    snapshots = manager.run()
+    if not snapshots:
+        print(f"Another process is writing snapshots to {args.dir}, or there is nothing to back up")
+    for snapshot in snapshots:
+        print(f"Wrote {snapshot} ({os.path.getsize(snapshot) / 1e6:.1f} MB)")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
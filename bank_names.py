@@ -0,0 +1,114 @@
+"""Canonical bank names for what complainants type.
+
+    python bank_names.py "state bnk" "indain bank"
+
+data/banks.csv lists each bank under its canonical name, with aliases:
+abbreviations (SBI), common spellings and banks since merged into it
+(Vijaya Bank -> Bank of Baroda).
+"""
+import csv
+import os
+import sys
+from functools import lru_cache
+from fuzzy_index import NgramIndex, edit_similarity, normalize
+
+DEFAULT_BANKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'banks.csv')
+
+# Words every other bank name has too; names are told apart by the rest
+GENERIC_WORDS = frozenset(['bank', 'banks', 'of', 'the', 'and', 'ltd', 'limited', 'co', 'a', 'c', 'ac', 'account',
+                           'bnk', 'bnak', 'bakn', 'bankk', 'baank'])
+
+# Words shared by many banks, listed or not. A name made only of these
+# ("Cooperative Bank", "National Bank") is matched only by an exact alias
+# ("State Bank"); otherwise it names no bank in particular and is kept as typed.
+AMBIGUOUS_WORDS = frozenset([
+    'cooperative', 'operative', 'coop', 'sahakari', 'urban', 'rural', 'gramin', 'grameen', 'grama',
+    'regional', 'district', 'national', 'state', 'central', 'city', 'union', 'india', 'indian',
+    'overseas', 'mercantile', 'commercial', 'small', 'finance', 'payments', 'post', 'federal', 'people',
+])
+
+# Names scoring below MATCH_THRESHOLD, or within MATCH_MARGIN of a different
+# bank, are left as typed: a wrong bank on a complaint is worse than none
+MATCH_THRESHOLD = 0.7
+MATCH_MARGIN = 0.15
+CONTAINMENT = 0.3
+CANDIDATES = 4
+# Trigrams already separate longer names; edit distance rescues short ones
+# ("indain", "axix") and costs O(length^2)
+MAX_EDIT_LENGTH = 16
+
+
+def distinctive(name):
+    """The normalized name without generic words ("State Bank of India" -> "state india")"""
+    return ' '.join(word for word in normalize(name).split() if word not in GENERIC_WORDS)
+
+
+class BankMatcher:
+    """Maps free-text bank names to canonical ones, with a confidence score.
+
+    Built once: full names and aliases go into an exact-match dict, and
+    their distinctive words (generic ones like "bank" removed) into a
+    trigram index. An unknown name is scored against the few entries
+    sharing the most trigrams with it, each by the better of the trigram
+    score and the edit similarity, so "STATE BNK", "Indain Bank" and
+    "hdfc bank ltd" all resolve in tens of microseconds.
+    """
+
+    def __init__(self, pairs, threshold=MATCH_THRESHOLD, margin=MATCH_MARGIN):
+        self.threshold = threshold
+        self.margin = margin
+        pairs = list(pairs)
+        self._exact = {normalize(alias): bank for alias, bank in pairs}
+        self._index = NgramIndex(((distinctive(alias), bank) for alias, bank in pairs), containment=CONTAINMENT)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_BANKS, **kwargs):
+        """Build from an (alias, bank) CSV"""
+        with open(path, newline='', encoding='utf-8') as f:
+            pairs = [(row['alias'], row['bank']) for row in csv.DictReader(f)]
+        return cls(pairs, **kwargs)
+
+    def scores(self, text):
+        """(bank, score) candidates for `text`, best first"""
+        bank = self._exact.get(normalize(text))
+        if bank:
+            return [(bank, 1.0)]
+
+        words = distinctive(text)
+        bank = self._index.exact(words)
+        if bank:
+            return [(bank, 1.0)]
+        if not set(words.split()) - AMBIGUOUS_WORDS:
+            return []
+        best = {}
+        for name, bank, score in self._index.nearest(words, CANDIDATES):
+            # Edit distance is the slow part: skip it for long names, and when
+            # the lengths alone show it can't beat the trigram score
+            longest = max(len(words), len(name))
+            if score < 1.0 and longest <= MAX_EDIT_LENGTH and 1.0 - abs(len(words) - len(name)) / longest > score:
+                score = max(score, edit_similarity(words, name))
+            if score > best.get(bank, 0.0):
+                best[bank] = score
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
+    def match(self, text):
+        """(canonical name, confidence) for `text`, or (None, best score) if no bank is a clear match"""
+        scores = self.scores(text)
+        if not scores:
+            return None, 0.0
+        bank, score = scores[0]
+        runner_up = scores[1][1] if len(scores) > 1 else 0.0
+        if score < 1.0 and (score < self.threshold or score - runner_up < self.margin):
+            return None, score
+        return bank, score
+
+
+@lru_cache(maxsize=None)
+def default_matcher():
+    """The matcher over the bundled bank list, built on first use"""
+    return BankMatcher.from_csv()
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:]:
+        print(name, '->', default_matcher().match(name))
@@ -0,0 +1,213 @@
+"""Queue wait under bursty complaint arrivals, by assignment policy.
+
+Simulates a shift of complaints arriving at a steady rate with scam-wave
+bursts on top, handled by attenders who each cover a few districts and
+work their own cases oldest first (faster in their own districts). Each
+policy is compared on how long complaints wait for an attender and to be
+started, and how unevenly the work is spread:
+
+- manual: an admin hands out a batch round-robin every few minutes
+- auto/<affinity>: AutoAssigner.plan every ASSIGN_INTERVAL_SECONDS
+- pull: every attender takes the oldest case the moment they are free,
+  whatever its district (attenders constantly polling /queue/claim)
+
+Finally it times one AutoAssigner.plan over a large backlog.
+
+    python benchmarks/bench_assignment.py
+    python benchmarks/bench_assignment.py --attenders 20 --burst-rate 200 --seed 3
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from assignment import AssignmentPolicy, AutoAssigner
+from delivery_tracker import percentiles
+
+DISTRICTS = ['Chennai', 'Coimbatore', 'Madurai', 'Salem', 'Tiruchirappalli', 'Tirunelveli',
+             'Vellore', 'Erode']
+
+
+def arrivals(rng, hours, base_rate, bursts, burst_rate, burst_minutes):
+    """(arrival time in seconds, district) of every complaint, in order"""
+    duration = hours * 3600
+    burst_starts = sorted(rng.uniform(0, duration - burst_minutes * 60) for _ in range(bursts))
+    complaints, t = [], 0.0
+    while True:
+        in_burst = any(start <= t < start + burst_minutes * 60 for start in burst_starts)
+        rate = (base_rate + (burst_rate if in_burst else 0)) / 3600
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return complaints
+        # Scam waves hit some districts harder than others
+        complaints.append((t, rng.choices(DISTRICTS, weights=range(len(DISTRICTS), 0, -1))[0]))
+
+
+class Attender:
+    def __init__(self, username, districts):
+        self.username = username
+        self.districts = districts
+        self.free_at = 0.0
+        self.finishes = []    # finish times of assigned, unfinished cases (a heap)
+
+    def open_cases(self, now):
+        while self.finishes and self.finishes[0] <= now:
+            heapq.heappop(self.finishes)
+        return len(self.finishes)
+
+
+class Shift:
+    """One simulated shift: attenders with a FIFO of their own cases"""
+
+    def __init__(self, rng, attenders, mean_minutes, affinity_speedup):
+        self.rng = rng
+        self.attenders = attenders
+        self.mean_seconds = mean_minutes * 60
+        self.affinity_speedup = affinity_speedup
+        self.assign_waits, self.start_waits, self.handled = [], [], []
+
+    def give(self, attender, arrived, district, now):
+        """Assign a case at `now`; the attender starts it once their earlier cases are done"""
+        service = self.rng.expovariate(1 / self.mean_seconds)
+        if district in attender.districts:
+            service *= self.affinity_speedup
+        start = max(attender.free_at, now)
+        attender.free_at = start + service
+        heapq.heappush(attender.finishes, attender.free_at)
+        self.assign_waits.append(now - arrived)
+        self.start_waits.append(start - arrived)
+        self.handled.append(attender.username)
+
+    def report(self, label, total):
+        counts = {attender.username: 0 for attender in self.attenders}
+        for username in self.handled:
+            counts[username] += 1
+        waits = {name: percentiles(sorted(values)) for name, values in
+                 (('assign', self.assign_waits), ('start', self.start_waits))}
+        row = [label, f"{len(self.handled)}/{total}"]
+        for name in ('assign', 'start'):
+            row += [f"{waits[name].get(point, 0) / 60000:.1f}" for point in ('p50', 'p90', 'p99')]
+        row.append(f"{min(counts.values())}-{max(counts.values())}")
+        return row
+
+
+def simulate_ticks(shift, complaints, duration, interval, assign):
+    """Run `assign(pending, now)` every `interval` seconds; it returns the pending cases it left"""
+    pending, upcoming = [], iter(complaints)
+    following = next(upcoming, None)
+    now = 0.0
+    while now <= duration or pending:
+        while following is not None and following[0] <= now:
+            pending.append(following)
+            following = next(upcoming, None)
+        if pending:
+            pending = assign(pending, now)
+        now += interval
+        if now > duration * 3:
+            break
+
+
+def run_manual(shift, complaints, duration, interval, batch):
+    turn = [0]
+
+    def assign(pending, now):
+        for arrived, district in pending[:batch]:
+            attender = shift.attenders[turn[0] % len(shift.attenders)]
+            turn[0] += 1
+            shift.give(attender, arrived, district, now)
+        return pending[batch:]
+
+    simulate_ticks(shift, complaints, duration, interval, assign)
+
+
+def run_auto(shift, complaints, duration, interval, policy):
+    assigner = AutoAssigner(None, policy)
+    by_name = {attender.username: attender for attender in shift.attenders}
+
+    def assign(pending, now):
+        batch = [(index, district) for index, (arrived, district) in enumerate(pending[:policy.batch_size])]
+        attenders = [(a.username, a.open_cases(now), a.districts) for a in shift.attenders]
+        assigned = set()
+        for index, username in assigner.plan(attenders, batch):
+            arrived, district = pending[index]
+            shift.give(by_name[username], arrived, district, now)
+            assigned.add(index)
+        return [case for index, case in enumerate(pending) if index not in assigned]
+
+    simulate_ticks(shift, complaints, duration, interval, assign)
+
+
+def run_pull(shift, complaints):
+    free = [(0.0, n) for n in range(len(shift.attenders))]
+    for arrived, district in complaints:
+        free_at, n = heapq.heappop(free)
+        attender = shift.attenders[n]
+        shift.give(attender, arrived, district, max(arrived, free_at))
+        heapq.heappush(free, (attender.free_at, n))
+
+
+def time_plan(attender_count, backlog):
+    rng = random.Random(1)
+    attenders = [(f"attender{n:03d}", rng.randrange(10), rng.sample(DISTRICTS, 2)) for n in range(attender_count)]
+    complaints = [(n, rng.choice(DISTRICTS)) for n in range(backlog)]
+    assigner = AutoAssigner(None, AssignmentPolicy(max_open_cases=backlog, batch_size=backlog))
+    started = time.perf_counter()
+    assigned = assigner.plan(attenders, complaints)
+    elapsed = time.perf_counter() - started
+    print(f"\nplan(): {len(assigned)} complaints over {attender_count} attenders in {elapsed * 1000:.1f} ms "
+          f"({elapsed / len(assigned) * 1e6:.1f} µs each)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate queue wait per assignment policy.')
+    parser.add_argument('--hours', type=float, default=8)
+    parser.add_argument('--attenders', type=int, default=12)
+    parser.add_argument('--base-rate', type=float, default=30, help='complaints per hour between bursts')
+    parser.add_argument('--bursts', type=int, default=3)
+    parser.add_argument('--burst-rate', type=float, default=90, help='extra complaints per hour in a burst')
+    parser.add_argument('--burst-minutes', type=float, default=30)
+    parser.add_argument('--service-minutes', type=float, default=12, help='mean minutes to handle a case')
+    parser.add_argument('--affinity-speedup', type=float, default=0.7,
+                        help='handling time factor in an attender\'s own districts')
+    parser.add_argument('--interval', type=float, default=15, help='seconds between auto-assignment runs')
+    parser.add_argument('--manual-interval', type=float, default=600, help='seconds between admin sweeps')
+    parser.add_argument('--manual-batch', type=int, default=30)
+    parser.add_argument('--max-open', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    complaints = arrivals(rng, args.hours, args.base_rate, args.bursts, args.burst_rate, args.burst_minutes)
+    duration = args.hours * 3600
+    coverage = [rng.sample(DISTRICTS, 2) for _ in range(args.attenders)]
+    print(f"{len(complaints)} complaints over {args.hours:g} h, {args.attenders} attenders, "
+          f"{args.bursts} bursts of +{args.burst_rate:g}/h; waits in minutes\n")
+
+    def shift():
+        attenders = [Attender(f"attender{n:02d}", districts) for n, districts in enumerate(coverage)]
+        return Shift(random.Random(args.seed), attenders, args.service_minutes, args.affinity_speedup)
+
+    rows = []
+    manual = shift()
+    run_manual(manual, complaints, duration, args.manual_interval, args.manual_batch)
+    rows.append(manual.report('manual', len(complaints)))
+    for affinity in AssignmentPolicy.AFFINITIES:
+        auto = shift()
+        policy = AssignmentPolicy(max_open_cases=args.max_open, affinity=affinity)
+        run_auto(auto, complaints, duration, args.interval, policy)
+        rows.append(auto.report(f"auto/{affinity}", len(complaints)))
+    pull = shift()
+    run_pull(pull, complaints)
+    rows.append(pull.report('pull', len(complaints)))
+
+    header = ['policy', 'handled', 'assign p50', 'p90', 'p99', 'start p50', 'p90', 'p99', 'cases/attender']
+    widths = [max(len(str(row[i])) for row in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
+
+    time_plan(200, 10000)
@@ -0,0 +1,104 @@
+"""Webhook latency while an online backup of a large database runs.
+
+Builds a scratch complaints database of SIZE_MB (default 2048) in a
+temporary directory, then measures /webhook latency with no backup running,
+during a stepped backup (BackupManager defaults) and during a one-step
+backup of the whole file:
+
+    SIZE_MB=2048 python benchmarks/bench_backup.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+WORKDIR = tempfile.mkdtemp()
+os.chdir(WORKDIR)
+
+import app as webapp
+from backup import BackupManager
+from rate_limit import TokenBucketLimiter
+
+SIZE_MB = int(os.getenv('SIZE_MB', 2048))
+ROW_BYTES = 4096
+SENDERS = [f"whatsapp:+9180000{n:05d}" for n in range(500)]
+
+
+def fill(db, size_mb):
+    conn = db.get_connection()
+    padding = 'x' * ROW_BYTES
+    rows = size_mb * 1024 * 1024 // ROW_BYTES
+    batch = 10000
+    for start in range(0, rows, batch):
+        conn.executemany(
+            'INSERT INTO complaints (phone_number, name, mobile_no, dob, father_name, district, pin_code, transactions) '
+            "VALUES ('whatsapp:+910000000000', 'Bench', '9876543210', '01-01-1990', 'Bench', 'Chennai', '600001', ?)",
+            [(padding,)] * min(batch, rows - start)
+        )
+        conn.commit()
+    conn.close()
+
+
+def measure(seconds, background=None):
+    """Send webhook messages for `seconds` (or until `background` finishes)"""
+    client = webapp.app.test_client()
+    latencies = []
+    worker = None
+    if background is not None:
+        worker = threading.Thread(target=background)
+        worker.start()
+
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while (worker.is_alive() if worker else time.perf_counter() < deadline):
+        started = time.perf_counter()
+        client.post('/webhook', data={'Body': 'hi', 'From': SENDERS[n % len(SENDERS)]})
+        latencies.append(time.perf_counter() - started)
+        n += 1
+
+    if worker:
+        worker.join()
+    return latencies
+
+
+def report(label, latencies, elapsed=None):
+    latencies = sorted(latencies)
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    extra = f"  backup {elapsed:6.1f}s" if elapsed is not None else ''
+    print(f"{label:<18} n={len(latencies):6d}  p50 {pick(0.5):6.2f} ms  p95 {pick(0.95):6.2f} ms  "
+          f"p99 {pick(0.99):6.2f} ms  max {latencies[-1] * 1000:7.2f} ms{extra}")
+
+
+def timed_backup(manager):
+    timing = {}
+
+    def run():
+        started = time.perf_counter()
+        manager.run()
+        timing['elapsed'] = time.perf_counter() - started
+    return run, timing
+
+
+if __name__ == '__main__':
+    webapp.send_pdf_to_whatsapp = lambda *args: (True, 'SM0')
+    webapp.sender_limiter = TokenBucketLimiter(rate=1000, burst=1000)
+
+    print(f"Filling {SIZE_MB} MB ...")
+    fill(webapp.db, SIZE_MB)
+    print(f"Database: {os.path.getsize(webapp.db.db_name) / 1e6:.0f} MB")
+
+    report('no backup', measure(10))
+
+    run, timing = timed_backup(BackupManager([webapp.db.db_name], 'stepped', keep=1))
+    report('stepped backup', measure(0, run), timing['elapsed'])
+
+    run, timing = timed_backup(BackupManager([webapp.db.db_name], 'one-step', keep=1, pages=-1))
+    report('one-step backup', measure(0, run), timing['elapsed'])
+
+    # Several GB of scratch files; don't leave them behind
+    os.chdir(ROOT)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
@@ -0,0 +1,327 @@
+"""Times every Database method and dashboard endpoint against a generated dataset.
+
+Works on a copy of a database made by generate_data.py, in a temporary
+directory, so the dataset can be reused. Results are written as JSON
+(per case: runs, min/median/p95/max in milliseconds, and the result
+size: rows returned, or bytes for endpoints) and can be compared with an earlier run, e.g. from
+the previous commit:
+
+    python benchmarks/generate_data.py 1m --output bench_1m.db
+    python benchmarks/bench_database.py bench_1m.db --output results.json
+    python benchmarks/bench_database.py bench_1m.db --compare results.json
+
+Cases that read or rewrite a large part of the complaints table (the full
+/complaints list, stale scans, archiving) are skipped on datasets larger
+than --scan-limit complaints, and recorded as skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from generate_data import ADMIN_USERNAME, ATTENDER_PASSWORD, DISTRICTS, HISTORY_DAYS
+
+LEASE_SECONDS = 1800
+
+
+class Suite:
+    """Runs timed cases and collects their results."""
+
+    def __init__(self, repeat, complaints, scan_limit):
+        self.repeat = repeat
+        self.complaints = complaints
+        self.scan_limit = scan_limit
+        self.results = {}
+
+    def case(self, name, func, calls=1, repeat=None, scan=False):
+        """Time `func` (called `calls` times per run); its result's len() is recorded as size"""
+        if scan and self.complaints > self.scan_limit:
+            self.results[name] = {'skipped': f'more than {self.scan_limit:,} complaints'}
+            print(f"{name:<48} skipped")
+            return
+
+        timings = []
+        size = None
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            for _ in range(calls):
+                result = func()
+            timings.append((time.perf_counter() - started) / calls * 1000)
+            if size is None:
+                size = _size(result)
+
+        timings.sort()
+        self.results[name] = {
+            'runs': len(timings),
+            'calls_per_run': calls,
+            'min_ms': round(timings[0], 4),
+            'median_ms': round(statistics.median(timings), 4),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+            'max_ms': round(timings[-1], 4),
+            'size': size,
+        }
+        extra = f"  size {size:,}" if size is not None else ''
+        print(f"{name:<48} median {self.results[name]['median_ms']:10.3f} ms  "
+              f"p95 {self.results[name]['p95_ms']:10.3f} ms{extra}")
+
+
+def _size(result):
+    if hasattr(result, 'status_code'):
+        return len(result.get_data())
+    if isinstance(result, (list, tuple, dict, bytes)):
+        return len(result)
+    return None
+
+
+def dataset_info(path):
+    conn = sqlite3.connect(path)
+    count = lambda sql: conn.execute(sql).fetchone()[0]
+    info = {
+        'path': os.path.abspath(path),
+        'bytes': os.path.getsize(path),
+        'complaints': count('SELECT COUNT(*) FROM complaints'),
+        'users': count('SELECT COUNT(*) FROM users'),
+        'sessions': count('SELECT COUNT(*) FROM sessions'),
+    }
+    conn.close()
+    return info
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def database_cases(suite, db, rng, attenders, max_id, sessions):
+    """Every public Database method, reads first, then writes"""
+    attender = attenders[0]
+    some_ids = lambda: rng.randint(1, max_id)
+    session_phones = [f"whatsapp:+9170{n:08d}" for n in range(sessions)]
+
+    # Reads
+    suite.case('db.get_all_complaints', db.get_all_complaints, repeat=3, scan=True)
+
+    def cold_json():
+        db.complaint_cache.clear()
+        return db.get_all_complaints_json()
+    suite.case('db.get_all_complaints_json (cold)', cold_json, repeat=3, scan=True)
+    suite.case('db.get_all_complaints_json (warm)', db.get_all_complaints_json, scan=True)
+    suite.case('db.get_all_complaints_json compact', lambda: db.get_all_complaints_json(True), scan=True)
+    suite.case('db.get_complaint', lambda: db.get_complaint(some_ids()), calls=200)
+    suite.case('db.get_complaint (missing)', lambda: db.get_complaint(max_id + 1), calls=50)
+    suite.case('db.get_pending_complaints', lambda: db.get_pending_complaints(50, 0), calls=20)
+    suite.case('db.get_pending_complaints offset=5000', lambda: db.get_pending_complaints(50, 5000), calls=5)
+    suite.case('db.get_handler_complaints In Progress',
+               lambda: db.get_handler_complaints(attender, 'In Progress', 50, 0), calls=20)
+    suite.case('db.get_handler_complaints Completed',
+               lambda: db.get_handler_complaints(attender, 'Completed', 50, 0), calls=20)
+    suite.case('db.get_stale_complaints', lambda: db.get_stale_complaints(1800), repeat=3, scan=True)
+    suite.case('db.count_stale_complaints', lambda: db.count_stale_complaints(1800), calls=5)
+
+    def snapshot_district():
+        with db.read_snapshot() as conn:
+            total = db.count_complaints(conn, status='Pending', district=DISTRICTS[0])
+            rows = sum(1 for _ in db.iter_complaints(conn, status='Pending', district=DISTRICTS[0]))
+            assert rows == total
+            return rows
+    suite.case('db.count_complaints + iter_complaints district', snapshot_district, repeat=3)
+    suite.case('db.get_user', lambda: db.get_user(rng.choice(attenders)), calls=1000)
+    suite.case('db.get_users_by_role', lambda: db.get_users_by_role('attender'), calls=100)
+    suite.case('db.get_session_with_version',
+               lambda: db.get_session_with_version(rng.choice(session_phones)), calls=200)
+    suite.case('db.get_session', lambda: db.get_session(rng.choice(session_phones)), calls=200)
+    suite.case('db.data_version', lambda: db.data_version('complaints'), calls=1000)
+
+    # Session writes
+    counter = iter(range(10 ** 9))
+    new_phone = lambda: f"whatsapp:+9160{next(counter):08d}"
+    suite.case('db.save_session', lambda: db.save_session(new_phone(), 'name', {'name': 'Bench User'}), calls=50)
+    suite.case('db.save_session_fields', lambda: db.save_session_fields(
+        rng.choice(session_phones), 'dob', {'dob': '01-01-1990'}), calls=50)
+    suite.case('db.delete_session', lambda: db.delete_session(new_phone()), calls=50)
+    suite.case('db.clean_expired_sessions', lambda: db.clean_expired_sessions(30), calls=5)
+
+    # Message deduplication
+    suite.case('db.claim_message', lambda: db.claim_message(f"SMbench{next(counter)}"), calls=100)
+
+    def reply_cycle():
+        sid = f"SMbench{next(counter)}"
+        db.claim_message(sid)
+        db.save_message_reply(sid, '<Response/>')
+        return db.get_message_reply(sid)
+    suite.case('db.claim/save/get_message_reply', reply_cycle, calls=50)
+    suite.case('db.release_message', lambda: db.release_message(f"SMbench{next(counter)}"), calls=100)
+    suite.case('db.clean_processed_messages', lambda: db.clean_processed_messages(24), calls=5)
+
+    # Complaint writes
+    complaint = {
+        'phone_number': 'whatsapp:+919000000000', 'name': 'Bench User', 'mobile_no': '+919000000000',
+        'dob': '01-01-1990', 'father_name': 'Bench Father', 'district': DISTRICTS[0], 'pin_code': '600001',
+        'transactions': [{'date': '01-01-2025', 'time': '10:00 AM', 'bank_name': 'STATE BANK OF INDIA',
+                          'account_no': '123456789012', 'amount': '₹5000.00',
+                          'transaction_id': 'TXN1234567890'}],
+    }
+    suite.case('db.save_complaint', lambda: db.save_complaint(complaint), calls=50)
+    suite.case('db.claim_next_complaints', lambda: db.claim_next_complaints(attender, 5, LEASE_SECONDS), calls=10)
+    suite.case('db.claim_complaint',
+               lambda: db.claim_complaint(some_ids(), rng.choice(attenders), LEASE_SECONDS), calls=50)
+    suite.case('db.renew_leases', lambda: db.renew_leases(attender, LEASE_SECONDS), calls=20)
+    suite.case('db.release_expired_claims', db.release_expired_claims, calls=5)
+    suite.case('db.update_complaint_handler_status',
+               lambda: db.update_complaint_handler_status(some_ids(), attender, 'In Progress'), calls=50)
+    suite.case('db.update_complaint_status',
+               lambda: db.update_complaint_status(some_ids(), 'In Progress', complaint['transactions']), calls=50)
+    suite.case('db.flag_stale_complaints (first run)', lambda: db.flag_stale_complaints(1800), repeat=1, scan=True)
+    suite.case('db.flag_stale_complaints', lambda: db.flag_stale_complaints(1800), scan=True)
+    suite.case('db.add_user', lambda: db.add_user(f"bench{next(counter)}", 'bench', 'attender'), calls=5)
+
+    # Maintenance
+    # The generated history spans HISTORY_DAYS, so this moves about one day's completions
+    archive_days = HISTORY_DAYS - 1
+    suite.case('db.archive_completed_complaints (one day)',
+               lambda: db.archive_completed_complaints(archive_days), repeat=1, scan=True)
+    suite.case('db.archive_completed_complaints (nothing due)',
+               lambda: db.archive_completed_complaints(archive_days), scan=True)
+    suite.case('db.optimize_storage', db.optimize_storage, repeat=3)
+
+
+def endpoint_cases(suite, webapp, rng, attenders, max_id):
+    """Dashboard API endpoints through the Flask test client"""
+    client = webapp.app.test_client()
+    admin = {'Authorization': 'Bearer ' + webapp.auth.issue_token({'username': ADMIN_USERNAME, 'role': 'admin'})}
+    attender = {'Authorization': 'Bearer ' + webapp.auth.issue_token({'username': attenders[1], 'role': 'attender'})}
+
+    def get(path, headers):
+        # buffered: streamed bodies are read while the request context is active
+        response = client.get(path, headers=headers, buffered=True)
+        assert response.status_code in (200, 304), (path, response.status_code)
+        return response
+
+    def post(path, headers, body):
+        response = client.post(path, headers=headers, json=body)
+        assert response.status_code in (200, 201, 409), (path, response.status_code)
+        return response
+
+    suite.case('GET /complaints', lambda: get('/complaints', admin), repeat=3, scan=True)
+    suite.case('GET /complaints (gzip)',
+               lambda: get('/complaints', dict(admin, **{'Accept-Encoding': 'gzip'})), repeat=3, scan=True)
+    suite.case('GET /complaints?shape=compact', lambda: get('/complaints?shape=compact', admin), repeat=3, scan=True)
+    etag = get('/complaints', admin).headers.get('ETag') if suite.complaints <= suite.scan_limit else None
+    if etag:
+        suite.case('GET /complaints (304)', lambda: get('/complaints', dict(admin, **{'If-None-Match': etag})),
+                   calls=50)
+    suite.case('GET /complaints/<id>', lambda: get(f"/complaints/{rng.randint(1, max_id)}", attender), calls=100)
+    suite.case('GET /complaints/stale', lambda: get('/complaints/stale', admin), calls=50)
+    suite.case('GET /complaints/stale/count', lambda: get('/complaints/stale/count', admin), calls=100)
+    suite.case('GET /queue/pending', lambda: get('/queue/pending', attender), calls=20)
+    suite.case('GET /queue/mine', lambda: get('/queue/mine', attender), calls=20)
+    suite.case('GET /queue/mine?status=Completed', lambda: get('/queue/mine?status=Completed', attender), calls=20)
+    suite.case('GET /users/attenders', lambda: get('/users/attenders', admin), calls=50)
+    ids = ','.join(str(rng.randint(1, max_id)) for _ in range(50))
+    suite.case('GET /complaints/bundle (50 ids)',
+               lambda: get(f"/complaints/bundle?ids={ids}", admin), repeat=3)
+    suite.case('GET /admin.html', lambda: get('/admin.html', None), calls=100)
+    suite.case('POST /login', lambda: post('/login', None, {
+        'username': attenders[1], 'password': ATTENDER_PASSWORD, 'role': 'attender'}), calls=3)
+    suite.case('POST /queue/claim', lambda: post('/queue/claim', attender, {'count': 5}), calls=10)
+    suite.case('POST /queue/renew', lambda: post('/queue/renew', attender, {}), calls=20)
+    suite.case('POST /complaints/<id>/claim', lambda: post(
+        f"/complaints/{rng.randint(1, max_id)}/claim", attender,
+        {'handler': attenders[1], 'status': 'In Progress'}), calls=50)
+    suite.case('POST /complaints/<id>/status', lambda: post(
+        f"/complaints/{rng.randint(1, max_id)}/status", admin, {'status': 'Completed'}), calls=50)
+
+    counter = iter(range(10 ** 9))
+    suite.case('POST /webhook', lambda: client.post('/webhook', data={
+        'Body': 'hi', 'From': f"whatsapp:+9150{next(counter):08d}"}), calls=50)
+
+
+def compare(previous, current):
+    """Print median times of this run next to an earlier results file"""
+    print(f"\n{'case':<48} {'before':>12} {'after':>12} {'change':>8}")
+    for name, result in current['results'].items():
+        before = previous['results'].get(name, {})
+        if 'median_ms' not in result or 'median_ms' not in before:
+            continue
+        change = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        print(f"{name:<48} {before['median_ms']:10.3f}ms {result['median_ms']:10.3f}ms {change:7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Database methods and endpoints on a generated dataset.')
+    parser.add_argument('dataset', help='database created by generate_data.py')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case')
+    parser.add_argument('--scan-limit', type=int, default=2_000_000,
+                        help='skip full-table cases above this many complaints')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args(argv)
+    # The run happens in a temporary directory
+    output = os.path.abspath(args.output) if args.output else None
+    previous = os.path.abspath(args.compare) if args.compare else None
+
+    info = dataset_info(args.dataset)
+    workdir = tempfile.mkdtemp()
+    try:
+        shutil.copyfile(args.dataset, os.path.join(workdir, 'complaints.db'))
+        os.chdir(workdir)
+
+        import app as webapp
+        from rate_limit import TokenBucketLimiter
+        webapp.send_pdf_to_whatsapp = lambda *args: (True, 'SM0')
+        webapp.sender_limiter = TokenBucketLimiter(rate=10 ** 6, burst=10 ** 6)
+
+        db = webapp.db
+        attenders = [user['username'] for user in db.get_users_by_role('attender')]
+        conn = db.get_connection()
+        max_id = conn.execute('SELECT MAX(id) FROM complaints').fetchone()[0]
+        conn.close()
+
+        print(f"{info['complaints']:,} complaints, {info['sessions']:,} sessions, "
+              f"{info['bytes'] / 1e6:,.0f} MB, {args.repeat} runs per case\n")
+        suite = Suite(args.repeat, info['complaints'], args.scan_limit)
+        rng = random.Random(args.seed)
+        # Endpoints first, while the dataset is as generated
+        endpoint_cases(suite, webapp, rng, attenders, max_id)
+        database_cases(suite, db, rng, attenders, max_id, info['sessions'])
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'cpus': os.cpu_count(),
+        'dataset': info,
+        'repeat': args.repeat,
+        'results': suite.results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}")
+    if previous:
+        with open(previous) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Bytes on the wire and serialization time for the /complaints payload.
+
+Compares the stdlib encoder with fast_json, the records shape with the
+compact columnar shape, and identity/gzip/brotli encodings.
+
+    python benchmarks/bench_json_response.py 10000 100000
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database import Database
+from fast_json import dumps, orjson
+from json_response import compact_shape, brotli, GZIP_LEVEL, BROTLI_QUALITY
+
+
+def make_rows(count, seed=7):
+    """Synthetic complaint rows shaped like Database.get_all_complaints()"""
+    rng = random.Random(seed)
+    banks = ['STATE BANK OF INDIA', 'HDFC BANK', 'ICICI BANK', 'AXIS BANK', 'CANARA BANK']
+    districts = ['Chennai', 'Coimbatore', 'Madurai', 'Salem', 'Tiruchirappalli']
+    rows = []
+    for i in range(count):
+        transactions = [{
+            'date': f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2025",
+            'time': f"{rng.randint(1, 12):02d}:{rng.randint(0, 59):02d} PM",
+            'bank_name': rng.choice(banks),
+            'account_no': str(rng.randint(10 ** 11, 10 ** 12 - 1)),
+            'amount': f"₹{rng.randint(100, 200000)}.00",
+            'transaction_id': f"TXN{rng.randint(10 ** 9, 10 ** 10 - 1)}",
+        } for _ in range(rng.randint(1, 3))]
+        rows.append({
+            'id': i + 1,
+            'phone_number': f"whatsapp:+91{rng.randint(6 * 10 ** 9, 10 ** 10 - 1)}",
+            'name': f"Complainant {i}",
+            'mobile_no': f"+91{rng.randint(6 * 10 ** 9, 10 ** 10 - 1)}",
+            'dob': f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-19{rng.randint(50, 99)}",
+            'father_name': f"Father {i}",
+            'district': rng.choice(districts),
+            'pin_code': str(rng.randint(600001, 643999)),
+            'transactions': json.dumps(transactions),
+            'created_at': '2025-11-01 10:00:00',
+            'handler': None,
+            'status': 'Pending',
+        })
+    return rows
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def run(count):
+    rows = make_rows(count)
+    print(f"\n{count} rows (fast_json backend: {'orjson' if orjson else 'json'})")
+    print(f"{'shape':<8} {'encoder':<9} {'serialize ms':>12} {'raw KB':>9} {'gzip KB':>9} {'gzip ms':>8} {'br KB':>9} {'br ms':>8}")
+
+    shapes = [
+        ('records', lambda: rows),
+        ('compact', lambda: compact_shape(rows, Database.COMPLAINT_COLUMNS)),
+    ]
+    for shape, build in shapes:
+        encoders = [
+            ('stdlib', lambda: json.dumps(build()).encode('utf-8')),
+            ('fast', lambda: dumps(build())),
+        ]
+        for name, encode in encoders:
+            body, encode_time = timed(encode)
+            gz, gz_time = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), repeat=1)
+            if brotli is not None:
+                br, br_time = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY), repeat=1)
+                br_cols = f"{len(br) / 1024:>9.0f} {br_time * 1000:>8.0f}"
+            else:
+                br_cols = f"{'-':>9} {'-':>8}"
+            print(f"{shape:<8} {name:<9} {encode_time * 1000:>12.1f} {len(body) / 1024:>9.0f} "
+                  f"{len(gz) / 1024:>9.0f} {gz_time * 1000:>8.0f} {br_cols}")
+
+
+if __name__ == '__main__':
+    for arg in sys.argv[1:] or ['10000', '100000']:
+        run(int(arg))
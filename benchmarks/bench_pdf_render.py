@@ -0,0 +1,77 @@
+"""PDF rendering throughput: request threads versus the process pool.
+
+Renders RENDERS complaint PDFs from 8 submitting threads, first directly on
+those threads (as the webhook used to) and then through PDFRenderService
+with 1, 2, 4, ... workers up to the core count. While rendering, another
+thread repeatedly does a short piece of Python work (standing in for other
+conversations); how often it gets to run shows the GIL stall the pool
+removes. Throughput scales with workers only up to the core count.
+
+    RENDERS=500 python benchmarks/bench_pdf_render.py
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from pdf_generator import PDFGenerator
+from pdf_service import PDFRenderService, WARMUP_COMPLAINT
+
+RENDERS = int(os.getenv('RENDERS', 500))
+SUBMITTERS = 8
+COMPLAINT = dict(WARMUP_COMPLAINT, transactions=WARMUP_COMPLAINT['transactions'] * 3)
+
+
+def other_conversation(stop, delays):
+    """Time a ~1 ms slice of Python work over and over"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        sum(range(20000))
+        delays.append(time.perf_counter() - started)
+        time.sleep(0.005)
+
+
+def run(render):
+    stop = threading.Event()
+    delays = []
+    probe = threading.Thread(target=other_conversation, args=(stop, delays))
+    probe.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(SUBMITTERS) as submitters:
+        sizes = list(submitters.map(lambda _: len(render(COMPLAINT)), range(RENDERS)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    probe.join()
+    assert all(size > 1000 for size in sizes)
+    delays.sort()
+    return RENDERS / elapsed, len(delays) / elapsed, delays[int(len(delays) * 0.99)] * 1000, delays[-1] * 1000
+
+
+def report(label, result):
+    rate, probe_rate, p99, worst = result
+    print(f"{label:<22} {rate:8.1f} PDFs/s   other thread: {probe_rate:6.1f} slices/s  "
+          f"p99 {p99:7.2f} ms  max {worst:7.2f} ms")
+
+
+if __name__ == '__main__':
+    cores = os.cpu_count() or 1
+    print(f"{RENDERS} renders, {SUBMITTERS} submitting threads, {cores} core(s)")
+
+    # Warm up reportlab in this process too, for a fair comparison
+    PDFGenerator.generate_complaint_pdf(COMPLAINT)
+    report('request threads', run(lambda data: PDFGenerator.generate_complaint_pdf(data).getvalue()))
+
+    workers = 1
+    while True:
+        service = PDFRenderService(workers=workers).start()
+        report(f"pool, {workers} worker(s)", run(service.render))
+        service.shutdown()
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
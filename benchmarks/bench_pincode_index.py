@@ -0,0 +1,57 @@
+"""Startup and lookup cost of the PIN code -> district index.
+
+Compiles the bundled dataset (or a CSV given on the command line, e.g.
+India Post's full directory) into a scratch file, then times opening it,
+PIN lookups and fuzzy district matching:
+
+    python benchmarks/bench_pincode_index.py
+    python benchmarks/bench_pincode_index.py all_india_pincode_directory.csv
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from pincode_index import DEFAULT_ALIASES, DEFAULT_CSV, PincodeIndex, build_index
+
+TYPED = ['chennai', 'Trichy', 'tiruchirapali', 'coimbatore', 'kanyakumari', 'Bangalore',
+         'thane', 'madurai', 'Pune', 'salem dist', 'ooty', 'Tuticorin']
+
+
+def timed(label, func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / calls * 1e6:10.2f} µs/call")
+
+
+def typo(text, rng):
+    i = rng.randrange(len(text))
+    return text[:i] + text[i + 1:]
+
+
+if __name__ == '__main__':
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    index_path = os.path.join(tempfile.mkdtemp(), 'pincodes.idx')
+
+    started = time.perf_counter()
+    build_index(csv_path, index_path)
+    print(f"{'compile':<28} {(time.perf_counter() - started) * 1000:10.2f} ms")
+    started = time.perf_counter()
+    index = PincodeIndex(index_path, DEFAULT_ALIASES)
+    print(f"{'open (mmap + name index)':<28} {(time.perf_counter() - started) * 1000:10.2f} ms  "
+          f"{len(index.districts)} districts")
+
+    rng = random.Random(7)
+    pins = [str(rng.randrange(100000, 1000000)) for _ in range(10000)]
+    names = [typo(rng.choice(TYPED), rng) for _ in range(10000)]
+    pin_iter, name_iter = iter(pins * 10), iter(names * 10)
+
+    timed('districts_for(random PIN)', lambda: index.districts_for(next(pin_iter)), 100000)
+    timed('match_district(typo)', lambda: index.match_district(next(name_iter)), 100000)
+    timed('pincode_serves', lambda: index.pincode_serves('600001', 'Madras'), 100000)
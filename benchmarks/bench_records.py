@@ -0,0 +1,96 @@
+"""Memory per complaint: row dicts versus Complaint records, and streaming.
+
+Loads every complaint of a database made by generate_data.py in each
+shape and reports the Python heap it occupies (tracemalloc) per row, plus
+the peak while streaming the whole table with stream_complaints():
+
+    python benchmarks/generate_data.py 1m --output bench_1m.db
+    python benchmarks/bench_records.py bench_1m.db
+
+At a million complaints or more, holding every shape in one process can
+run out of memory; --shape measures just the named ones:
+
+    python benchmarks/bench_records.py bench_1m.db --shape dicts-decoded
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from database import Database
+
+
+def dict_rows(db):
+    """get_all_complaints as it was: one dict per row, transactions left as JSON text"""
+    conn = db.get_connection()
+    rows = conn.execute(f'SELECT {", ".join(db.COMPLAINT_COLUMNS)} FROM complaints ORDER BY created_at DESC').fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def decoded_dict_rows(db):
+    """Row dicts with transactions decoded, as the paged queries build them"""
+    complaints = dict_rows(db)
+    for complaint in complaints:
+        complaint['transactions'] = json.loads(complaint['transactions'])
+    return complaints
+
+
+def decoded_records(db):
+    complaints = db.get_all_complaints()
+    for complaint in complaints:
+        complaint.transactions
+    return complaints
+
+
+def stream(db):
+    count = 0
+    for complaint in db.stream_complaints():
+        count += len(complaint.name)
+    return count
+
+
+def measure(label, build, rows):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<40} {current / rows:8.0f} B/row held  {peak / rows:8.0f} B/row peak  "
+          f"{current / 2 ** 20:8.1f} MB held  {peak / 2 ** 20:8.1f} MB peak  {elapsed:6.1f}s (traced)")
+
+
+SHAPES = {
+    'dicts': ('dicts, transactions as JSON text', dict_rows),
+    'dicts-decoded': ('dicts, transactions decoded', decoded_dict_rows),
+    'records': ('Complaint records (lazy)', lambda db: db.get_all_complaints()),
+    'records-decoded': ('Complaint records, transactions read', decoded_records),
+    'stream': ('stream_complaints()', stream),
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure memory per complaint in each shape.')
+    parser.add_argument('database')
+    parser.add_argument('--shape', action='append', choices=list(SHAPES),
+                        help='measure only this shape (repeatable; default: all)')
+    args = parser.parse_args()
+
+    db = Database(args.database)
+    conn = db.get_connection()
+    rows = conn.execute('SELECT COUNT(*) FROM complaints').fetchone()[0]
+    conn.close()
+    print(f"{rows:,} complaints")
+
+    for name in args.shape or SHAPES:
+        label, build = SHAPES[name]
+        measure(label, lambda: build(db), rows)
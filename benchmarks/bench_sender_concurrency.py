@@ -0,0 +1,116 @@
+"""Concurrency check and throughput benchmark for per-sender webhook ordering.
+
+1. Correctness: six edits to the same transaction arrive at once from one
+   sender. Run with the striped locks, and again without them (as separate
+   workers would be), relying on the versioned session writes. Every edit
+   must survive.
+2. Throughput: many senders sending concurrently, with 64 lock stripes
+   versus one global lock.
+
+Runs against a scratch database in a temporary directory:
+
+    python benchmarks/bench_sender_concurrency.py
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())
+
+import app as webapp
+from rate_limit import TokenBucketLimiter
+from striped_lock import StripedLock
+
+SETUP = ['hi', 'yes', 'Rajesh Kumar', '9876543210', '2-3-1990', 'Suresh Kumar', 'Chennai',
+         '600001', '1', '1-1-2025', '14:30', 'sbi', '12345678901', '5000', 'TXN1234567890', 'no']
+EDITS = {
+    '2.1.1': '2-1-2025',
+    '2.1.2': '3:45 PM',
+    '2.1.3': 'hdfc',
+    '2.1.4': '987654321098',
+    '2.1.5': '7500',
+    '2.1.6': 'UPI98765432AB',
+}
+
+
+class NoLock:
+    """Stands in for the striped locks to mimic requests on separate workers"""
+
+    def for_key(self, key):
+        return contextlib.nullcontext()
+
+
+def send(client, phone, body):
+    return client.post('/webhook', data={'Body': body, 'From': phone})
+
+
+def run_parallel(jobs):
+    threads = [threading.Thread(target=job) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def check_concurrent_edits(locks, label):
+    webapp.sender_locks = locks
+    phone = f"whatsapp:+91{label}"
+    client = webapp.app.test_client()
+    for body in SETUP:
+        send(client, phone, body)
+
+    barrier = threading.Barrier(len(EDITS))
+
+    def edit(serial, value):
+        def job():
+            local = webapp.app.test_client()
+            barrier.wait()
+            send(local, phone, f"{serial} = {value}")
+        return job
+
+    run_parallel([edit(serial, value) for serial, value in EDITS.items()])
+
+    transaction = webapp.db.get_session(phone)[1]['transactions'][0]
+    lost = [key for key, expected in [
+        ('date', '02-01-2025'), ('time', '03:45 PM'), ('account_no', '987654321098'),
+        ('amount', '₹7500.00'), ('transaction_id', 'UPI98765432AB'),
+    ] if transaction.get(key) != expected]
+    print(f"{label:<22} lost edits: {lost or 'none'}")
+    return not lost
+
+
+def throughput(locks, senders=32, messages=len(SETUP), threads=8):
+    webapp.sender_locks = locks
+    phones = [f"whatsapp:+9190000{n:05d}" for n in range(senders)]
+    work = [phones[i::threads] for i in range(threads)]
+
+    def worker(my_phones):
+        def job():
+            client = webapp.app.test_client()
+            for step in range(messages):
+                for phone in my_phones:
+                    send(client, phone, SETUP[step])
+        return job
+
+    start = time.perf_counter()
+    run_parallel([worker(group) for group in work])
+    elapsed = time.perf_counter() - start
+    return senders * messages / elapsed
+
+
+if __name__ == '__main__':
+    webapp.send_pdf_to_whatsapp = lambda *args: (True, 'SM0')
+    # The per-sender limit would throttle each sender's scripted conversation
+    webapp.sender_limiter = TokenBucketLimiter(rate=10 ** 6, burst=10 ** 6)
+
+    ok = check_concurrent_edits(StripedLock(64), 'striped locks')
+    ok &= check_concurrent_edits(NoLock(), 'versioning only')
+
+    print(f"64 stripes:   {throughput(StripedLock(64)):8.0f} msg/s")
+    print(f"global lock:  {throughput(StripedLock(1)):8.0f} msg/s")
+    sys.exit(0 if ok else 1)
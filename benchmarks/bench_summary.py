@@ -0,0 +1,78 @@
+"""Complaint summary rendering for sessions with 1 to 100 transactions.
+
+Compares the original `+=` summary builder with summary_sections() plus
+chunking into WhatsApp-sized messages, and with a SummaryRenderer hit (the
+repeated `summary` / `done` case), and shows how many messages each summary
+becomes:
+
+    python benchmarks/bench_summary.py
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from summary_renderer import SummaryRenderer, chunk_sections, summary_sections, message_length
+
+SIZES = (1, 5, 10, 25, 50, 100)
+
+
+def concat_summary(session_data):
+    """The summary builder as it was, one `+=` per line"""
+    summary = "📋 *SUMMARY OF YOUR COMPLAINT*\n\n"
+    summary += "👤 *PERSONAL INFORMATION:*\n"
+    summary += f"1.1 Name: {session_data.get('name', 'N/A')}\n"
+    summary += f"1.2 Mobile: {session_data.get('mobile_no', 'N/A')}\n"
+    summary += f"1.3 DOB: {session_data.get('dob', 'N/A')}\n"
+    summary += f"1.4 Father's Name: {session_data.get('father_name', 'N/A')}\n"
+    summary += f"1.5 District: {session_data.get('district', 'N/A')}\n"
+    summary += f"1.6 PIN Code: {session_data.get('pin_code', 'N/A')}\n\n"
+
+    summary += "💳 *TRANSACTION DETAILS:*\n"
+    for idx, trans in enumerate(session_data.get('transactions', []), 1):
+        summary += f"\n📌 Transaction #{idx}:\n"
+        summary += f"2.{idx}.1 Date: {trans.get('date', 'N/A')}\n"
+        summary += f"2.{idx}.2 Time: {trans.get('time', 'N/A')}\n"
+        summary += f"2.{idx}.3 Bank: {trans.get('bank_name', 'N/A')}\n"
+        summary += f"2.{idx}.4 Account: {trans.get('account_no', 'N/A')}\n"
+        summary += f"2.{idx}.5 Amount: {trans.get('amount', 'N/A')}\n"
+        summary += f"2.{idx}.6 Trans ID: {trans.get('transaction_id', 'N/A')}\n"
+    return summary
+
+
+def make_session(transactions):
+    return {
+        'name': 'Rajesh Kumar', 'mobile_no': '+919876543210', 'dob': '02-03-1990',
+        'father_name': 'Suresh Kumar', 'district': 'Chennai', 'pin_code': '600001',
+        'transactions': [{
+            'date': '01-01-2025', 'time': '02:30 PM', 'bank_name': 'State Bank of India',
+            'account_no': '123456789012', 'amount': '₹5000.00', 'transaction_id': f'TXN{n:010d}',
+        } for n in range(transactions)],
+    }
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == '__main__':
+    print(f"{'txns':>5} {'chars':>7} {'msgs':>5} {'longest':>8}   "
+          f"{'+= concat':>10} {'sections':>10} {'+ chunks':>10} {'cache hit':>10}")
+    for size in SIZES:
+        session_data = make_session(size)
+        assert ''.join(summary_sections(session_data)) == concat_summary(session_data)
+
+        renderer = SummaryRenderer()
+        chunks = renderer.render('whatsapp:+910000000000', 7, session_data)
+        number = max(200, 20000 // size)
+
+        concat = per_call_us(lambda: concat_summary(session_data), number)
+        sections = per_call_us(lambda: ''.join(summary_sections(session_data)), number)
+        chunked = per_call_us(lambda: chunk_sections(summary_sections(session_data)), number)
+        hit = per_call_us(lambda: renderer.render('whatsapp:+910000000000', 7, session_data), number)
+
+        print(f"{size:5d} {message_length(concat_summary(session_data)):7d} {len(chunks):5d} "
+              f"{max(map(message_length, chunks)):8d}   {concat:8.1f}us {sections:8.1f}us "
+              f"{chunked:8.1f}us {hit:8.1f}us")
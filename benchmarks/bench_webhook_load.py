@@ -0,0 +1,132 @@
+"""Load test: the Flask webhook versus the asyncio (ASGI) webhook.
+
+Starts each server in turn on a scratch database in a temporary directory,
+then lets many simulated senders walk through a complaint conversation at
+once (each sender's messages in order, all senders concurrently) and
+reports throughput, reply latency percentiles and rejected messages:
+
+    python benchmarks/bench_webhook_load.py --senders 50,200,500
+
+The conversation stops at the summary by default. --confirm also answers
+"yes", which renders a PDF and calls Twilio; set TWILIO_* to test
+credentials for that. The ASGI server needs uvicorn; the client uses
+aiohttp, which the twilio package already depends on.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SETUP = ['hi', 'yes', 'Rajesh Kumar', '9876543210', '2-3-1990', 'Suresh Kumar', 'Chennai',
+         '600001', '1', '1-1-2025', '14:30', 'sbi', '12345678901', '5000', 'TXN1234567890']
+
+SERVERS = {
+    'flask': lambda port: [sys.executable, '-c', f'import app; app.app.run(port={port}, threaded=True)'],
+    'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi_webhook:app', '--port', str(port),
+                          '--log-level', 'warning'],
+}
+
+REJECTED_MARKERS = ("sending messages too quickly", "handling a lot of complaints")
+
+
+def start_server(name, port, workdir):
+    env = dict(os.environ,
+               PYTHONPATH=ROOT,
+               # The bench sends a conversation as fast as replies come back
+               WEBHOOK_SENDER_RATE='1000', WEBHOOK_SENDER_BURST='1000',
+               PDF_WORKERS=os.getenv('PDF_WORKERS', '2'))
+    return subprocess.Popen(SERVERS[name](port), cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_until_up(session, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.post(url, data={'Body': 'ping', 'From': 'whatsapp:+910000000000'}) as response:
+                await response.read()
+                return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+async def run_sender(session, url, sender, script, latencies, outcome):
+    phone = f"whatsapp:+9180{sender:08d}"
+    for step, body in enumerate(script):
+        started = time.perf_counter()
+        try:
+            async with session.post(url, data={
+                'Body': body, 'From': phone, 'MessageSid': f"SM{sender:08d}{step:04d}"
+            }) as response:
+                text = await response.text()
+                ok = response.status == 200
+        except aiohttp.ClientError:
+            ok, text = False, ''
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            outcome['errors'] += 1
+        elif any(marker in text for marker in REJECTED_MARKERS):
+            outcome['rejected'] += 1
+
+
+async def load(url, senders, script, first_sender):
+    latencies = []
+    outcome = {'errors': 0, 'rejected': 0}
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            run_sender(session, url, first_sender + sender, script, latencies, outcome)
+            for sender in range(senders)
+        ])
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed, outcome
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def bench(name, port, levels, script):
+    workdir = tempfile.mkdtemp(prefix=f'bench_{name}_')
+    server = start_server(name, port, workdir)
+    url = f'http://127.0.0.1:{port}/webhook'
+    try:
+        async with aiohttp.ClientSession() as session:
+            await wait_until_up(session, url)
+        first_sender = 0
+        for senders in levels:
+            latencies, elapsed, outcome = await load(url, senders, script, first_sender)
+            first_sender += senders
+            print(f"{name:<6} {senders:>6} senders  {len(latencies) / elapsed:8.0f} msg/s  "
+                  f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                  f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  "
+                  f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+                  f"rejected {outcome['rejected']:>5}  errors {outcome['errors']:>5}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--senders', default='50,200,500', help='comma-separated concurrent sender counts')
+    parser.add_argument('--servers', default='flask,asgi', help='comma-separated: flask, asgi')
+    parser.add_argument('--port', type=int, default=5101)
+    parser.add_argument('--confirm', action='store_true', help='finish each complaint (renders a PDF, calls Twilio)')
+    args = parser.parse_args()
+
+    levels = [int(n) for n in args.senders.split(',')]
+    script = SETUP + (['yes'] if args.confirm else [])
+    for name in args.servers.split(','):
+        asyncio.run(bench(name, args.port, levels, script))
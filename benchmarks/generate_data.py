@@ -0,0 +1,237 @@
+"""Seeded synthetic database for benchmarking at production scale.
+
+Creates a complaints database with the app's own schema (through Database)
+and fills it with realistic complaints, transactions, users and
+in-progress chatbot sessions, using executemany in large transactions.
+The same seed and size always produce the same data:
+
+    python benchmarks/generate_data.py 10k   --output bench_10k.db
+    python benchmarks/generate_data.py 1m    --output bench_1m.db
+    python benchmarks/generate_data.py 10m   --output bench_10m.db
+    python benchmarks/generate_data.py 25000 --seed 3 --output bench.db
+
+Every attender's password is "bench" and the admin's is "bench-admin".
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from werkzeug.security import generate_password_hash
+from database import Database
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+BATCH_SIZE = 50_000
+
+ADMIN_USERNAME = 'admin'
+ADMIN_PASSWORD = 'bench-admin'
+ATTENDER_PASSWORD = 'bench'
+
+# Share of complaints in each status; completed ones dominate a mature database
+STATUS_WEIGHTS = (('Completed', 0.60), ('In Progress', 0.15), ('Pending', 0.25))
+HISTORY_DAYS = 365
+
+DISTRICTS = [
+    'Chennai', 'Coimbatore', 'Madurai', 'Tiruchirappalli', 'Salem', 'Tirunelveli', 'Erode', 'Vellore',
+    'Thoothukudi', 'Dindigul', 'Thanjavur', 'Kanchipuram', 'Tiruppur', 'Cuddalore', 'Karur',
+    'Namakkal', 'Sivaganga', 'Virudhunagar', 'Nagapattinam', 'Krishnagiri', 'Dharmapuri',
+    'Ramanathapuram', 'Pudukkottai', 'Theni', 'Villupuram', 'Tiruvannamalai', 'Ariyalur',
+    'Perambalur', 'Nilgiris', 'Kanyakumari', 'Tiruvarur', 'Chengalpattu', 'Tenkasi', 'Ranipet',
+]
+BANKS = [
+    'STATE BANK OF INDIA', 'HDFC BANK', 'ICICI BANK', 'AXIS BANK', 'CANARA BANK', 'INDIAN BANK',
+    'PUNJAB NATIONAL BANK', 'BANK OF BARODA', 'KOTAK MAHINDRA BANK', 'INDIAN OVERSEAS BANK',
+    'UNION BANK OF INDIA', 'CITY UNION BANK', 'KARUR VYSYA BANK', 'TAMILNAD MERCANTILE BANK',
+]
+FIRST_NAMES = [
+    'Rajesh', 'Suresh', 'Priya', 'Lakshmi', 'Karthik', 'Divya', 'Arun', 'Meena', 'Vijay', 'Kavitha',
+    'Senthil', 'Anitha', 'Murugan', 'Revathi', 'Ganesh', 'Deepa', 'Ramesh', 'Saranya', 'Bala', 'Janani',
+]
+LAST_NAMES = ['Kumar', 'S', 'R', 'Raj', 'Pandian', 'Krishnan', 'Subramanian', 'Natarajan', 'M', 'Selvam']
+
+SESSION_STATES = ['name', 'mobile', 'dob', 'father_name', 'district', 'pin_code', 'trans_date',
+                  'trans_bank', 'trans_amount', 'confirm', 'edit']
+
+
+def timestamp(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class DataGenerator:
+    """Deterministic source of synthetic rows for one seed."""
+
+    def __init__(self, seed, now):
+        self.rng = random.Random(seed)
+        self.now = now
+
+    def person(self):
+        rng = self.rng
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    def phone(self):
+        return f"+91{self.rng.randint(6 * 10 ** 9, 10 ** 10 - 1)}"
+
+    def transaction(self, when):
+        rng = self.rng
+        return {
+            'date': when.strftime('%d-%m-%Y'),
+            'time': when.strftime('%I:%M %p'),
+            'bank_name': rng.choice(BANKS),
+            'account_no': str(rng.randint(10 ** 8, 10 ** 16)),
+            'amount': f"₹{rng.choice((rng.randint(100, 5000), rng.randint(5000, 500000)))}.00",
+            'transaction_id': f"TXN{rng.randint(10 ** 9, 10 ** 12)}",
+        }
+
+    def complaint(self, created, attenders):
+        """One complaints row, as a tuple in COMPLAINT_INSERT's column order"""
+        rng = self.rng
+        mobile = self.phone()
+        transactions = [self.transaction(created - timedelta(minutes=rng.randint(10, 4320)))
+                        for _ in range(min(rng.randint(1, 3), rng.randint(1, 6)))]
+
+        roll = rng.random()
+        handler = completed_at = lease_expires_at = None
+        if roll < STATUS_WEIGHTS[0][1]:
+            status = 'Completed'
+            handler = rng.choice(attenders)
+            completed_at = timestamp(min(self.now, created + timedelta(hours=rng.randint(1, 240))))
+        elif roll < STATUS_WEIGHTS[0][1] + STATUS_WEIGHTS[1][1]:
+            status = 'In Progress'
+            handler = rng.choice(attenders)
+            # Recent claims are leased; old ones were admin assignments
+            if self.now - created < timedelta(days=2):
+                lease_expires_at = timestamp(self.now + timedelta(minutes=rng.randint(1, 30)))
+        else:
+            status = 'Pending'
+
+        return (
+            f"whatsapp:{mobile}", self.person(), mobile,
+            f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1950, 2005)}",
+            self.person(), rng.choice(DISTRICTS), str(rng.randint(600001, 643253)),
+            json.dumps(transactions), timestamp(created), handler, status, completed_at, lease_expires_at,
+        )
+
+    def session(self, phone_number):
+        """(sessions row, session_fields rows, session_transactions rows) for a conversation in progress"""
+        rng = self.rng
+        state = rng.choice(SESSION_STATES)
+        last_activity = timestamp(self.now - timedelta(seconds=rng.randint(0, 3600)))
+        values = [
+            ('name', self.person()), ('mobile_no', self.phone()),
+            ('dob', f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1950, 2005)}"),
+            ('father_name', self.person()), ('district', rng.choice(DISTRICTS)),
+            ('pin_code', str(rng.randint(600001, 643253))),
+        ]
+        filled = SESSION_STATES.index(state) + 1
+        fields = [(phone_number, key, json.dumps(value)) for key, value in values[:filled]]
+        transactions = []
+        if filled > 6:
+            count = rng.randint(1, 3)
+            fields += [(phone_number, 'transaction_count', json.dumps(count)),
+                       (phone_number, 'current_transaction', json.dumps(0))]
+            transactions = [(phone_number, idx, json.dumps(self.transaction(self.now)))
+                            for idx in range(count)]
+        return (phone_number, state, '{}', last_activity, rng.randint(1, 30)), fields, transactions
+
+
+COMPLAINT_INSERT = '''
+    INSERT INTO complaints (phone_number, name, mobile_no, dob, father_name, district, pin_code,
+                            transactions, created_at, handler, status, completed_at, lease_expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def attender_count(complaints):
+    return max(5, min(500, complaints // 2000))
+
+
+def session_count(complaints):
+    return max(100, min(200_000, complaints // 10))
+
+
+def generate(path, complaints, seed=7, batch_size=BATCH_SIZE, log=print):
+    """Create `path` with `complaints` complaints and matching users and sessions"""
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+
+    db = Database(path)
+    now = datetime.now().replace(microsecond=0)
+    gen = DataGenerator(seed, now)
+
+    conn = sqlite3.connect(path)
+    # Bulk load: a crash just means generating again
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -262144')
+
+    # Hashing is deliberately slow, so every attender shares one hash
+    attenders = [f"attender{n:03d}" for n in range(attender_count(complaints))]
+    attender_hash = generate_password_hash(ATTENDER_PASSWORD)
+    with conn:
+        conn.execute('INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)',
+                     (ADMIN_USERNAME, generate_password_hash(ADMIN_PASSWORD), 'admin'))
+        conn.executemany('INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)',
+                         [(name, attender_hash, 'attender') for name in attenders])
+
+    # Complaints arrive at a steady rate over HISTORY_DAYS, so ids and
+    # created_at increase together as they do in production
+    started = time.perf_counter()
+    step = timedelta(days=HISTORY_DAYS) / complaints
+    first = now - timedelta(days=HISTORY_DAYS)
+    for start in range(0, complaints, batch_size):
+        rows = [gen.complaint(first + step * n, attenders) for n in range(start, min(start + batch_size, complaints))]
+        with conn:
+            conn.executemany(COMPLAINT_INSERT, rows)
+        done = start + len(rows)
+        log(f"  complaints: {done:,}/{complaints:,} ({done / (time.perf_counter() - started):,.0f} rows/s)")
+
+    sessions = session_count(complaints)
+    for start in range(0, sessions, batch_size):
+        session_rows, field_rows, transaction_rows = [], [], []
+        for n in range(start, min(start + batch_size, sessions)):
+            row, fields, transactions = gen.session(f"whatsapp:+9170{n:08d}")
+            session_rows.append(row)
+            field_rows.extend(fields)
+            transaction_rows.extend(transactions)
+        with conn:
+            conn.executemany('INSERT INTO sessions (phone_number, state, data, last_activity, version) '
+                             'VALUES (?, ?, ?, ?, ?)', session_rows)
+            conn.executemany('INSERT INTO session_fields (phone_number, field, value) VALUES (?, ?, ?)', field_rows)
+            conn.executemany('INSERT INTO session_transactions (phone_number, idx, data) VALUES (?, ?, ?)',
+                             transaction_rows)
+    log(f"  sessions: {sessions:,}, attenders: {len(attenders)}")
+
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    return {
+        'complaints': complaints, 'attenders': len(attenders), 'sessions': sessions, 'seed': seed,
+        'seconds': round(time.perf_counter() - started, 1), 'bytes': os.path.getsize(path),
+    }
+
+
+def parse_size(value):
+    value = value.lower().replace('_', '').replace(',', '')
+    return SIZES[value] if value in SIZES else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic complaints database for benchmarks.')
+    parser.add_argument('size', type=parse_size, help='number of complaints, or one of 10k, 1m, 10m')
+    parser.add_argument('--output', required=True, help='database file to create (must not exist)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.size:,} complaints into {args.output} (seed {args.seed})")
+    summary = generate(args.output, args.size, args.seed)
+    print(f"Done in {summary['seconds']}s: {summary['bytes'] / 1e6:,.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
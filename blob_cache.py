@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class BlobCache:
+    """Size-capped, time-limited in-memory store for recently generated files.
+
+    Complaint PDFs are fetched by Twilio within seconds of being created, so
+    keeping the bytes here lets /download answer without reading the disk.
+    Entries expire after `ttl` seconds; when the total size passes
+    `max_bytes` the oldest entries are dropped first. Blobs are stored and
+    returned as the same bytes object, never copied.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._blobs = OrderedDict()  # key -> (data, expires_at), oldest first
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def put(self, key, data):
+        """Store `data` (bytes) under `key`; blobs larger than the cache are skipped"""
+        if len(data) > self.max_bytes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._remove(key)
+            self._blobs[key] = (data, now + self.ttl)
+            self._size += len(data)
+            self._evict(now)
+
+    def get(self, key):
+        """The blob stored under `key`, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._blobs.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            return entry[0]
+
+    def _remove(self, key):
+        entry = self._blobs.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def _evict(self, now):
+        # Every entry has the same TTL, so the oldest expire first
+        while self._blobs:
+            key, (data, expires_at) = next(iter(self._blobs.items()))
+            if expires_at > now and self._size <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def __len__(self):
+        return len(self._blobs)
+
+    @property
+    def size(self):
+        return self._size
@@ -0,0 +1,127 @@
+import threading
+from fast_json import dumps, loads
+
+
+class ComplaintFragmentCache:
+    """Per-complaint cache of ready-to-send JSON fragments.
+
+    Each complaint is encoded once, with its transactions decoded, and kept
+    as bytes. List responses are assembled by joining the cached fragments.
+    Before each response the database's complaint_changes log (written by
+    triggers, so it covers every process and connection) is read from the
+    last position seen, and only the complaints it names are re-read and
+    re-encoded. The columnar ("compact") fragments are built lazily, the
+    first time that shape is requested.
+    """
+
+    # Complaints re-read per query when refreshing invalidated rows
+    REFRESH_BATCH = 500
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self._records = None  # id -> fragment; None until first use
+        self._compact = {}
+        self._sort_keys = {}
+        self._order = []
+        self._seen = 0  # last complaint_changes entry applied
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Forget everything; the next request reloads all complaints"""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._records = None
+        self._compact.clear()
+        self._sort_keys.clear()
+        self._order = []
+        self._seen = 0
+        self._bodies.clear()
+
+    def records_json(self, db):
+        """JSON array of complaint objects, newest first"""
+        return self._body(db, 'records')
+
+    def compact_json(self, db):
+        """Columnar {"columns": [...], "rows": [...]} body, newest first"""
+        return self._body(db, 'compact')
+
+    def _body(self, db, shape):
+        with self._lock:
+            self._refresh(db)
+
+            body = self._bodies.get(shape)
+            if body is None:
+                if shape == 'records':
+                    body = b'[' + b','.join([self._records[cid] for cid in self._order]) + b']'
+                else:
+                    rows = b','.join([self._compact_fragment(cid) for cid in self._order])
+                    body = b'{"columns":' + dumps(list(self.columns)) + b',"rows":[' + rows + b']}'
+                self._bodies[shape] = body
+            return body
+
+    def _compact_fragment(self, complaint_id):
+        fragment = self._compact.get(complaint_id)
+        if fragment is None:
+            record = loads(self._records[complaint_id])
+            fragment = dumps([record.get(column) for column in self.columns])
+            self._compact[complaint_id] = fragment
+        return fragment
+
+    def _refresh(self, db):
+        """Load everything on first use, then re-read only complaints changed since"""
+        # One snapshot, so no change can fall between the log and the rows
+        with db.read_snapshot() as conn:
+            dirty = ()
+            if self._records is not None:
+                changes = conn.execute(
+                    'SELECT seq, complaint_id FROM complaint_changes WHERE seq > ? ORDER BY seq', (self._seen,)
+                ).fetchall()
+                if changes and changes[0]['seq'] != self._seen + 1:
+                    # The log was trimmed past what this cache has applied
+                    self._reset()
+                elif changes:
+                    self._seen = changes[-1]['seq']
+                    dirty = list({row['complaint_id'] for row in changes})
+
+            if self._records is None:
+                self._seen = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM complaint_changes').fetchone()[0]
+                cursor = conn.execute(f'SELECT {", ".join(self.columns)} FROM complaints')
+                self._records = {}
+                self._store(cursor.fetchall())
+                self._resort()
+                self._bodies.clear()
+            elif dirty:
+                self._bodies.clear()
+                added = False
+                for cid in dirty:
+                    added |= cid not in self._records
+                    self._records.pop(cid, None)
+                    self._compact.pop(cid, None)
+                    self._sort_keys.pop(cid, None)
+
+                for start in range(0, len(dirty), self.REFRESH_BATCH):
+                    batch = dirty[start:start + self.REFRESH_BATCH]
+                    placeholders = ', '.join('?' * len(batch))
+                    cursor = conn.execute(
+                        f'SELECT {", ".join(self.columns)} FROM complaints WHERE id IN ({placeholders})',
+                        batch
+                    )
+                    self._store(cursor.fetchall())
+
+                # New and removed complaints change the order; updates don't
+                if added or len(self._order) != len(self._records):
+                    self._resort()
+
+    def _store(self, rows):
+        for row in rows:
+            record = dict(row)
+            if isinstance(record.get('transactions'), str):
+                record['transactions'] = loads(record['transactions'])
+            self._records[record['id']] = dumps(record)
+            self._sort_keys[record['id']] = (record['created_at'] or '', record['id'])
+
+    def _resort(self):
+        self._order = sorted(self._records, key=self._sort_keys.__getitem__, reverse=True)
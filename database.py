@@ -1,18 +1,82 @@
+import os
 import sqlite3
+import threading
+import time
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
+from contextlib import contextmanager
+from complaint_cache import ComplaintFragmentCache
+from records import Complaint
+
+class SessionConflict(Exception):
+    """Raised when a session changed since it was read (optimistic versioning)."""
+
 
 class Database:
-    def __init__(self, db_name='complaints.db'):
+    # Seconds before the in-process user directory is re-read, so users
+    # added through another process eventually become visible
+    USER_CACHE_TTL = 60
+
+    # Columns returned for a complaint, in API order
+    COMPLAINT_COLUMNS = Complaint.COLUMNS
+
+    # Complaints moved to the archive per batch, and the pause between batches
+    # that lets webhook writes through
+    ARCHIVE_BATCH_SIZE = 200
+    ARCHIVE_BATCH_PAUSE = 0.05
+
+    # Free pages returned to the filesystem per maintenance run
+    INCREMENTAL_VACUUM_PAGES = 2000
+
+    # Order of Twilio message statuses; a callback that arrives late never
+    # moves a message back to an earlier status
+    DELIVERY_STATUS_RANK = {
+        'accepted': 0, 'queued': 0, 'sending': 1, 'sent': 2,
+        'delivered': 3, 'read': 4, 'undelivered': 5, 'failed': 5,
+    }
+
+    # Sets completed_at when a status update completes a complaint (the first
+    # parameter is the new status) and clears it when it is reopened
+    COMPLETED_AT_SQL = "completed_at = CASE WHEN ? = 'Completed' THEN COALESCE(completed_at, CURRENT_TIMESTAMP) END"
+
+    def __init__(self, db_name='complaints.db', archive_name=None):
         """Initialize database connection"""
         self.db_name = db_name
+        # Complaints completed long ago live in a separate file, keeping the
+        # hot database small
+        self.archive_name = archive_name or f"{os.path.splitext(db_name)[0]}_archive.db"
+        self._users = None
+        self._users_loaded_at = 0.0
+        self._users_lock = threading.Lock()
+        self._users_version = None
+        self.complaint_cache = ComplaintFragmentCache(self.COMPLAINT_COLUMNS)
         self.init_database()
+        self.init_archive()
+    
+    def data_version(self, table):
+        """Return a token that changes whenever `table` is written, by any process.
+        
+        The counters live in the database (data_versions, kept by triggers), so
+        writes through another Database instance or process count too; reading
+        one is a single primary-key lookup.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT version FROM data_versions WHERE name = ?', (table,))
+        version = cursor.fetchone()['version']
+        conn.close()
+        
+        # Someone else changed the users since the directory was loaded
+        if table == 'users' and version != self._users_version:
+            self.invalidate_users()
+        return str(version)
     
     def get_connection(self):
         """Get database connection"""
         conn = sqlite3.connect(self.db_name)
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous = NORMAL')
         return conn
     
     def init_database(self):
@@ -20,6 +84,20 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Let maintenance hand free pages back in small steps. A new database
+        # takes the setting as is; an existing one needs a full VACUUM, which
+        # locks it for as long as the rewrite takes, so that is left to an
+        # offline step: python database.py enable-incremental-vacuum
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        elif not self.incremental_vacuum_enabled(conn):
+            print(f"{self.db_name} does not release free pages; stop the server and run "
+                  f"'python database.py enable-incremental-vacuum --db {self.db_name}' once")
+        
+        # Write-ahead logging lets dashboard reads run alongside webhook writes
+        cursor.execute('PRAGMA journal_mode = WAL')
+        
         # Sessions table for conversation state
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
@@ -29,7 +107,28 @@ class Database:
                 last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
+
+        # One row per session field, so a conversation step rewrites only
+        # the value it changed instead of the whole session blob
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_fields (
+                phone_number TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (phone_number, field)
+            ) WITHOUT ROWID
+        ''')
+
+        # One row per collected transaction of a session
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_transactions (
+                phone_number TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (phone_number, idx)
+            ) WITHOUT ROWID
+        ''')
+
         # Complaints table for storing complaint data
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS complaints (
@@ -59,54 +158,332 @@ class Database:
             )
         ''')
         
+        # Inbound Twilio MessageSids already handled, with the reply sent
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS processed_messages (
+                message_sid TEXT PRIMARY KEY,
+                reply TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_processed_messages_created ON processed_messages (created_at)')
+        
+        # PDFs sent to complainants, updated from Twilio's status callbacks;
+        # times are Unix seconds so latencies are a subtraction
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbound_messages (
+                message_sid TEXT PRIMARY KEY,
+                complaint_id INTEGER,
+                phone_number TEXT NOT NULL,
+                pdf_filename TEXT,
+                attempt INTEGER NOT NULL DEFAULT 1,
+                status TEXT,
+                status_rank INTEGER NOT NULL DEFAULT -1,
+                error_code TEXT,
+                sent_at REAL NOT NULL,
+                media_fetched_at REAL,
+                delivered_at REAL,
+                read_at REAL,
+                failed_at REAL,
+                resent_at REAL,
+                resent_as TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbound_messages_sent ON outbound_messages (sent_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbound_messages_file ON outbound_messages (pdf_filename)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbound_messages_failed ON outbound_messages (status, failed_at)')
+        
+        # Every status callback received, for auditing deliveries
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS delivery_events (
+                message_sid TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error_code TEXT,
+                received_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_delivery_events_received ON delivery_events (received_at)')
+        
+        # Version counter for optimistic concurrency on session writes
+        self._add_column_if_missing(cursor, 'sessions', 'version', 'INTEGER NOT NULL DEFAULT 0')
+        
+        # Set once a Pending complaint has been reported as stale
+        self._add_column_if_missing(cursor, 'complaints', 'stale_flagged_at', 'TIMESTAMP')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_complaints_status_created ON complaints (status, created_at)')
+        # Only the complaints still to be flagged, so a check with nothing new reads no rows
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_complaints_unflagged ON complaints (created_at)
+            WHERE status = 'Pending' AND stale_flagged_at IS NULL
+        ''')
+        # Flags in order, so every worker's monitor finds the ones other workers raised
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_complaints_flagged ON complaints (stale_flagged_at)
+            WHERE stale_flagged_at IS NOT NULL
+        ''')
+        
+        # Attender claims expire unless renewed; admin assignments have no lease
+        self._add_column_if_missing(cursor, 'complaints', 'lease_expires_at', 'TIMESTAMP')
+        # Only leased claims, so the reaper finds expired ones without scanning In Progress
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_complaints_leases ON complaints (lease_expires_at)
+            WHERE status = 'In Progress' AND lease_expires_at IS NOT NULL
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_complaints_handler_status ON complaints (handler, status, created_at)')
+        
+        # Districts an attender prefers cases from (comma-separated), for auto-assignment
+        self._add_column_if_missing(cursor, 'users', 'districts', "TEXT NOT NULL DEFAULT ''")
+        
+        # When a complaint was completed, for archiving. Complaints completed
+        # before this column existed count from the upgrade.
+        cursor.execute('PRAGMA table_info(complaints)')
+        if 'completed_at' not in [row['name'] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE complaints ADD COLUMN completed_at TIMESTAMP')
+            cursor.execute("UPDATE complaints SET completed_at = CURRENT_TIMESTAMP WHERE status = 'Completed'")
+        # The archiver reads completed complaints oldest first, under the write lock
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_complaints_status_completed ON complaints (status, completed_at)')
+        
+        # Write counters per table, for ETags. Triggers count every write,
+        # whichever process or connection makes it.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO data_versions (name) VALUES ('complaints'), ('users')")
+        # Lease renewals and stale flags don't change what the API shows
+        complaint_events = {
+            'insert': 'INSERT',
+            'update': f'UPDATE OF {", ".join(self.COMPLAINT_COLUMNS)}',
+            'delete': 'DELETE',
+        }
+        for table, events in (('complaints', complaint_events), ('users', {'insert': 'INSERT', 'update': 'UPDATE', 'delete': 'DELETE'})):
+            for name, event in events.items():
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{name} AFTER {event} ON {table} BEGIN
+                        UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                ''')
+        
+        # Which complaints changed, in order, for the fragment cache to catch up
+        # on writes from anywhere (trimmed by clean_complaint_changes)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS complaint_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                complaint_id INTEGER NOT NULL
+            )
+        ''')
+        for name, event in complaint_events.items():
+            row = 'OLD' if name == 'delete' else 'NEW'
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS complaints_log_{name} AFTER {event} ON complaints BEGIN
+                    INSERT INTO complaint_changes (complaint_id) VALUES ({row}.id);
+                END
+            ''')
+        
+        # Move sessions saved as a single JSON blob into per-field rows
+        cursor.execute("SELECT phone_number, data FROM sessions WHERE data != '{}'")
+        for row in cursor.fetchall():
+            legacy = json.loads(row['data']) if row['data'] else {}
+            transactions = legacy.pop('transactions', [])
+            legacy.pop('last_activity', None)
+            cursor.executemany(
+                "INSERT OR REPLACE INTO session_fields (phone_number, field, value) VALUES (?, ?, ?)",
+                [(row['phone_number'], key, json.dumps(value)) for key, value in legacy.items()]
+            )
+            cursor.executemany(
+                "INSERT OR REPLACE INTO session_transactions (phone_number, idx, data) VALUES (?, ?, ?)",
+                [(row['phone_number'], idx, json.dumps(trans)) for idx, trans in enumerate(transactions)]
+            )
+            cursor.execute("UPDATE sessions SET data = '{}' WHERE phone_number = ?", (row['phone_number'],))
+        
+        conn.commit()
+        conn.close()
+    
+    def init_archive(self):
+        """Create the archive database for complaints completed long ago"""
+        conn = self.get_archive_connection()
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS complaints (
+                id INTEGER PRIMARY KEY,
+                phone_number TEXT NOT NULL,
+                name TEXT NOT NULL,
+                mobile_no TEXT NOT NULL,
+                dob TEXT NOT NULL,
+                father_name TEXT NOT NULL,
+                district TEXT NOT NULL,
+                pin_code TEXT NOT NULL,
+                transactions TEXT NOT NULL,
+                created_at TIMESTAMP,
+                handler TEXT,
+                status TEXT,
+                completed_at TIMESTAMP,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         conn.commit()
         conn.close()
     
+    def get_archive_connection(self):
+        """Get a connection to the archive database"""
+        conn = sqlite3.connect(self.archive_name)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+    
+    def _add_column_if_missing(self, cursor, table, column, definition):
+        """Add a column to an existing table created by an older version"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row['name'] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
     # This method is not needed as init_database() handles all tables.
     def create_users_table(self):
         self.init_database()
 
-    def save_session(self, phone_number, state, data):
-        """Save or update session data"""
+    def save_session(self, phone_number, state, data, expected_version=None):
+        """Save the complete session, replacing any stored fields and transactions"""
+        fields = {key: value for key, value in data.items() if key not in ('transactions', 'last_activity')}
+        transactions = dict(enumerate(data.get('transactions', [])))
+
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+
+        try:
+            self._write_session_row(cursor, phone_number, state, expected_version)
+            cursor.execute('DELETE FROM session_fields WHERE phone_number = ?', (phone_number,))
+            cursor.execute('DELETE FROM session_transactions WHERE phone_number = ?', (phone_number,))
+            self._write_session_values(cursor, phone_number, fields, transactions)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def save_session_fields(self, phone_number, state, fields=None, transactions=None, expected_version=None):
+        """Update the session state and only the given fields and transactions.
+
+        `fields` maps field names to their new values; a 'transactions' entry
+        replaces the whole transaction list. `transactions` maps list indexes
+        to the transaction dicts that changed. When `expected_version` is
+        given, the write only happens if the session is still at that version
+        (see get_session_with_version), otherwise SessionConflict is raised.
+        """
+        fields = dict(fields or {})
+        transactions = dict(transactions or {})
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            self._write_session_row(cursor, phone_number, state, expected_version)
+            if 'transactions' in fields:
+                cursor.execute('DELETE FROM session_transactions WHERE phone_number = ?', (phone_number,))
+                transactions = dict(enumerate(fields.pop('transactions')))
+            self._write_session_values(cursor, phone_number, fields, transactions)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _write_session_row(self, cursor, phone_number, state, expected_version):
+        """Upsert the session row and bump its version, checking `expected_version` if given"""
+        now = datetime.now()
+
+        if expected_version is None:
+            cursor.execute('''
+                INSERT INTO sessions (phone_number, state, data, last_activity, version)
+                VALUES (?, ?, '{}', ?, 1)
+                ON CONFLICT(phone_number) DO UPDATE SET
+                    state = excluded.state,
+                    last_activity = excluded.last_activity,
+                    version = version + 1
+            ''', (phone_number, state, now))
+            return
+
         cursor.execute('''
-            INSERT OR REPLACE INTO sessions (phone_number, state, data, last_activity)
-            VALUES (?, ?, ?, ?)
-        ''', (phone_number, state, json.dumps(data), datetime.now()))
-        
-        conn.commit()
-        conn.close()
-    
+            UPDATE sessions SET state = ?, last_activity = ?, version = version + 1
+            WHERE phone_number = ? AND version = ?
+        ''', (state, now, phone_number, expected_version))
+        if cursor.rowcount == 1:
+            return
+
+        # Version 0 means "no session yet"; creating it must not race another insert
+        if expected_version == 0:
+            cursor.execute('''
+                INSERT OR IGNORE INTO sessions (phone_number, state, data, last_activity, version)
+                VALUES (?, ?, '{}', ?, 1)
+            ''', (phone_number, state, now))
+            if cursor.rowcount == 1:
+                return
+
+        cursor.connection.rollback()
+        raise SessionConflict(phone_number)
+
+    def _write_session_values(self, cursor, phone_number, fields, transactions):
+        """Write the given field and transaction rows of a session"""
+        if fields:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO session_fields (phone_number, field, value)
+                VALUES (?, ?, ?)
+            ''', [(phone_number, key, json.dumps(value)) for key, value in fields.items()])
+
+        if transactions:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO session_transactions (phone_number, idx, data)
+                VALUES (?, ?, ?)
+            ''', [(phone_number, idx, json.dumps(trans)) for idx, trans in transactions.items()])
+
     def get_session(self, phone_number):
         """Retrieve session data"""
+        state, data, _ = self.get_session_with_version(phone_number)
+        return state, data
+
+    def get_session_with_version(self, phone_number):
+        """Retrieve (state, data, version); version is 0 when there is no session"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+
+        # One read transaction so the row, fields and transactions are consistent
+        cursor.execute('BEGIN')
         cursor.execute('''
-            SELECT state, data FROM sessions WHERE phone_number = ?
+            SELECT state, last_activity, version FROM sessions WHERE phone_number = ?
         ''', (phone_number,))
-        
+
         result = cursor.fetchone()
+
+        if not result:
+            conn.close()
+            return None, {}, 0
+
+        data = {}
+
+        cursor.execute('SELECT field, value FROM session_fields WHERE phone_number = ?', (phone_number,))
+        for row in cursor.fetchall():
+            data[row['field']] = json.loads(row['value'])
+
+        cursor.execute('SELECT data FROM session_transactions WHERE phone_number = ? ORDER BY idx', (phone_number,))
+        transactions = [json.loads(row['data']) for row in cursor.fetchall()]
+        if transactions or 'transaction_count' in data:
+            data['transactions'] = transactions
+
         conn.close()
-        
-        if result:
-            state = result['state']
-            data = json.loads(result['data']) if result['data'] else {}
-            return state, data
-        return None, {}
-    
+
+        if result['last_activity']:
+            data['last_activity'] = datetime.fromisoformat(str(result['last_activity'])).isoformat()
+
+        return result['state'], data, result['version']
+
     def delete_session(self, phone_number):
         """Delete session data"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+
+        cursor.execute('DELETE FROM session_fields WHERE phone_number = ?', (phone_number,))
+        cursor.execute('DELETE FROM session_transactions WHERE phone_number = ?', (phone_number,))
         cursor.execute('DELETE FROM sessions WHERE phone_number = ?', (phone_number,))
-        
+
         conn.commit()
         conn.close()
-    
+
     def save_complaint(self, complaint_data):
         """Save complaint to database"""
         conn = self.get_connection()
@@ -134,27 +511,470 @@ class Database:
         return complaint_id
     
     def get_all_complaints(self):
-        """Retrieve all complaints from the database."""
+        """Retrieve all complaints as Complaint records, newest first.
+
+        Records keep their transactions as JSON until they are read; use
+        stream_complaints() to process large result sets without holding
+        them all in memory.
+        """
+        conn = self.get_connection()
+        conn.row_factory = None
+        cursor = conn.cursor()
+        
+        cursor.execute(f'SELECT {", ".join(self.COMPLAINT_COLUMNS)} FROM complaints ORDER BY created_at DESC')
+        
+        complaints = [Complaint.from_row(row) for row in cursor]
+        conn.close()
+        return complaints
+
+    def get_all_complaints_json(self, compact=False):
+        """All complaints as a JSON body (transactions decoded), assembled from cached fragments."""
+        if compact:
+            return self.complaint_cache.compact_json(self)
+        return self.complaint_cache.records_json(self)
+
+    def flag_stale_complaints(self, seconds):
+        """Flag Pending complaints older than `seconds` that weren't flagged yet.
+        
+        Returns the newly flagged complaints. The write lock is taken before
+        reading, so with several workers each complaint is flagged exactly once.
+        The partial index holds only unflagged Pending complaints (the planner
+        would otherwise range-scan every old Pending one), so a check that
+        finds nothing new releases the lock at once.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute(f'''
+                SELECT {", ".join(self.COMPLAINT_COLUMNS)} FROM complaints
+                INDEXED BY idx_complaints_unflagged
+                WHERE status = 'Pending' AND created_at < datetime('now', ?)
+                  AND stale_flagged_at IS NULL
+                ORDER BY created_at
+            ''', (f'-{int(seconds)} seconds',))
+            stale = [dict(row) for row in cursor.fetchall()]
+            
+            if stale:
+                cursor.executemany(
+                    'UPDATE complaints SET stale_flagged_at = CURRENT_TIMESTAMP WHERE id = ?',
+                    [(complaint['id'],) for complaint in stale]
+                )
+            conn.commit()
+            return stale
+        finally:
+            conn.close()
+
+    def get_stale_flags_since(self, since):
+        """Ids and flag times of complaints flagged stale at or after `since`, in flag order."""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute('''
+                SELECT id, stale_flagged_at FROM complaints
+                INDEXED BY idx_complaints_flagged
+                WHERE stale_flagged_at >= ?
+                ORDER BY stale_flagged_at, id
+            ''', (since,)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def count_stale_complaints(self, seconds):
+        """Number of Pending complaints older than `seconds` (a covering index count)."""
+        conn = self.get_connection()
+        try:
+            return conn.execute('''
+                SELECT COUNT(*) FROM complaints
+                WHERE status = 'Pending' AND created_at < datetime('now', ?)
+            ''', (f'-{int(seconds)} seconds',)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def get_stale_complaints(self, seconds):
+        """Retrieve Pending complaints older than `seconds`, oldest first."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT id, phone_number, name, mobile_no, dob, father_name, district, pin_code, transactions, created_at, handler, status FROM complaints ORDER BY created_at DESC')
+        cursor.execute(f'''
+            SELECT {", ".join(self.COMPLAINT_COLUMNS)} FROM complaints
+            WHERE status = 'Pending' AND created_at < datetime('now', ?)
+            ORDER BY created_at
+        ''', (f'-{int(seconds)} seconds',))
         
         rows = cursor.fetchall()
         conn.close()
         
-        # Convert rows to a list of dictionaries
-        complaints = [dict(row) for row in rows]
+        return [dict(row) for row in rows]
+
+    def _complaint_page(self, cursor):
+        """Rows from a complaint query as dicts with transactions decoded"""
+        complaints = []
+        for row in cursor.fetchall():
+            complaint = dict(row)
+            if isinstance(complaint.get('transactions'), str):
+                complaint['transactions'] = json.loads(complaint['transactions'])
+            complaints.append(complaint)
+        return complaints
+
+    def get_pending_complaints(self, limit=50, offset=0):
+        """One page of unassigned Pending complaints, oldest first."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {", ".join(self.COMPLAINT_COLUMNS)} FROM complaints
+            WHERE status = 'Pending' AND (handler IS NULL OR handler = '')
+            ORDER BY created_at, id
+            LIMIT ? OFFSET ?
+        ''', (limit, offset))
+        
+        complaints = self._complaint_page(cursor)
+        conn.close()
+        return complaints
+
+    def get_handler_complaints(self, handler, status, limit=50, offset=0):
+        """One page of a handler's complaints in `status`, oldest first."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {", ".join(self.COMPLAINT_COLUMNS)}, lease_expires_at FROM complaints
+            WHERE handler = ? AND status = ?
+            ORDER BY created_at, id
+            LIMIT ? OFFSET ?
+        ''', (handler, status, limit, offset))
+        
+        complaints = self._complaint_page(cursor)
+        conn.close()
         return complaints
 
+    def claim_next_complaints(self, handler, count, lease_seconds):
+        """Atomically claim up to `count` of the oldest unassigned Pending complaints.
+        
+        Returns the claimed complaints. Claims are leased: unless renewed they
+        go back to Pending after `lease_seconds`.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            # The write lock is held from here, so no one else can take these rows
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT id FROM complaints
+                WHERE status = 'Pending' AND (handler IS NULL OR handler = '')
+                ORDER BY created_at, id
+                LIMIT ?
+            ''', (count,))
+            ids = [row['id'] for row in cursor.fetchall()]
+            
+            claimed = []
+            if ids:
+                placeholders = ', '.join('?' * len(ids))
+                cursor.execute(f'''
+                    UPDATE complaints
+                    SET handler = ?, status = 'In Progress', lease_expires_at = datetime('now', ?)
+                    WHERE id IN ({placeholders})
+                ''', (handler, f'+{int(lease_seconds)} seconds', *ids))
+                cursor.execute(f'''
+                    SELECT {", ".join(self.COMPLAINT_COLUMNS)}, lease_expires_at FROM complaints
+                    WHERE id IN ({placeholders})
+                    ORDER BY created_at, id
+                ''', ids)
+                claimed = self._complaint_page(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+        return claimed
+
+    def claim_complaint(self, complaint_id, handler, lease_seconds):
+        """Claim one complaint if it is still unassigned and Pending; False if someone else has it."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                UPDATE complaints
+                SET handler = ?, status = 'In Progress', lease_expires_at = datetime('now', ?)
+                WHERE id = ? AND status = 'Pending' AND (handler IS NULL OR handler = '')
+            ''', (handler, f'+{int(lease_seconds)} seconds', complaint_id))
+            claimed = cursor.rowcount == 1
+            conn.commit()
+        finally:
+            conn.close()
+        return claimed
+
+    def renew_leases(self, handler, lease_seconds):
+        """Extend the leases on a handler's In Progress claims; returns how many were renewed."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE complaints SET lease_expires_at = datetime('now', ?)
+            WHERE handler = ? AND status = 'In Progress' AND lease_expires_at IS NOT NULL
+        ''', (f'+{int(lease_seconds)} seconds', handler))
+        renewed = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return renewed
+
+    def release_expired_claims(self):
+        """Return In Progress complaints whose lease ran out to the Pending queue."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT id FROM complaints INDEXED BY idx_complaints_leases
+                WHERE status = 'In Progress' AND lease_expires_at < CURRENT_TIMESTAMP
+            ''')
+            expired = [row['id'] for row in cursor.fetchall()]
+            
+            if expired:
+                # A released case may go stale again, so it can be re-alerted
+                cursor.executemany('''
+                    UPDATE complaints
+                    SET handler = NULL, status = 'Pending', lease_expires_at = NULL, stale_flagged_at = NULL
+                    WHERE id = ?
+                ''', [(complaint_id,) for complaint_id in expired])
+            conn.commit()
+        finally:
+            conn.close()
+        return expired
+
+    def get_open_case_loads(self):
+        """{handler: number of assigned complaints not yet Completed}"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT handler, COUNT(*) AS open_cases FROM complaints
+            WHERE handler IS NOT NULL AND handler != '' AND status != 'Completed'
+            GROUP BY handler
+        ''')
+        loads = {row['handler']: row['open_cases'] for row in cursor.fetchall()}
+        
+        conn.close()
+        return loads
+
+    def get_assignable_complaints(self, limit, min_age_seconds=0):
+        """(id, district) of unassigned Pending complaints at least `min_age_seconds` old, oldest first."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, district FROM complaints
+            WHERE status = 'Pending' AND (handler IS NULL OR handler = '')
+              AND created_at <= datetime('now', ?)
+            ORDER BY created_at, id
+            LIMIT ?
+        ''', (f'-{int(min_age_seconds)} seconds', limit))
+        complaints = [(row['id'], row['district']) for row in cursor.fetchall()]
+        
+        conn.close()
+        return complaints
+
+    def assign_complaints(self, assignments, lease_seconds=None):
+        """Assign many complaints in one transaction; returns the (id, handler) pairs applied.
+        
+        Each update is conditional, like claim_complaint: a complaint someone
+        claimed in the meantime is skipped. With `lease_seconds` the assignments
+        are leased like attender claims; without, they never expire.
+        """
+        lease = f'+{int(lease_seconds)} seconds' if lease_seconds else None
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        applied = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for complaint_id, handler in assignments:
+                cursor.execute('''
+                    UPDATE complaints
+                    SET handler = ?, status = 'In Progress',
+                        lease_expires_at = CASE WHEN ? IS NULL THEN NULL ELSE datetime('now', ?) END
+                    WHERE id = ? AND status = 'Pending' AND (handler IS NULL OR handler = '')
+                ''', (handler, lease, lease, complaint_id))
+                if cursor.rowcount == 1:
+                    applied.append((complaint_id, handler))
+            conn.commit()
+        finally:
+            conn.close()
+        return applied
+
+    def set_user_districts(self, username, districts):
+        """Set the districts an attender prefers; False if there is no such user."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                'UPDATE users SET districts = ? WHERE username = ?',
+                (','.join(districts), username)
+            )
+            updated = cursor.rowcount == 1
+            conn.commit()
+        finally:
+            conn.close()
+        
+        if updated:
+            self.invalidate_users()
+        return updated
+
+    @contextmanager
+    def read_snapshot(self):
+        """Connection whose reads all see the same state of the database.
+        
+        Under WAL this doesn't block writers, so multi-pass reports can read
+        a consistent view while the bot keeps saving complaints.
+        """
+        conn = self.get_connection()
+        conn.isolation_level = None
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        finally:
+            conn.execute('COMMIT')
+            conn.close()
+
+    def _complaint_filter(self, status=None, district=None, complaint_ids=None):
+        """WHERE clause and parameters selecting complaints for a report"""
+        clauses, params = [], []
+        if status:
+            clauses.append('status = ?')
+            params.append(status)
+        if district:
+            clauses.append('district = ? COLLATE NOCASE')
+            params.append(district)
+        if complaint_ids is not None:
+            clauses.append(f'id IN ({", ".join("?" * len(complaint_ids))})')
+            params.extend(complaint_ids)
+        return ' AND '.join(clauses) or '1', params
+
+    def count_complaints(self, conn, status=None, district=None, complaint_ids=None):
+        """Number of complaints matching the filters, read on `conn`."""
+        where, params = self._complaint_filter(status, district, complaint_ids)
+        return conn.execute(f'SELECT COUNT(*) FROM complaints WHERE {where}', params).fetchone()[0]
+
+    def iter_complaints(self, conn, status=None, district=None, complaint_ids=None, batch_size=500):
+        """Yield matching complaints as Complaint records in ID order, read on `conn`.
+        
+        Rows are fetched in keyset-paged batches, so memory stays flat no
+        matter how many complaints match.
+        """
+        where, params = self._complaint_filter(status, district, complaint_ids)
+        last_id = 0
+        while True:
+            cursor = conn.execute(f'''
+                SELECT {", ".join(self.COMPLAINT_COLUMNS)} FROM complaints
+                WHERE {where} AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (*params, last_id, batch_size))
+            batch = [Complaint.from_row(row) for row in cursor.fetchall()]
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1].id
+
+    def stream_complaints(self, status=None, district=None, complaint_ids=None, batch_size=1000):
+        """Generator of matching Complaint records in ID order, from one consistent snapshot.
+        
+        Opens its own connection, which is released when the generator is
+        exhausted or closed.
+        """
+        with self.read_snapshot() as conn:
+            yield from self.iter_complaints(conn, status, district, complaint_ids, batch_size)
+
+    def get_complaint(self, complaint_id):
+        """Retrieve one complaint by ID (transactions decoded), looking in the archive if it was moved there."""
+        for connect in (self.get_connection, self.get_archive_connection):
+            conn = connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT {", ".join(self.COMPLAINT_COLUMNS)} FROM complaints WHERE id = ?',
+                (complaint_id,)
+            )
+            complaints = self._complaint_page(cursor)
+            conn.close()
+            if complaints:
+                return complaints[0]
+        return None
+
+    def archive_completed_complaints(self, days):
+        """Move complaints completed more than `days` ago into the archive database.
+        
+        Works in batches of ARCHIVE_BATCH_SIZE. Each batch holds the hot
+        database's write lock only while it is copied and deleted, then pauses
+        so webhook writes get through. Rows are committed to the archive
+        before they are deleted, so a crash can leave a duplicate (replaced
+        on the next run) but never lose a complaint. Returns how many moved.
+        """
+        columns = self.COMPLAINT_COLUMNS + ('completed_at',)
+        placeholders = ', '.join('?' * len(columns))
+        moved = 0
+        
+        conn = self.get_connection()
+        archive = self.get_archive_connection()
+        try:
+            while True:
+                cursor = conn.cursor()
+                # Block hot writes so a batch can't change between copy and delete
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute(f'''
+                    SELECT {", ".join(columns)} FROM complaints
+                    WHERE status = 'Completed' AND completed_at < datetime('now', ?)
+                    ORDER BY completed_at
+                    LIMIT ?
+                ''', (f'-{int(days)} days', self.ARCHIVE_BATCH_SIZE))
+                rows = cursor.fetchall()
+                if not rows:
+                    conn.rollback()
+                    break
+                
+                archive.executemany(
+                    f'INSERT OR REPLACE INTO complaints ({", ".join(columns)}) VALUES ({placeholders})',
+                    [tuple(row) for row in rows]
+                )
+                archive.commit()
+                
+                ids = [row['id'] for row in rows]
+                cursor.execute(
+                    f'DELETE FROM complaints WHERE id IN ({", ".join("?" * len(ids))})',
+                    ids
+                )
+                conn.commit()
+                moved += len(ids)
+                
+                if len(rows) < self.ARCHIVE_BATCH_SIZE:
+                    break
+                time.sleep(self.ARCHIVE_BATCH_PAUSE)
+        finally:
+            conn.close()
+            archive.close()
+        
+        return moved
+
+    @staticmethod
+    def incremental_vacuum_enabled(conn):
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+    def optimize_storage(self):
+        """Refresh query planner statistics and return free pages to the filesystem."""
+        conn = self.get_connection()
+        # Bounded ANALYZE: samples each index instead of reading it all
+        conn.execute('PRAGMA analysis_limit = 1000')
+        conn.execute('ANALYZE')
+        conn.commit()
+        # Each step of this pragma frees one page; executescript runs it to completion
+        conn.executescript(f'PRAGMA incremental_vacuum({self.INCREMENTAL_VACUUM_PAGES});')
+        conn.close()
+
     def update_complaint_handler_status(self, complaint_id, handler_username, status):
         """Update the handler and status of a specific complaint."""
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
             cursor.execute(
-                "UPDATE complaints SET handler = ?, status = ? WHERE id = ?",
-                (handler_username, status, complaint_id)
+                f"UPDATE complaints SET handler = ?, status = ?, lease_expires_at = NULL, {self.COMPLETED_AT_SQL} WHERE id = ?",
+                (handler_username, status, status, complaint_id)
             )
             conn.commit()
             return True
@@ -173,11 +993,14 @@ class Database:
             if updated_transactions_list is not None:
                 transactions_json = json.dumps(updated_transactions_list)
                 cursor.execute(
-                    "UPDATE complaints SET status = ?, transactions = ? WHERE id = ?",
-                    (new_status, transactions_json, complaint_id)
+                    f"UPDATE complaints SET status = ?, transactions = ?, {self.COMPLETED_AT_SQL} WHERE id = ?",
+                    (new_status, transactions_json, new_status, complaint_id)
                 )
             else:
-                cursor.execute("UPDATE complaints SET status = ? WHERE id = ?", (new_status, complaint_id))
+                cursor.execute(
+                    f"UPDATE complaints SET status = ?, {self.COMPLETED_AT_SQL} WHERE id = ?",
+                    (new_status, new_status, complaint_id)
+                )
             conn.commit()
             return True
         except Exception as e:
@@ -194,24 +1017,66 @@ class Database:
         
         password_hash = generate_password_hash(password)
         
-        cursor.execute('''
-            INSERT INTO users (username, password_hash, role)
-            VALUES (?, ?, ?)
-        ''', (username, password_hash, role))
-        
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute('''
+                INSERT INTO users (username, password_hash, role)
+                VALUES (?, ?, ?)
+            ''', (username, password_hash, role))
+            
+            conn.commit()
+        finally:
+            conn.close()
+            self.invalidate_users()
 
-    def get_user(self, username):
-        """Retrieve a user by username."""
+    def add_first_admin(self, username, password):
+        """Add an admin only if there is none yet; returns False if one exists.
+        
+        The check and insert are one statement, so two concurrent first
+        registrations cannot both become admin.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
+        password_hash = generate_password_hash(password)
         
-        user = cursor.fetchone()
-        conn.close()
+        try:
+            cursor.execute('''
+                INSERT INTO users (username, password_hash, role)
+                SELECT ?, ?, 'admin'
+                WHERE NOT EXISTS (SELECT 1 FROM users WHERE role = 'admin')
+            ''', (username, password_hash))
+            added = cursor.rowcount == 1
+            
+            conn.commit()
+            return added
+        finally:
+            conn.close()
+            self.invalidate_users()
+
+    def _user_directory(self):
+        """Return the cached {username: user} map, reloading it when stale."""
+        users = self._users
+        if users is not None and time.monotonic() - self._users_loaded_at < self.USER_CACHE_TTL:
+            return users
         
+        with self._users_lock:
+            if self._users is None or time.monotonic() - self._users_loaded_at >= self.USER_CACHE_TTL:
+                with self.read_snapshot() as conn:
+                    version = conn.execute("SELECT version FROM data_versions WHERE name = 'users'").fetchone()['version']
+                    users = {row['username']: dict(row) for row in conn.execute('SELECT * FROM users')}
+                self._users = users
+                self._users_version = version
+                self._users_loaded_at = time.monotonic()
+            return self._users
+
+    def invalidate_users(self):
+        """Drop the cached user directory so the next lookup reloads it."""
+        with self._users_lock:
+            self._users = None
+
+    def get_user(self, username):
+        """Retrieve a user by username."""
+        user = self._user_directory().get(username)
         return dict(user) if user else None
 
     def check_password(self, password_hash, password):
@@ -220,22 +1085,222 @@ class Database:
 
     def get_users_by_role(self, role):
         """Retrieve all users with a specific role."""
+        users = [dict(user) for user in self._user_directory().values() if user['role'] == role]
+        users.sort(key=lambda user: user['id'])
+        return users
+
+    def claim_message(self, message_sid):
+        """Record an inbound MessageSid; returns False if it was already claimed."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM users WHERE role = ?', (role,))
+        cursor.execute('INSERT OR IGNORE INTO processed_messages (message_sid) VALUES (?)', (message_sid,))
+        claimed = cursor.rowcount == 1
         
-        rows = cursor.fetchall()
+        conn.commit()
+        conn.close()
+        return claimed
+
+    def get_message_reply(self, message_sid):
+        """Return the stored reply for a MessageSid, or None if it has none yet."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT reply FROM processed_messages WHERE message_sid = ?', (message_sid,))
+        row = cursor.fetchone()
         conn.close()
         
-        users = [dict(row) for row in rows]
-        return users
+        return row['reply'] if row else None
+
+    def save_message_reply(self, message_sid, reply):
+        """Store the reply sent for a claimed MessageSid."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('UPDATE processed_messages SET reply = ? WHERE message_sid = ?', (reply, message_sid))
+        
+        conn.commit()
+        conn.close()
+
+    def release_message(self, message_sid):
+        """Forget a MessageSid claim so the message can be processed again."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM processed_messages WHERE message_sid = ?', (message_sid,))
+        
+        conn.commit()
+        conn.close()
+
+    def clean_processed_messages(self, hours=24):
+        """Remove MessageSid records older than the given number of hours."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            DELETE FROM processed_messages
+            WHERE created_at < datetime('now', '-' || ? || ' hours')
+        ''', (hours,))
+        
+        conn.commit()
+        conn.close()
+
+    def clean_complaint_changes(self, keep=10000):
+        """Trim the complaint change log to its latest `keep` entries.
+        
+        A cache that fell further behind than that reloads everything.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            DELETE FROM complaint_changes
+            WHERE seq <= (SELECT MAX(seq) FROM complaint_changes) - ?
+        ''', (keep,))
+        
+        conn.commit()
+        conn.close()
+
+    def record_outbound_message(self, message_sid, complaint_id, phone_number, pdf_filename, attempt=1):
+        """Remember a sent PDF message, so its status callbacks can be matched to it."""
+        conn = self.get_connection()
+        conn.execute('''
+            INSERT OR IGNORE INTO outbound_messages
+                (message_sid, complaint_id, phone_number, pdf_filename, attempt, sent_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (message_sid, complaint_id, phone_number, pdf_filename, attempt, time.time()))
+        conn.commit()
+        conn.close()
+
+    def save_delivery_events(self, events, media_fetches=()):
+        """Store a batch of status callbacks and PDF media fetches in one transaction.
+        
+        `events` are (message_sid, status, error_code, received_at) tuples and
+        `media_fetches` (pdf_filename, fetched_at) pairs.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                'INSERT INTO delivery_events (message_sid, status, error_code, received_at) VALUES (?, ?, ?, ?)',
+                events
+            )
+            cursor.executemany('''
+                UPDATE outbound_messages SET
+                    status = CASE WHEN :rank > status_rank THEN :status ELSE status END,
+                    status_rank = MAX(status_rank, :rank),
+                    error_code = COALESCE(:error_code, error_code),
+                    delivered_at = CASE WHEN :status IN ('delivered', 'read') THEN COALESCE(delivered_at, :at) ELSE delivered_at END,
+                    read_at = CASE WHEN :status = 'read' THEN COALESCE(read_at, :at) ELSE read_at END,
+                    failed_at = CASE WHEN :status IN ('failed', 'undelivered') THEN COALESCE(failed_at, :at) ELSE failed_at END
+                WHERE message_sid = :sid
+            ''', [
+                {'sid': sid, 'status': status, 'rank': self.DELIVERY_STATUS_RANK.get(status, -1),
+                 'error_code': error_code, 'at': received_at}
+                for sid, status, error_code, received_at in events
+            ])
+            cursor.executemany(
+                'UPDATE outbound_messages SET media_fetched_at = COALESCE(media_fetched_at, ?) WHERE pdf_filename = ?',
+                [(fetched_at, pdf_filename) for pdf_filename, fetched_at in media_fetches]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_failed_deliveries(self, max_attempts, failed_before, limit=100):
+        """Failed PDF messages not yet re-sent, that failed before `failed_before` (Unix time)."""
+        conn = self.get_connection()
+        rows = conn.execute('''
+            SELECT * FROM outbound_messages
+            WHERE status IN ('failed', 'undelivered') AND resent_at IS NULL
+              AND attempt < ? AND failed_at < ?
+            ORDER BY failed_at
+            LIMIT ?
+        ''', (max_attempts, failed_before, limit)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def claim_resend(self, message_sid):
+        """Mark a failed message as being re-sent; False if another worker already did."""
+        conn = self.get_connection()
+        cursor = conn.execute(
+            'UPDATE outbound_messages SET resent_at = ? WHERE message_sid = ? AND resent_at IS NULL',
+            (time.time(), message_sid)
+        )
+        claimed = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        return claimed
+
+    def release_resend(self, message_sid):
+        """Give up a re-send claim whose send failed, counting it as an attempt.
+
+        The message is retried after the usual delay (failed_at restarts)
+        until its attempts reach the maximum.
+        """
+        conn = self.get_connection()
+        conn.execute(
+            'UPDATE outbound_messages SET resent_at = NULL, attempt = attempt + 1, failed_at = ? WHERE message_sid = ?',
+            (time.time(), message_sid)
+        )
+        conn.commit()
+        conn.close()
+
+    def mark_resent(self, message_sid, new_message_sid):
+        """Link a failed message to the message that re-sent it."""
+        conn = self.get_connection()
+        conn.execute('UPDATE outbound_messages SET resent_as = ? WHERE message_sid = ?', (new_message_sid, message_sid))
+        conn.commit()
+        conn.close()
+
+    def get_delivery_stats(self, since):
+        """Status counts, failure codes and sorted latencies (seconds) of PDFs sent since `since` (Unix time)."""
+        conn = self.get_connection()
+        try:
+            statuses = dict(conn.execute('''
+                SELECT COALESCE(status, 'unknown'), COUNT(*) FROM outbound_messages
+                WHERE sent_at >= ? GROUP BY 1
+            ''', (since,)).fetchall())
+            failure_codes = dict(conn.execute('''
+                SELECT COALESCE(error_code, 'unknown'), COUNT(*) FROM outbound_messages
+                WHERE sent_at >= ? AND status IN ('failed', 'undelivered') GROUP BY 1
+            ''', (since,)).fetchall())
+            delivery = [row[0] for row in conn.execute('''
+                SELECT delivered_at - sent_at FROM outbound_messages
+                WHERE sent_at >= ? AND delivered_at IS NOT NULL ORDER BY 1
+            ''', (since,))]
+            media_fetch = [row[0] for row in conn.execute('''
+                SELECT media_fetched_at - sent_at FROM outbound_messages
+                WHERE sent_at >= ? AND media_fetched_at IS NOT NULL ORDER BY 1
+            ''', (since,))]
+            resent = conn.execute(
+                'SELECT COUNT(*) FROM outbound_messages WHERE sent_at >= ? AND resent_as IS NOT NULL', (since,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            'statuses': statuses,
+            'failure_codes': failure_codes,
+            'delivery_latencies': delivery,
+            'media_fetch_latencies': media_fetch,
+            'resent': resent,
+        }
+
+    def clean_delivery_events(self, days=30):
+        """Delete status callbacks received more than `days` ago."""
+        conn = self.get_connection()
+        conn.execute('DELETE FROM delivery_events WHERE received_at < ?', (time.time() - days * 24 * 60 * 60,))
+        conn.commit()
+        conn.close()
 
     def clean_expired_sessions(self, minutes=30):
         """Clean sessions inactive for more than specified minutes"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        expired = "SELECT phone_number FROM sessions WHERE last_activity < datetime('now', '-' || ? || ' minutes')"
+        cursor.execute(f'DELETE FROM session_fields WHERE phone_number IN ({expired})', (minutes,))
+        cursor.execute(f'DELETE FROM session_transactions WHERE phone_number IN ({expired})', (minutes,))
         cursor.execute('''
             DELETE FROM sessions 
             WHERE last_activity < datetime('now', '-' || ? || ' minutes')
@@ -243,3 +1308,35 @@ class Database:
         
         conn.commit()
         conn.close()
+
+
+def enable_incremental_vacuum(db_name):
+    """Switch an existing database to auto_vacuum=INCREMENTAL with one full VACUUM.
+    
+    The VACUUM rewrites the whole file and holds the database for the
+    duration, so run it while the server is stopped. Returns False if it
+    was already enabled.
+    """
+    conn = sqlite3.connect(db_name)
+    try:
+        if Database.incremental_vacuum_enabled(conn):
+            return False
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return True
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Offline database maintenance (stop the server first).')
+    parser.add_argument('command', choices=['enable-incremental-vacuum'])
+    parser.add_argument('--db', default='complaints.db')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if enable_incremental_vacuum(args.db):
+        print(f"{args.db}: incremental vacuum enabled in {time.perf_counter() - started:.1f}s")
+    else:
+        print(f"{args.db}: incremental vacuum was already enabled")
@@ -0,0 +1,115 @@
+import threading
+import time
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """{'p50': ..., 'p90': ..., 'p99': ...} in milliseconds of sorted latencies in seconds; {} if empty"""
+    if not values:
+        return {}
+    return {
+        f'p{point}': round(values[min(len(values) - 1, len(values) * point // 100)] * 1000)
+        for point in points
+    }
+
+
+class DeliveryTracker:
+    """Follows sent complaint PDFs through Twilio's status callbacks.
+
+    Callbacks arrive in bursts (several per message: sent, delivered,
+    read), so they are only appended to an in-memory buffer; flush() writes
+    the buffer to SQLite in one transaction from a background task, and the
+    webhook never waits behind callback writes. Twilio's fetch of the PDF
+    from /download is buffered the same way. Failed messages are re-sent
+    up to `max_attempts` times, `resend_after` seconds after failing. If
+    the buffer reaches `max_buffer` the callback that filled it flushes.
+    """
+
+    FAILED_STATUSES = ('failed', 'undelivered')
+
+    def __init__(self, db, max_attempts=3, resend_after=60, max_buffer=10000):
+        self.db = db
+        self.max_attempts = max_attempts
+        self.resend_after = resend_after
+        self.max_buffer = max_buffer
+        self._events = []
+        self._media_fetches = []
+        self._lock = threading.Lock()
+
+    def record_sent(self, message_sid, complaint_id, phone_number, pdf_filename, attempt=1):
+        """Remember a sent PDF message"""
+        self.db.record_outbound_message(message_sid, complaint_id, phone_number, pdf_filename, attempt)
+
+    def status_callback(self, message_sid, status, error_code=None):
+        """Buffer one status callback"""
+        if not message_sid or not status:
+            return
+        with self._lock:
+            self._events.append((message_sid, status.lower(), error_code or None, time.time()))
+            full = len(self._events) >= self.max_buffer
+        if full:
+            self.flush()
+
+    def media_fetched(self, pdf_filename):
+        """Buffer Twilio's fetch of a PDF (only the first fetch of each file is kept)"""
+        with self._lock:
+            self._media_fetches.append((pdf_filename, time.time()))
+
+    def flush(self):
+        """Write buffered callbacks and fetches in one transaction; returns how many callbacks"""
+        with self._lock:
+            events, self._events = self._events, []
+            media_fetches, self._media_fetches = self._media_fetches, []
+        if not events and not media_fetches:
+            return 0
+        try:
+            self.db.save_delivery_events(events, media_fetches)
+        except Exception:
+            # Keep them for the next flush rather than lose them
+            with self._lock:
+                self._events[:0] = events
+                self._media_fetches[:0] = media_fetches
+            raise
+        return len(events)
+
+    def resend_failed(self, resend):
+        """Re-send failed PDFs with `resend(message_row)`, which returns the new SID or None.
+
+        A re-send that returns None or raises releases its claim and counts
+        as an attempt, so the message is tried again later (up to
+        `max_attempts`) and the rest of the batch still goes out.
+        """
+        resent = 0
+        failed = self.db.get_failed_deliveries(self.max_attempts, time.time() - self.resend_after)
+        for message in failed:
+            # Claimed first, so two workers never re-send the same PDF
+            if not self.db.claim_resend(message['message_sid']):
+                continue
+            try:
+                new_sid = resend(message)
+            except Exception as e:
+                print(f"Error re-sending PDF message {message['message_sid']}: {e}")
+                new_sid = None
+            if new_sid:
+                self.db.mark_resent(message['message_sid'], new_sid)
+                resent += 1
+            else:
+                self.db.release_resend(message['message_sid'])
+        return resent
+
+    def stats(self, hours=24):
+        """Delivery outcomes and latency percentiles for PDFs sent in the last `hours`"""
+        raw = self.db.get_delivery_stats(time.time() - hours * 60 * 60)
+        statuses = raw['statuses']
+        with self._lock:
+            buffered = len(self._events)
+        return {
+            'window_hours': hours,
+            'sent': sum(statuses.values()),
+            'statuses': statuses,
+            'failed': sum(statuses.get(status, 0) for status in self.FAILED_STATUSES),
+            'failure_codes': raw['failure_codes'],
+            'resent': raw['resent'],
+            'delivery_latency_ms': percentiles(raw['delivery_latencies']),
+            'media_fetch_latency_ms': percentiles(raw['media_fetch_latencies']),
+            'buffered_callbacks': buffered,
+        }
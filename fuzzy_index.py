@@ -0,0 +1,118 @@
+import re
+from collections import defaultdict
+
+
+def normalize(text):
+    """Lowercase, with everything but letters and digits collapsed to single spaces"""
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', str(text).lower()).split())
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NgramIndex:
+    """Fuzzy lookup of short names (districts, banks) through a trigram index.
+
+    Built once from (name, value) pairs; several names may share a value
+    (aliases, spellings). An exact match of the normalized name is one dict
+    lookup. Otherwise only entries sharing at least one trigram with the
+    text are scored, by the Dice coefficient of their trigram sets, so a
+    lookup costs microseconds no matter how many names are indexed.
+
+    With `containment` above 0 the score blends in the share of the text's
+    trigrams found in the name, which favours names that contain what was
+    typed plus extra words ("state bnk" -> "state bank of india").
+    """
+
+    def __init__(self, pairs, containment=0.0):
+        self.containment = containment
+        self._exact = {}
+        self._keys = []      # entry -> normalized name
+        self._values = []    # entry -> value
+        self._sizes = []     # entry -> trigram count
+        self._postings = defaultdict(list)  # trigram -> entries
+
+        for name, value in pairs:
+            key = normalize(name)
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = value
+            grams = trigrams(key)
+            entry = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(entry)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def exact(self, text):
+        """The value of a name matching `text` after normalization, or None"""
+        return self._exact.get(normalize(text))
+
+    def nearest(self, text, limit=8):
+        """Best (name, value, score) entries for `text` by trigram score, highest first"""
+        key = normalize(text)
+        if not key:
+            return []
+        if key in self._exact:
+            return [(key, self._exact[key], 1.0)]
+
+        grams = trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for entry in self._postings.get(gram, ()):
+                shared[entry] += 1
+
+        scored = []
+        for entry, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._sizes[entry])
+            if self.containment:
+                score += self.containment * (count / len(grams) - score)
+            scored.append((score, entry))
+        scored.sort(reverse=True)
+        return [(self._keys[entry], self._values[entry], score) for score, entry in scored[:limit]]
+
+    def search(self, text, limit=3):
+        """Best (value, score) pairs for `text`, highest score first; 1.0 is an exact match"""
+        best = {}
+        for name, value, score in self.nearest(text, limit=None):
+            if score > best.get(value, 0.0):
+                best[value] = score
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def best(self, text, threshold=0.0):
+        """The best (value, score) for `text`, or (None, 0.0) if nothing scores at least `threshold`"""
+        matches = self.search(text, limit=1)
+        if matches and matches[0][1] >= threshold:
+            return matches[0]
+        return None, 0.0
+
+
+def edit_similarity(a, b):
+    """1 - (optimal string alignment distance / longer length): typos and swapped letters cost 1 each"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, other in enumerate(b, 1):
+            # Plain comparisons instead of min(): this loop is the hot spot
+            cost = previous[j - 1] + (char != other)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if left + 1 < cost:
+                cost = left + 1
+            if j > 1 and i > 1 and char == b[j - 2] and a[i - 2] == other and previous2[j - 2] + 1 < cost:
+                cost = previous2[j - 2] + 1
+            current.append(cost)
+            left = cost
+        previous2, previous = previous, current
+    return 1.0 - previous[-1] / max(len(a), len(b))
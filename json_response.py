@@ -0,0 +1,83 @@
+import gzip
+from flask import request, Response
+from fast_json import dumps, loads
+
+# brotli is optional; without it clients are offered gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth the compression CPU
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def negotiate_encoding():
+    """Pick 'br', 'gzip' or None from the request's Accept-Encoding header"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    """Compress a response body with the negotiated encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def compact_shape(records, columns):
+    """Columnar form of a list of dicts: {"columns": [...], "rows": [[...], ...]}
+
+    Field names are sent once instead of once per row, and a JSON-encoded
+    'transactions' column is decoded so it isn't double-encoded on the wire.
+    """
+    decode_at = columns.index('transactions') if 'transactions' in columns else None
+
+    rows = []
+    for record in records:
+        row = [record.get(column) for column in columns]
+        if decode_at is not None and isinstance(row[decode_at], str):
+            row[decode_at] = loads(row[decode_at])
+        rows.append(row)
+
+    return {'columns': list(columns), 'rows': rows}
+
+
+def wants_compact():
+    """True when the client asked for the columnar shape (?shape=compact)"""
+    return request.args.get('shape') == 'compact'
+
+
+def json_response(build_payload, etag=None):
+    """Serialize, compress and conditionally answer a JSON response.
+
+    `build_payload` is only called when the client doesn't already hold
+    `etag`; it may return pre-serialized JSON bytes or any JSON-able object.
+    """
+    encoding = negotiate_encoding()
+    variant_etag = f"{etag}.{encoding}" if etag and encoding else etag
+
+    if variant_etag and request.if_none_match.contains(variant_etag):
+        response = Response(status=304)
+    else:
+        payload = build_payload()
+        body = payload if isinstance(payload, (bytes, bytearray)) else dumps(payload)
+
+        response = Response(body, mimetype='application/json')
+        if encoding and len(body) >= MIN_COMPRESS_SIZE:
+            response.set_data(compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+
+    response.vary.add('Accept-Encoding')
+    if variant_etag:
+        response.set_etag(variant_etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class MessageDeduplicator:
+    """Remembers the TwiML reply sent for each inbound Twilio MessageSid.
+
+    Twilio retries a webhook that answers slowly, so the same message can
+    arrive more than once. The first delivery claims its MessageSid; any
+    repeat is answered with the stored reply, or with an empty reply while
+    the first delivery is still being processed. Recent SIDs live in a
+    bounded in-memory LRU, so a duplicate usually costs one dict lookup;
+    the processed_messages table covers other workers and restarts.
+    """
+
+    PENDING = None
+
+    def __init__(self, db, capacity=10000, ttl_hours=24, clean_interval=600):
+        self.db = db
+        self.capacity = capacity
+        self.ttl_hours = ttl_hours
+        self.clean_interval = clean_interval
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_clean = time.monotonic()
+
+    def begin(self, message_sid):
+        """Claim a MessageSid. Returns (is_new, cached_reply)."""
+        with self._lock:
+            if message_sid in self._recent:
+                self._recent.move_to_end(message_sid)
+                return False, self._recent[message_sid]
+
+        if self.db.claim_message(message_sid):
+            self._remember(message_sid, self.PENDING)
+            return True, None
+
+        reply = self.db.get_message_reply(message_sid)
+        if reply is not None:
+            self._remember(message_sid, reply)
+        return False, reply
+
+    def finish(self, message_sid, reply):
+        """Store the reply for a claimed MessageSid"""
+        self.db.save_message_reply(message_sid, reply)
+        self._remember(message_sid, reply)
+        self._clean_if_due()
+
+    def abandon(self, message_sid):
+        """Release a claim whose processing failed, so a retry can run again"""
+        with self._lock:
+            self._recent.pop(message_sid, None)
+        self.db.release_message(message_sid)
+
+    def _remember(self, message_sid, reply):
+        with self._lock:
+            self._recent[message_sid] = reply
+            self._recent.move_to_end(message_sid)
+            while len(self._recent) > self.capacity:
+                self._recent.popitem(last=False)
+
+    def _clean_if_due(self):
+        now = time.monotonic()
+        if now - self._last_clean < self.clean_interval:
+            return
+        self._last_clean = now
+        self.db.clean_processed_messages(self.ttl_hours)
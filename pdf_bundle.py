@@ -0,0 +1,296 @@
+"""Multi-complaint PDF case bundles, streamed page by page.
+
+    python pdf_bundle.py --status Pending --district Chennai -o chennai_pending.pdf
+"""
+import argparse
+import zlib
+from array import array
+from functools import lru_cache
+from datetime import datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from pdf_generator import PERSONAL_COLUMNS, TRANSACTION_COLUMNS, personal_fields, transaction_fields
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold'}
+
+# Fixed object numbers; page i uses objects FIRST_PAGE_OBJECT + 2i (page)
+# and + 2i + 1 (its content stream), so links can point at pages not yet written
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+FONT_OBJECTS = {'F1': 3, 'F2': 4}
+FIRST_PAGE_OBJECT = 5
+
+# Table of contents layout
+TOC_TOP = PAGE_HEIGHT - 140
+TOC_ROW_HEIGHT = 16
+TOC_ROWS_PER_PAGE = int((TOC_TOP - 70) // TOC_ROW_HEIGHT)
+# Complaints read from the database at a time
+BATCH_SIZE = 100
+
+TOC_COLUMNS = [(50, 'ID', 40), (95, 'Complainant', 190), (290, 'District', 130),
+               (425, 'Status', 80), (510, 'Page', 35)]
+
+
+def pdf_string(value):
+    """A PDF string literal in WinAnsi, the encoding of the standard fonts"""
+    text = str(value).replace('₹', 'Rs.').replace('\r', ' ').replace('\n', ' ')
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def fit(text, font, size, width):
+    """Shorten `text` with an ellipsis so it fits in `width` points"""
+    text = str(text)
+    if stringWidth(text, FONTS[font], size) <= width:
+        return text
+    while text and stringWidth(text + '...', FONTS[font], size) > width:
+        text = text[:-1]
+    return text + '...'
+
+
+class Page:
+    """Drawing operations and links for one page, kept until it is written"""
+
+    __slots__ = ('ops', 'links')
+
+    def __init__(self):
+        self.ops = []
+        self.links = []
+
+    def text(self, x, y, value, font='F1', size=10):
+        self.ops.append(b'BT /%s %d Tf %.2f %.2f Td %s Tj ET' % (font.encode(), size, x, y, pdf_string(value)))
+
+    def centered(self, y, value, font='F1', size=10):
+        self.text((PAGE_WIDTH - stringWidth(str(value), FONTS[font], size)) / 2, y, value, font, size)
+
+    def line(self, x1, y1, x2, y2):
+        self.ops.append(b'%.2f %.2f m %.2f %.2f l S' % (x1, y1, x2, y2))
+
+    def link(self, x1, y1, x2, y2, target_page):
+        """Clickable area that jumps to page index `target_page`"""
+        self.links.append((x1, y1, x2, y2, target_page))
+
+
+def complaint_pages(complaint):
+    """Lay out one complaint with PDFGenerator's fields and columns; returns its pages"""
+    pages = [Page()]
+    page = pages[0]
+    y = PAGE_HEIGHT - 50
+
+    page.centered(y, f"CYBER CRIME COMPLAINT #{complaint['id']}", 'F2', 16)
+    page.line(50, y - 10, PAGE_WIDTH - 50, y - 10)
+    y -= 30
+    summary = (f"Received: {complaint.get('created_at') or 'N/A'}    "
+               f"Status: {complaint.get('status') or 'Pending'}    "
+               f"Handler: {complaint.get('handler') or 'unassigned'}    "
+               f"WhatsApp: {(complaint.get('phone_number') or 'N/A').replace('whatsapp:', '')}")
+    page.text(50, y, fit(summary, 'F1', 9, PAGE_WIDTH - 100), size=9)
+    y -= 30
+
+    page.text(50, y, "1. PERSONAL INFORMATION", 'F2', 13)
+    y -= 25
+    serial_x, label_x, value_x = PERSONAL_COLUMNS
+    for serial, label, value in personal_fields(complaint):
+        page.text(serial_x, y, serial, 'F2')
+        page.text(label_x, y, f"{label}:")
+        page.text(value_x, y, fit(value or 'N/A', 'F1', 10, PAGE_WIDTH - value_x - 50))
+        y -= 18
+    y -= 15
+
+    page.text(50, y, "2. TRANSACTION DETAILS", 'F2', 13)
+    y -= 25
+    for idx, trans in enumerate(complaint.get('transactions') or [], 1):
+        if y < 190:
+            page = Page()
+            pages.append(page)
+            y = PAGE_HEIGHT - 50
+            page.text(50, y, f"Complaint #{complaint['id']} (continued)", 'F2', 11)
+            y -= 30
+
+        page.text(PERSONAL_COLUMNS[0], y, f"Transaction #{idx}", 'F2', 11)
+        y -= 20
+        serial_x, label_x, value_x = TRANSACTION_COLUMNS
+        for serial, label, value in transaction_fields(idx, trans):
+            page.text(serial_x, y, serial, 'F2', 9)
+            page.text(label_x, y, f"{label}:", size=9)
+            page.text(value_x, y, fit(value, 'F1', 9, PAGE_WIDTH - value_x - 50), size=9)
+            y -= 16
+        y -= 12
+
+    return pages
+
+
+@lru_cache(maxsize=None)
+def page_count(transaction_count):
+    """Pages complaint_pages() produces for a complaint; only the transaction count matters"""
+    return len(complaint_pages({'id': 0, 'transactions': [{}] * transaction_count}))
+
+
+class BundleWriter:
+    """Streams the selected complaints into one PDF with a table of contents.
+
+    Iterating yields the file as bytes chunks, one object at a time, so it
+    can go straight to a file or an HTTP response. Everything is read in
+    one database snapshot, in two passes: the first counts each complaint's
+    pages and writes the contents, the second writes the complaint pages.
+    Only the current page and the byte offset of each object are kept, so
+    memory stays flat however many complaints match.
+    """
+
+    def __init__(self, db, title='Case bundle', status=None, district=None, complaint_ids=None):
+        self.db = db
+        self.title = title
+        self.filters = {'status': status, 'district': district, 'complaint_ids': complaint_ids}
+        self._offsets = array('Q')
+        self._position = 0
+        self._pages_written = 0
+        self._total_pages = None
+
+    @property
+    def page_count(self):
+        """Pages written so far (all of them once iteration has finished)"""
+        return self._pages_written
+
+    def __iter__(self):
+        with self.db.read_snapshot() as conn:
+            count = self.db.count_complaints(conn, **self.filters)
+            toc_pages = max(1, -(-count // TOC_ROWS_PER_PAGE))
+
+            yield self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+            for name, number in FONT_OBJECTS.items():
+                yield self._object(number, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s '
+                                           b'/Encoding /WinAnsiEncoding >>' % FONTS[name].encode())
+
+            # Pass 1: the table of contents, with each complaint's first page
+            next_page = toc_pages
+            toc, rows = self._toc_page(count, first=True), 0
+            for complaint in self.db.iter_complaints(conn, batch_size=BATCH_SIZE, **self.filters):
+                if rows == TOC_ROWS_PER_PAGE:
+                    yield from self._write_page(toc)
+                    toc, rows = self._toc_page(count), 0
+                self._toc_row(toc, rows, complaint, next_page)
+                rows += 1
+                next_page += page_count(len(complaint.get('transactions') or []))
+            if count == 0:
+                toc.text(50, TOC_TOP, "No complaints match this selection.")
+            yield from self._write_page(toc)
+
+            if self._pages_written != toc_pages:
+                raise RuntimeError("Table of contents changed while the bundle was written")
+            self._total_pages = next_page
+
+            # Pass 2: the complaints themselves
+            for complaint in self.db.iter_complaints(conn, batch_size=BATCH_SIZE, **self.filters):
+                for page in complaint_pages(complaint):
+                    yield from self._write_page(page, f"Complaint #{complaint['id']}")
+
+        if self._pages_written != self._total_pages:
+            raise RuntimeError("Complaints changed while the bundle was written")
+
+        yield from self._finish()
+
+    def _toc_page(self, count, first=False):
+        page = Page()
+        y = PAGE_HEIGHT - 50
+        if first:
+            page.centered(y, self.title.upper(), 'F2', 16)
+            page.line(50, y - 10, PAGE_WIDTH - 50, y - 10)
+            generated = datetime.now().strftime('%d-%m-%Y %H:%M:%S')
+            page.text(50, y - 32, f"{count} complaint(s)    Generated on: {generated}", size=9)
+        else:
+            page.text(50, y, "Contents (continued)", 'F2', 11)
+        for x, heading, width in TOC_COLUMNS:
+            page.text(x, TOC_TOP + TOC_ROW_HEIGHT + 4, heading, 'F2', 10)
+        page.line(50, TOC_TOP + TOC_ROW_HEIGHT, PAGE_WIDTH - 50, TOC_TOP + TOC_ROW_HEIGHT)
+        return page
+
+    def _toc_row(self, page, row, complaint, target_page):
+        y = TOC_TOP - row * TOC_ROW_HEIGHT
+        values = [complaint['id'], complaint.get('name'), complaint.get('district'),
+                  complaint.get('status') or 'Pending', target_page + 1]
+        for (x, heading, width), value in zip(TOC_COLUMNS, values):
+            page.text(x, y, fit(value if value is not None else '', 'F1', 10, width))
+        page.link(50, y - 4, PAGE_WIDTH - 50, y + 12, target_page)
+
+    def _write_page(self, page, label=None):
+        index = self._pages_written
+        page_object = FIRST_PAGE_OBJECT + 2 * index
+        if label is not None:
+            page.line(50, 40, PAGE_WIDTH - 50, 40)
+            page.text(50, 28, label, size=8)
+            page.text(PAGE_WIDTH - 120, 28, f"Page {index + 1} of {self._total_pages}", size=8)
+
+        content = zlib.compress(b'\n'.join(page.ops))
+        yield self._object(page_object + 1, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content)
+                           + content + b'\nendstream')
+
+        annots = b' '.join(
+            b'<< /Type /Annot /Subtype /Link /Rect [%.2f %.2f %.2f %.2f] /Border [0 0 0] '
+            b'/Dest [%d 0 R /XYZ null null null] >>' % (x1, y1, x2, y2, FIRST_PAGE_OBJECT + 2 * target)
+            for x1, y1, x2, y2, target in page.links
+        )
+        fonts = b' '.join(b'/%s %d 0 R' % (name.encode(), number) for name, number in FONT_OBJECTS.items())
+        yield self._object(page_object, b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] '
+                                        b'/Resources << /Font << %s >> >> /Contents %d 0 R /Annots [%s] >>'
+                           % (PAGES_OBJECT, PAGE_WIDTH, PAGE_HEIGHT, fonts, page_object + 1, annots))
+        self._pages_written += 1
+
+    def _finish(self):
+        total = self._pages_written
+        info_object = FIRST_PAGE_OBJECT + 2 * total
+
+        yield self._emit(b'%d 0 obj\n<< /Type /Pages /Count %d /Kids [' % (PAGES_OBJECT, total), PAGES_OBJECT)
+        for start in range(0, total, 500):
+            kids = range(start, min(start + 500, total))
+            yield self._emit(b' '.join(b'%d 0 R' % (FIRST_PAGE_OBJECT + 2 * i) for i in kids) + b'\n')
+        yield self._emit(b'] >>\nendobj\n')
+
+        yield self._object(CATALOG_OBJECT, b'<< /Type /Catalog /Pages %d 0 R >>' % PAGES_OBJECT)
+        yield self._object(info_object, b'<< /Title %s /Producer (Cyber Crime Complaint Assistant) >>'
+                           % pdf_string(self.title))
+
+        xref_position = self._position
+        yield self._emit(b'xref\n0 %d\n0000000000 65535 f \n' % len(self._offsets))
+        for start in range(1, len(self._offsets), 1000):
+            yield self._emit(b''.join(b'%010d 00000 n \n' % offset for offset in self._offsets[start:start + 1000]))
+        yield self._emit(b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                         % (len(self._offsets), CATALOG_OBJECT, info_object, xref_position))
+
+    def _object(self, number, body):
+        return self._emit(b'%d 0 obj\n' % number + body + b'\nendobj\n', number)
+
+    def _emit(self, data, object_number=None):
+        """Account for `data` at the current position; record where an object starts"""
+        if object_number is not None:
+            if len(self._offsets) <= object_number:
+                self._offsets.extend([0] * (object_number + 1 - len(self._offsets)))
+            self._offsets[object_number] = self._position
+        self._position += len(data)
+        return data
+
+
+def write_bundle(db, path, **options):
+    """Write a bundle to `path`; returns the number of pages"""
+    writer = BundleWriter(db, **options)
+    with open(path, 'wb') as f:
+        for chunk in writer:
+            f.write(chunk)
+    return writer.page_count
+
+
+if __name__ == '__main__':
+    from database import Database
+
+    parser = argparse.ArgumentParser(description='Write selected complaints into one PDF case bundle.')
+    parser.add_argument('-o', '--output', default='case_bundle.pdf')
+    parser.add_argument('--status', help='e.g. Pending')
+    parser.add_argument('--district')
+    parser.add_argument('--ids', help='comma-separated complaint IDs')
+    parser.add_argument('--title', default='Case bundle')
+    args = parser.parse_args()
+
+    ids = [int(value) for value in args.ids.split(',')] if args.ids else None
+    pages = write_bundle(Database(), args.output, title=args.title, status=args.status,
+                         district=args.district, complaint_ids=ids)
+    print(f"Wrote {args.output} ({pages} pages)")
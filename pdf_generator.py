@@ -5,6 +5,35 @@ from reportlab.lib import colors
 from io import BytesIO
 from datetime import datetime
 
+# x positions of the serial, label and value columns; pdf_bundle lays its pages out the same way
+PERSONAL_COLUMNS = (70, 110, 280)
+TRANSACTION_COLUMNS = (90, 140, 280)
+
+
+def personal_fields(data):
+    """(serial, label, value) of each personal field, numbered as the chatbot's edits are"""
+    return [
+        ("1.1", "Name of Complainant", data.get('name', 'N/A')),
+        ("1.2", "Mobile No of Complainant", data.get('mobile_no', 'N/A')),
+        ("1.3", "Date of Birth", data.get('dob', 'N/A')),
+        ("1.4", "Father's Name", data.get('father_name', 'N/A')),
+        ("1.5", "District", data.get('district', 'N/A')),
+        ("1.6", "PIN Code", data.get('pin_code', 'N/A')),
+    ]
+
+
+def transaction_fields(idx, trans):
+    """(serial, label, value) of each field of transaction number `idx`"""
+    return [
+        (f"2.{idx}.1", "Date", trans.get('date', 'N/A')),
+        (f"2.{idx}.2", "Time", trans.get('time', 'N/A')),
+        (f"2.{idx}.3", "Bank Name", trans.get('bank_name', 'N/A')),
+        (f"2.{idx}.4", "Bank Account No", trans.get('account_no', 'N/A')),
+        (f"2.{idx}.5", "Amount", trans.get('amount', 'N/A')),
+        (f"2.{idx}.6", "Transaction ID", trans.get('transaction_id', 'N/A')),
+    ]
+
+
 class PDFGenerator:
     
     @staticmethod
@@ -30,21 +59,13 @@ class PDFGenerator:
         y_position -= 30
         
         pdf.setFont("Helvetica", 11)
-        personal_info = [
-            ("1.1", "Name of Complainant", data.get('name', 'N/A')),
-            ("1.2", "Mobile No of Complainant", data.get('mobile_no', 'N/A')),
-            ("1.3", "Date of Birth", data.get('dob', 'N/A')),
-            ("1.4", "Father's Name", data.get('father_name', 'N/A')),
-            ("1.5", "District", data.get('district', 'N/A')),
-            ("1.6", "PIN Code", data.get('pin_code', 'N/A')),
-        ]
-        
-        for serial, label, value in personal_info:
+        serial_x, label_x, value_x = PERSONAL_COLUMNS
+        for serial, label, value in personal_fields(data):
             pdf.setFont("Helvetica-Bold", 10)
-            pdf.drawString(70, y_position, f"{serial}")
+            pdf.drawString(serial_x, y_position, f"{serial}")
             pdf.setFont("Helvetica", 10)
-            pdf.drawString(110, y_position, f"{label}:")
-            pdf.drawString(280, y_position, str(value))
+            pdf.drawString(label_x, y_position, f"{label}:")
+            pdf.drawString(value_x, y_position, str(value))
             y_position -= 20
         
         y_position -= 20
@@ -67,21 +88,13 @@ class PDFGenerator:
             y_position -= 25
             
             pdf.setFont("Helvetica", 10)
-            trans_details = [
-                (f"2.{idx}.1", "Date", trans.get('date', 'N/A')),
-                (f"2.{idx}.2", "Time", trans.get('time', 'N/A')),
-                (f"2.{idx}.3", "Bank Name", trans.get('bank_name', 'N/A')),
-                (f"2.{idx}.4", "Bank Account No", trans.get('account_no', 'N/A')),
-                (f"2.{idx}.5", "Amount", trans.get('amount', 'N/A')),
-                (f"2.{idx}.6", "Transaction ID", trans.get('transaction_id', 'N/A')),
-            ]
-            
-            for serial, label, value in trans_details:
+            serial_x, label_x, value_x = TRANSACTION_COLUMNS
+            for serial, label, value in transaction_fields(idx, trans):
                 pdf.setFont("Helvetica-Bold", 9)
-                pdf.drawString(90, y_position, f"{serial}")
+                pdf.drawString(serial_x, y_position, f"{serial}")
                 pdf.setFont("Helvetica", 9)
-                pdf.drawString(140, y_position, f"{label}:")
-                pdf.drawString(280, y_position, str(value))
+                pdf.drawString(label_x, y_position, f"{label}:")
+                pdf.drawString(value_x, y_position, str(value))
                 y_position -= 18
             
             y_position -= 15
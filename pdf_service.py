@@ -0,0 +1,139 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pdf_generator import PDFGenerator
+
+# Rendered once in each new worker so fonts and reportlab internals are loaded
+# before the first real complaint arrives
+WARMUP_COMPLAINT = {
+    'phone_number': 'whatsapp:+910000000000',
+    'name': 'Warm Up',
+    'mobile_no': '+919876543210',
+    'dob': '01-01-1990',
+    'father_name': 'Warm Up',
+    'district': 'Chennai',
+    'pin_code': '600001',
+    'transactions': [{
+        'date': '01-01-2025', 'time': '10:00 AM', 'bank_name': 'SBI',
+        'account_no': '123456789012', 'amount': '₹1.00', 'transaction_id': 'TXN1234567890',
+    }],
+}
+
+
+class PDFRenderError(Exception):
+    """A complaint PDF could not be rendered."""
+
+
+class PDFServiceBusy(PDFRenderError):
+    """Too many renders are already waiting for a worker."""
+
+
+class PDFRenderTimeout(PDFRenderError):
+    """A render took longer than allowed."""
+
+
+def _warm_up():
+    PDFGenerator.generate_complaint_pdf(WARMUP_COMPLAINT)
+
+
+def _worker_context():
+    # Workers forked straight from a server process would inherit whatever
+    # locks its other threads held at that moment; a fork server is started
+    # clean, so the pool can start at any time
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Load reportlab once in the fork server rather than in every worker
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _render(complaint_data):
+    return PDFGenerator.generate_complaint_pdf(complaint_data).getvalue()
+
+
+class PDFRenderService:
+    """Renders complaint PDFs in a persistent pool of worker processes.
+
+    reportlab rendering is CPU-bound Python, so on a request thread it holds
+    the GIL and stalls every other conversation in the process. The pool's
+    workers are started once and warmed up with a sample render; callers
+    submit complaint dicts and get the PDF bytes back. At most
+    `max_pending` renders are queued or running at once: a caller waits up
+    to `timeout` seconds for a slot and then for its result, and gets
+    PDFServiceBusy or PDFRenderTimeout instead of piling up behind a burst.
+    Workers start from a fork server (or are spawned) and import the
+    entry script as multiprocessing does, so scripts that use the service
+    keep their top-level work under `if __name__ == '__main__':`.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=30):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start and warm up the workers now; otherwise the pool starts on first use"""
+        self._get_pool()
+        return self
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=_worker_context(), initializer=_warm_up
+                )
+                # Submitting one no-op per worker makes them all start now
+                for future in [self._pool.submit(int) for _ in range(self.workers)]:
+                    future.result()
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, complaint_data, timeout=None):
+        """Render one complaint and return the PDF as bytes"""
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise PDFServiceBusy(f"{self.max_pending} PDF renders already pending")
+
+        try:
+            pool = self._get_pool()
+            future = pool.submit(_render, complaint_data)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the render itself ends, not the wait for
+        # it: a render that times out keeps running in its worker (cancel()
+        # only stops one still queued), so it still counts as pending
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise PDFRenderTimeout(f"PDF render took longer than {timeout}s")
+        except BrokenProcessPool as e:
+            # A worker died; start a fresh pool for the next caller
+            self._discard_pool(pool)
+            raise PDFRenderError(f"PDF worker pool failed: {e}")
+
+    async def render_async(self, complaint_data, timeout=None):
+        """render() for event-loop callers: the wait for a slot and for the
+        worker runs on a helper thread, never on the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.render, complaint_data, timeout)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
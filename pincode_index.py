@@ -0,0 +1,211 @@
+"""PIN code -> district index, for cross-checking the district and PIN a complainant gives.
+
+    python pincode_index.py build all_india_pincode_directory.csv   # compile India Post's full directory
+    python pincode_index.py lookup 600001
+    python pincode_index.py district "trichy"
+
+The bundled data/pincodes.csv covers PINs by their first three digits (the
+postal sorting district), listing every district a prefix serves; rows
+with a full six-digit PIN override their prefix. India Post's All India
+Pincode Directory (pincode, district/districtname, statename columns) can
+be compiled in its place for exact PINs everywhere.
+"""
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from functools import lru_cache
+from fuzzy_index import NgramIndex, edit_similarity, normalize
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_CSV = os.path.join(DATA_DIR, 'pincodes.csv')
+DEFAULT_ALIASES = os.path.join(DATA_DIR, 'district_aliases.csv')
+DEFAULT_INDEX = os.path.join(DATA_DIR, 'pincodes.idx')
+
+MAGIC = b'PINIDX1\n'
+FIRST_PIN = 100000
+PIN_COUNT = 900000
+
+
+def read_directory(path):
+    """(pincode, district, state) rows of a pincode CSV, whichever naming its header uses"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        columns = {name.lower().replace(' ', '').replace('_', ''): name for name in reader.fieldnames}
+        pin_column = columns['pincode']
+        district_column = columns.get('district') or columns['districtname']
+        state_column = columns.get('state') or columns['statename']
+        for row in reader:
+            yield row[pin_column].strip(), row[district_column].strip(), row[state_column].strip()
+
+
+def display_name(name):
+    # India Post's directory is in capitals
+    return name.title() if name.isupper() else name
+
+
+def build_index(csv_path, index_path):
+    """Compile a pincode CSV into the file PincodeIndex maps.
+
+    Layout: MAGIC, a little-endian uint32 header length, a JSON header of
+    districts [[name, state], ...] and groups [[district, ...], ...], then
+    (at an even offset) one uint16 group number per PIN from 100000 to
+    999999. Group 0 means unknown.
+    """
+    districts, groups = {}, {(): 0}
+    prefixes, pins = {}, {}
+    for pin, district, state in read_directory(csv_path):
+        if not pin.isdigit() or len(pin) not in (3, 6) or pin[0] == '0' or not district:
+            continue
+        key = (display_name(district), display_name(state))
+        number = districts.setdefault(key, len(districts))
+        (prefixes if len(pin) == 3 else pins).setdefault(int(pin), set()).add(number)
+
+    def group(numbers):
+        return groups.setdefault(tuple(sorted(numbers)), len(groups))
+
+    table = array('H', [0]) * PIN_COUNT
+    for prefix, numbers in prefixes.items():
+        start = prefix * 1000 - FIRST_PIN
+        table[start:start + 1000] = array('H', [group(numbers)]) * 1000
+    for pin, numbers in pins.items():
+        table[pin - FIRST_PIN] = group(numbers)
+    if len(groups) > 0xFFFF:
+        raise ValueError("Too many distinct district groups for a uint16 table")
+    if sys.byteorder == 'big':
+        table.byteswap()
+
+    header = json.dumps({
+        'districts': [list(key) for key in districts],
+        'groups': [list(numbers) for numbers in groups],
+    }, ensure_ascii=False).encode('utf-8')
+    padding = b'\0' * ((len(MAGIC) + 4 + len(header)) % 2)
+
+    # Written aside and renamed, so a reader never maps a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header)) + header + padding)
+        f.write(table.tobytes())
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def read_aliases(path):
+    """(alias, district) rows"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield row['alias'], row['district']
+
+
+class PincodeIndex:
+    """Read-only PIN -> districts lookups over a compiled index file.
+
+    The file is memory-mapped, so opening it reads only the small JSON
+    header and the PIN table is paged in by the OS as it is used; a lookup
+    is one two-byte read at a computed offset. District names (and their
+    aliases) are also held in a trigram index for fuzzy matching of what
+    complainants type.
+    """
+
+    def __init__(self, index_path, aliases_path=None):
+        with open(index_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{index_path} is not a pincode index")
+        header_length, = struct.unpack_from('<I', self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._map[header_start:header_start + header_length])
+        self._table_offset = (header_start + header_length + 1) & ~1
+
+        self.districts = [tuple(district) for district in header['districts']]
+        self._groups = [tuple(group) for group in header['groups']]
+
+        names = [(name, name) for name, state in self.districts]
+        if aliases_path and os.path.exists(aliases_path):
+            names += list(read_aliases(aliases_path))
+        self._names = NgramIndex(names)
+
+    def districts_for(self, pincode):
+        """[(district, state), ...] served by a PIN code; empty when the PIN is unknown"""
+        pin = int(pincode)
+        if not FIRST_PIN <= pin < FIRST_PIN + PIN_COUNT:
+            return []
+        group, = struct.unpack_from('<H', self._map, self._table_offset + 2 * (pin - FIRST_PIN))
+        return [self.districts[number] for number in self._groups[group]]
+
+    def canonical_district(self, text):
+        """The canonical name for an exact district name or alias (any case or spacing), else None"""
+        return self._names.exact(text)
+
+    def match_district(self, text, threshold=0.0):
+        """The canonical district name closest to `text`, with its score (1.0 is an exact name or alias)"""
+        return self._names.best(text, threshold)
+
+    def pincode_serves(self, pincode, district):
+        """True/False whether a PIN code serves `district`; None when the PIN is unknown"""
+        candidates = self.districts_for(pincode)
+        if not candidates:
+            return None
+        canonical = self._names.exact(district) or district
+        return normalize(canonical) in {normalize(name) for name, state in candidates}
+
+    def serving_district(self, pincode, district, threshold=1.0):
+        """The district served by `pincode` that `district` names or (at `threshold`) nearly
+        spells, else None. Only the PIN's own districts are candidates."""
+        key = normalize(self._names.exact(district) or district)
+        best, best_score = None, threshold
+        for name, state in self.districts_for(pincode):
+            score = edit_similarity(normalize(name), key)
+            if score >= best_score:
+                best, best_score = name, score
+        return best
+
+    def close(self):
+        self._map.close()
+
+
+@lru_cache(maxsize=None)
+def default_index():
+    """The index named by PINCODE_INDEX, or else the bundled dataset's.
+
+    The bundled one is compiled again whenever its CSV is newer, into data/
+    or the temp directory if data/ isn't writable.
+    """
+    if os.getenv('PINCODE_INDEX'):
+        return PincodeIndex(os.getenv('PINCODE_INDEX'), DEFAULT_ALIASES)
+    index_path = DEFAULT_INDEX
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(DEFAULT_CSV):
+        return PincodeIndex(index_path, DEFAULT_ALIASES)
+    try:
+        build_index(DEFAULT_CSV, index_path)
+    except OSError:
+        index_path = build_index(DEFAULT_CSV, os.path.join(tempfile.gettempdir(), 'pincodes.idx'))
+    return PincodeIndex(index_path, DEFAULT_ALIASES)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the PIN code -> district index.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='compile a pincode CSV')
+    build.add_argument('csv', nargs='?', default=DEFAULT_CSV)
+    build.add_argument('--output', default=DEFAULT_INDEX)
+    lookup = commands.add_parser('lookup', help='districts served by a PIN code')
+    lookup.add_argument('pincode')
+    district = commands.add_parser('district', help='closest district name')
+    district.add_argument('name')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        build_index(args.csv, args.output)
+        print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s")
+    elif args.command == 'lookup':
+        print(default_index().districts_for(args.pincode) or 'unknown PIN code')
+    else:
+        print(default_index().match_district(args.name))
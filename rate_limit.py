@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """In-process token bucket per key (the sender's number).
+
+    Each key holds a (tokens, last_seen) pair in an OrderedDict kept in
+    last-seen order. A bucket left alone for `burst / rate` seconds has
+    refilled completely and is indistinguishable from a new one, so idle
+    buckets are evicted from the front without changing any decision;
+    `max_keys` bounds memory during a flood of distinct senders.
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self.idle_after = self.burst / self.rate
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Take one token for `key`; False means the request should be rejected"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last_seen = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last_seen) * self.rate)
+
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+
+            self._buckets[key] = (tokens, now)
+            self._evict(now)
+            return allowed
+
+    def _evict(self, now):
+        buckets = self._buckets
+        while buckets:
+            key, (tokens, last_seen) = next(iter(buckets.items()))
+            if now - last_seen < self.idle_after and len(buckets) <= self.max_keys:
+                break
+            del buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoadShedder:
+    """Caps the number of requests processed at once; extra ones are rejected, not queued"""
+
+    def __init__(self, max_in_flight):
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def try_enter(self):
+        """Reserve a slot without waiting; False when the server is saturated"""
+        return self._slots.acquire(blocking=False)
+
+    def leave(self):
+        self._slots.release()
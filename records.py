@@ -0,0 +1,151 @@
+import sys
+from fast_json import loads
+
+_MISSING = object()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Transaction:
+    """One fraudulent transaction of a complaint.
+
+    Stored in slots instead of a per-transaction dict. Keys the record
+    doesn't know (none today) are kept in `extra`, and keys that were never
+    set are left out of to_dict(), so a transaction round-trips unchanged.
+    """
+
+    FIELDS = ('date', 'time', 'bank_name', 'account_no', 'amount', 'transaction_id', 'completed')
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.pop(field, _MISSING))
+        self.extra = values or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def get(self, key, default=None):
+        """dict-style access, so code written for transaction dicts keeps working"""
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not _MISSING}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"Transaction({self.to_dict()!r})"
+
+
+class Complaint:
+    """One complaints row, stored in slots instead of a dict per row.
+
+    The transactions column is kept as the JSON text read from the database
+    and only decoded into Transaction records the first time `transactions`
+    is read, so listing or counting complaints never parses them. Supports
+    dict-style reads (`complaint['name']`, `.get()`, `dict(complaint)`) for
+    code written against the old row dicts; to_dict() gives a JSON-ready dict.
+    """
+
+    # Columns of a complaint in API order (Database.COMPLAINT_COLUMNS)
+    COLUMNS = (
+        'id', 'phone_number', 'name', 'mobile_no', 'dob', 'father_name', 'district',
+        'pin_code', 'transactions', 'created_at', 'handler', 'status'
+    )
+    _SCALARS = tuple(column for column in COLUMNS if column != 'transactions')
+    __slots__ = _SCALARS + ('_transactions_json', '_transactions')
+
+    def __init__(self, transactions='[]', **values):
+        """`transactions` is the JSON text of the column, or a list of transaction dicts"""
+        for column in self._SCALARS:
+            setattr(self, column, values.get(column))
+        self._transactions_json = transactions
+        self._transactions = None
+
+    @classmethod
+    def from_row(cls, row):
+        """Build from a row (tuple or sqlite3.Row) selected in COLUMNS order"""
+        (id_, phone_number, name, mobile_no, dob, father_name, district,
+         pin_code, transactions, created_at, handler, status) = row
+        complaint = cls.__new__(cls)
+        complaint.id = id_
+        complaint.phone_number = phone_number
+        complaint.name = name
+        complaint.mobile_no = mobile_no
+        complaint.dob = dob
+        complaint.father_name = father_name
+        # A few dozen districts, handlers and statuses repeat across every
+        # row; share one string each instead of a copy per row
+        complaint.district = _intern(district)
+        complaint.pin_code = pin_code
+        complaint.created_at = created_at
+        complaint.handler = _intern(handler)
+        complaint.status = _intern(status)
+        complaint._transactions_json = transactions
+        complaint._transactions = None
+        return complaint
+
+    @property
+    def transactions(self):
+        """The transactions as Transaction records, decoded on first access"""
+        if self._transactions is None:
+            self._transactions = [Transaction.from_dict(trans) for trans in self._decoded_transactions()]
+            self._transactions_json = None
+        return self._transactions
+
+    def _decoded_transactions(self):
+        raw = self._transactions_json
+        return loads(raw) if isinstance(raw, (str, bytes)) else list(raw or [])
+
+    def _transaction_dicts(self):
+        # Not decoded yet: go straight from JSON to dicts, and stay lazy
+        if self._transactions is None:
+            return self._decoded_transactions()
+        return [trans.to_dict() for trans in self._transactions]
+
+    @property
+    def transaction_count(self):
+        return len(self.transactions)
+
+    def keys(self):
+        return self.COLUMNS
+
+    def get(self, key, default=None):
+        if key == 'transactions':
+            return self._transaction_dicts()
+        if key in self._SCALARS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in self.COLUMNS:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key):
+        return key in self.COLUMNS
+
+    def to_dict(self):
+        """The complaint as a dict with transactions decoded, ready for JSON"""
+        return {column: self.get(column) for column in self.COLUMNS}
+
+    def to_row(self):
+        """Values in COLUMNS order, transactions decoded, for the columnar JSON shape"""
+        return [self.get(column) for column in self.COLUMNS]
+
+    def __repr__(self):
+        return f"Complaint(id={self.id!r}, name={self.name!r}, status={self.status!r})"
@@ -0,0 +1,39 @@
+import threading
+import traceback
+
+
+class PeriodicTask:
+    """Runs a function every `interval` seconds on a daemon thread.
+
+    Errors are printed and the task keeps running, so one bad cycle doesn't
+    stop background maintenance for the life of the process.
+    """
+
+    def __init__(self, interval, func, name=None):
+        self.interval = interval
+        self.func = func
+        self.name = name or getattr(func, '__name__', 'periodic-task')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread (once)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        """Run the function now, on the calling thread"""
+        try:
+            return self.func()
+        except Exception as e:
+            print(f"Error in background task {self.name}: {e}")
+            traceback.print_exc()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+from fast_json import dumps
+
+
+class StaleCaseMonitor:
+    """Finds Pending complaints that have waited too long and tells dashboards.
+
+    check() runs on a schedule in every worker: one query over a partial
+    index of unflagged Pending complaints flags newly stale ones in the
+    database (so each is flagged once, by whichever worker gets there
+    first). Each worker then reads the flags raised since its last check,
+    by itself or any other worker, and publishes them to its own subscribed
+    dashboards. It also recounts the stale complaints, so dashboards polling
+    count() share one covering-index count per check instead of running a
+    query each.
+    """
+
+    def __init__(self, db, threshold_seconds=1800, queue_size=100):
+        self.db = db
+        self.threshold_seconds = threshold_seconds
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._count = None
+        # Flag time of the last published flags (as SQLite's CURRENT_TIMESTAMP
+        # writes it), and the ids published at exactly that time
+        self._since = None
+        self._published = set()
+
+    def check(self):
+        """Flag stale complaints and publish every flag raised since the last check"""
+        if self._since is None:
+            # Flags raised before this worker started were announced elsewhere
+            self._since = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        stale = self.db.flag_stale_complaints(self.threshold_seconds)
+        flagged = self.db.get_stale_flags_since(self._since)
+        self._count = self.db.count_stale_complaints(self.threshold_seconds)
+
+        fresh = [row['id'] for row in flagged if row['id'] not in self._published]
+        if flagged:
+            # Timestamps have one-second resolution: a later flag in the same
+            # second is read again next time, so remember what was sent
+            self._since = flagged[-1]['stale_flagged_at']
+            self._published = {row['id'] for row in flagged if row['stale_flagged_at'] == self._since}
+        if fresh:
+            self.publish(self._event(fresh, self._since))
+        return stale
+
+    def _event(self, ids, flagged_at):
+        return {
+            'threshold_seconds': self.threshold_seconds,
+            'ids': ids,
+            'count': self.count(),
+            'flagged_at': flagged_at,
+        }
+
+    def count(self):
+        """How many complaints are stale, as of the last check"""
+        if self._count is None:
+            self._count = self.db.count_stale_complaints(self.threshold_seconds)
+        return self._count
+
+    def current(self):
+        """All complaints that are stale right now"""
+        return self.db.get_stale_complaints(self.threshold_seconds)
+
+    def subscribe(self):
+        """Register a listener; returns the queue its events arrive on"""
+        listener = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            self._subscribers.discard(listener)
+
+    def publish(self, event):
+        with self._lock:
+            listeners = list(self._subscribers)
+        for listener in listeners:
+            try:
+                listener.put_nowait(event)
+            except queue.Full:
+                # A dashboard that stopped reading loses events rather than memory
+                pass
+
+    def stream(self, listener, heartbeat=15, lifetime=300, last_event_id=None):
+        """Server-Sent Events for one listener; unsubscribes when the client leaves.
+
+        The stream ends after `lifetime` seconds and the browser reconnects
+        (after the `retry` delay), so a sync worker thread is held for a
+        bounded time rather than for as long as a dashboard stays open.
+        Each event's id is its flag time; a reconnecting browser sends the
+        last one back as `last_event_id`, and flags raised since are replayed.
+        """
+        deadline = time.monotonic() + lifetime
+        try:
+            yield 'retry: 5000\n\n'
+            if last_event_id:
+                missed = [row for row in self.db.get_stale_flags_since(last_event_id)
+                          if row['stale_flagged_at'] > last_event_id]
+                if missed:
+                    yield self._format(self._event([row['id'] for row in missed], missed[-1]['stale_flagged_at']))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = listener.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield self._format(event)
+        finally:
+            self.unsubscribe(listener)
+
+    @staticmethod
+    def _format(event):
+        return f"id: {event['flagged_at']}\nevent: stale\ndata: {dumps(event).decode('utf-8')}\n\n"
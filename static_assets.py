@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from flask import request, Response
+from json_response import negotiate_encoding, brotli, BROTLI_QUALITY
+
+# Only text assets are worth compressing
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    """One static file held in memory with its precompressed variants"""
+
+    __slots__ = ('content_type', 'etag', 'variants', 'stat_key')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            body = f.read()
+        stat = os.stat(path)
+
+        self.stat_key = (stat.st_mtime_ns, stat.st_size)
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        self.etag = hashlib.sha1(body).hexdigest()[:16]
+
+        self.variants = {None: body}
+        if self.content_type.startswith(COMPRESSIBLE_TYPES):
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=11)
+
+
+class StaticAssets:
+    """Serves an allow-listed set of files from memory.
+
+    Files are read and compressed once; responses carry an ETag and
+    Cache-Control so browsers revalidate with a cheap 304. reload_changed()
+    (run periodically off the request path) picks up edits on disk, so
+    serving never touches the filesystem after warm-up.
+    """
+
+    def __init__(self, root, filenames):
+        self.root = root
+        self.filenames = tuple(filenames)
+        self._assets = {}
+        self._lock = threading.Lock()
+        for filename in self.filenames:
+            self._load(filename)
+
+    def _load(self, filename):
+        path = os.path.join(self.root, filename)
+        try:
+            asset = Asset(path)
+        except OSError as e:
+            print(f"Static asset {filename} unavailable: {e}")
+            asset = None
+        with self._lock:
+            if asset is None:
+                self._assets.pop(filename, None)
+            else:
+                self._assets[filename] = asset
+
+    def reload_changed(self):
+        """Reload any allow-listed file whose mtime or size changed on disk"""
+        for filename in self.filenames:
+            current = self._assets.get(filename)
+            try:
+                stat = os.stat(os.path.join(self.root, filename))
+                changed = current is None or current.stat_key != (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                changed = current is not None
+            if changed:
+                self._load(filename)
+
+    def response(self, filename):
+        """Response for an allow-listed file, or None if it isn't served"""
+        asset = self._assets.get(filename)
+        if asset is None:
+            return None
+
+        encoding = negotiate_encoding()
+        if encoding not in asset.variants:
+            encoding = None
+        etag = f"{asset.etag}.{encoding}" if encoding else asset.etag
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(asset.variants[encoding], content_type=asset.content_type)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,26 @@
+import asyncio
+import threading
+
+
+class StripedLock:
+    """A fixed pool of locks picked by hashing a key.
+
+    Requests for the same key (a sender's phone number) always take the same
+    lock and run one at a time, while different keys mostly land on
+    different stripes and run in parallel. Memory stays constant no matter
+    how many keys are seen.
+    """
+
+    def __init__(self, stripes=64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def for_key(self, key):
+        """Return the lock guarding `key`"""
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class AsyncStripedLock(StripedLock):
+    """StripedLock for coroutines: the stripes are asyncio locks, used with `async with`"""
+
+    def __init__(self, stripes=64):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+
+# Twilio rejects WhatsApp message bodies longer than 1600 characters
+WHATSAPP_MESSAGE_LIMIT = 1600
+
+PERSONAL_FIELDS = ('name', 'mobile_no', 'dob', 'father_name', 'district', 'pin_code')
+
+
+def message_length(text):
+    """Length as Twilio counts it: UTF-16 code units, so most emoji count twice"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def summary_sections(session_data):
+    """The complaint summary as a list of sections: the personal block, then one per transaction.
+
+    Joined together, the sections are the full summary text.
+    """
+    get = session_data.get
+    sections = ["".join([
+        "📋 *SUMMARY OF YOUR COMPLAINT*\n\n",
+        "👤 *PERSONAL INFORMATION:*\n",
+        f"1.1 Name: {get('name', 'N/A')}\n",
+        f"1.2 Mobile: {get('mobile_no', 'N/A')}\n",
+        f"1.3 DOB: {get('dob', 'N/A')}\n",
+        f"1.4 Father's Name: {get('father_name', 'N/A')}\n",
+        f"1.5 District: {get('district', 'N/A')}\n",
+        f"1.6 PIN Code: {get('pin_code', 'N/A')}\n\n",
+        "💳 *TRANSACTION DETAILS:*\n",
+    ])]
+
+    for idx, trans in enumerate(get('transactions', []), 1):
+        sections.append(
+            f"\n📌 Transaction #{idx}:\n"
+            f"2.{idx}.1 Date: {trans.get('date', 'N/A')}\n"
+            f"2.{idx}.2 Time: {trans.get('time', 'N/A')}\n"
+            f"2.{idx}.3 Bank: {trans.get('bank_name', 'N/A')}\n"
+            f"2.{idx}.4 Account: {trans.get('account_no', 'N/A')}\n"
+            f"2.{idx}.5 Amount: {trans.get('amount', 'N/A')}\n"
+            f"2.{idx}.6 Trans ID: {trans.get('transaction_id', 'N/A')}\n"
+        )
+    return sections
+
+
+def chunk_sections(sections, limit=WHATSAPP_MESSAGE_LIMIT):
+    """Pack sections into as few messages of at most `limit` characters as possible.
+
+    Messages only break between sections; a section that is too long on its
+    own is split at line breaks (or, failing that, anywhere).
+    """
+    chunks = []
+    parts = []
+    size = 0
+
+    for section in sections:
+        length = message_length(section)
+        if parts and size + length > limit:
+            chunks.append(''.join(parts))
+            parts, size = [], 0
+            # Each message should start with its transaction header, not a blank line
+            section = section.lstrip('\n')
+            length = message_length(section)
+        if length > limit:
+            pieces = _split_long(section, limit)
+            chunks.extend(pieces[:-1])
+            section = pieces[-1]
+            length = message_length(section)
+        parts.append(section)
+        size += length
+
+    if parts:
+        chunks.append(''.join(parts))
+    return chunks
+
+
+def _split_long(text, limit):
+    pieces = []
+    current = ''
+    for line in text.splitlines(keepends=True):
+        while message_length(line) > limit:
+            if current:
+                pieces.append(current)
+                current = ''
+            # Halve the budget per code point, so surrogate pairs can't overflow it
+            cut = limit // 2
+            pieces.append(line[:cut])
+            line = line[cut:]
+        if message_length(current) + message_length(line) > limit:
+            pieces.append(current)
+            current = ''
+        current += line
+    pieces.append(current)
+    return pieces
+
+
+def with_footer(chunks, footer, limit=WHATSAPP_MESSAGE_LIMIT):
+    """`chunks` with `footer` added to the last message, or as a message of its own if it doesn't fit"""
+    if chunks and message_length(chunks[-1]) + message_length(footer) <= limit:
+        return chunks[:-1] + (chunks[-1] + footer,)
+    return chunks + tuple(chunk_sections([footer.lstrip('\n')], limit))
+
+
+class SummaryRenderer:
+    """Renders complaint summaries as WhatsApp-sized messages, memoized per session version.
+
+    The `summary` and `done` edit commands and the final confirmation show
+    the same summary over and over; the rendered messages are kept per
+    phone number and reused while the session version is unchanged. A
+    session deleted and restarted begins again at version 1, so a hit is
+    only used if the summarized values still match. Up to `capacity`
+    sessions are kept, least recently used dropped first.
+    """
+
+    def __init__(self, capacity=1024, limit=WHATSAPP_MESSAGE_LIMIT):
+        self.capacity = capacity
+        self.limit = limit
+        self._rendered = OrderedDict()  # phone -> (version, personal fields, transactions, chunks)
+        self._lock = threading.Lock()
+
+    def render(self, phone_number, version, session_data):
+        """The summary of `session_data` (saved at `version`) as a tuple of messages"""
+        personal = tuple([session_data.get(field) for field in PERSONAL_FIELDS])
+        transactions = session_data.get('transactions', [])
+        with self._lock:
+            entry = self._rendered.get(phone_number)
+            if entry is not None and entry[:3] == (version, personal, transactions):
+                self._rendered.move_to_end(phone_number)
+                return entry[3]
+
+        chunks = tuple(chunk_sections(summary_sections(session_data), self.limit))
+        # Keep copies of the transactions, which the conversation edits in place
+        entry = (version, personal, [dict(trans) for trans in transactions], chunks)
+        with self._lock:
+            self._rendered[phone_number] = entry
+            self._rendered.move_to_end(phone_number)
+            while len(self._rendered) > self.capacity:
+                self._rendered.popitem(last=False)
+        return chunks
+
+    def forget(self, phone_number):
+        """Drop the cached summary of a finished or deleted session"""
+        with self._lock:
+            self._rendered.pop(phone_number, None)
+
+    def __len__(self):
+        return len(self._rendered)
+
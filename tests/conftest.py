@@ -0,0 +1,23 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def webapp(tmp_path_factory):
+    """The Flask app on a database of its own, with the sender rate limit lifted"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp('webapp'))
+        patch.setenv('WEBHOOK_SENDER_RATE', '1000')
+        patch.setenv('WEBHOOK_SENDER_BURST', '1000')
+        sys.modules.pop('app', None)
+        module = importlib.import_module('app')
+        # No periodic tasks: they would outlive the chdir and open the repo's complaints.db
+        module._background_pid = os.getpid()
+        yield module
+        sys.modules.pop('app', None)
@@ -0,0 +1,63 @@
+"""Re-sending failed PDFs: a failed re-send is retried, up to max_attempts."""
+import pytest
+
+from database import Database
+from delivery_tracker import DeliveryTracker
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'complaints.db'))
+
+
+def failed_message(db, tracker, sid):
+    tracker.record_sent(sid, 1, 'whatsapp:+919800000001', f'{sid}.pdf')
+    tracker.status_callback(sid, 'undelivered', '63016')
+    tracker.flush()
+
+
+def outbound(db, sid):
+    conn = db.get_connection()
+    try:
+        return dict(conn.execute('SELECT * FROM outbound_messages WHERE message_sid = ?', (sid,)).fetchone())
+    finally:
+        conn.close()
+
+
+def test_failed_resend_is_retried(db):
+    tracker = DeliveryTracker(db, max_attempts=3, resend_after=0)
+    failed_message(db, tracker, 'SM1')
+
+    assert tracker.resend_failed(lambda message: None) == 0
+    assert outbound(db, 'SM1')['resent_at'] is None
+    assert outbound(db, 'SM1')['attempt'] == 2
+
+    sent = []
+    assert tracker.resend_failed(lambda message: sent.append(message['attempt']) or 'SM2') == 1
+    assert sent == [2]
+    assert outbound(db, 'SM1')['resent_as'] == 'SM2'
+
+
+def test_resend_error_does_not_stop_the_batch(db):
+    tracker = DeliveryTracker(db, max_attempts=3, resend_after=0)
+    failed_message(db, tracker, 'SM1')
+    failed_message(db, tracker, 'SM2')
+
+    def resend(message):
+        if message['message_sid'] == 'SM1':
+            raise RuntimeError('Twilio is down')
+        return 'SM3'
+
+    assert tracker.resend_failed(resend) == 1
+    assert outbound(db, 'SM1')['resent_at'] is None
+    assert outbound(db, 'SM2')['resent_as'] == 'SM3'
+
+
+def test_attempts_are_capped(db):
+    tracker = DeliveryTracker(db, max_attempts=2, resend_after=0)
+    failed_message(db, tracker, 'SM1')
+
+    calls = []
+    tracker.resend_failed(lambda message: calls.append(1))
+    tracker.resend_failed(lambda message: calls.append(1))
+    assert len(calls) == 1
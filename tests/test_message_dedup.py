@@ -0,0 +1,111 @@
+"""Duplicate Twilio deliveries: answered from memory with the first reply.
+
+    python -m pytest tests
+"""
+import pytest
+
+from database import Database
+from message_dedup import MessageDeduplicator
+
+
+class CountingDatabase:
+    """A Database that counts the calls made to it, by method name"""
+
+    def __init__(self, db):
+        self.db = db
+        self.calls = {}
+
+    def __getattr__(self, name):
+        method = getattr(self.db, name)
+
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return method(*args, **kwargs)
+        return counted
+
+    def total(self):
+        return sum(self.calls.values())
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'complaints.db'))
+
+
+def test_duplicate_is_answered_from_memory(db):
+    counting = CountingDatabase(db)
+    dedup = MessageDeduplicator(counting)
+
+    assert dedup.begin('SM1') == (True, None)
+    dedup.finish('SM1', '<Response>first</Response>')
+    calls = counting.total()
+
+    for _ in range(5):
+        assert dedup.begin('SM1') == (False, '<Response>first</Response>')
+    assert counting.total() == calls
+
+
+def test_duplicate_while_first_delivery_runs(db):
+    dedup = MessageDeduplicator(db)
+    assert dedup.begin('SM1') == (True, None)
+    assert dedup.begin('SM1') == (False, MessageDeduplicator.PENDING)
+
+
+def test_other_worker_finds_reply_in_database(db):
+    first = MessageDeduplicator(db)
+    first.begin('SM1')
+    first.finish('SM1', '<Response>first</Response>')
+
+    counting = CountingDatabase(db)
+    second = MessageDeduplicator(counting)
+    assert second.begin('SM1') == (False, '<Response>first</Response>')
+    assert counting.calls == {'claim_message': 1, 'get_message_reply': 1}
+    # Remembered from then on
+    assert second.begin('SM1') == (False, '<Response>first</Response>')
+    assert counting.total() == 2
+
+
+def test_abandoned_message_can_be_retried(db):
+    dedup = MessageDeduplicator(db)
+    dedup.begin('SM1')
+    dedup.abandon('SM1')
+    assert dedup.begin('SM1') == (True, None)
+
+
+def test_evicted_message_falls_back_to_database(db):
+    counting = CountingDatabase(db)
+    dedup = MessageDeduplicator(counting, capacity=2)
+    for sid in ('SM1', 'SM2', 'SM3'):
+        dedup.begin(sid)
+        dedup.finish(sid, f'<Response>{sid}</Response>')
+
+    calls = counting.total()
+    assert dedup.begin('SM1') == (False, '<Response>SM1</Response>')
+    assert counting.total() == calls + 2
+
+
+def test_replayed_message_sid_at_webhook(webapp, monkeypatch):
+    handled = []
+    handle_message = webapp.handle_message
+
+    def counted(from_number, incoming_msg):
+        handled.append(incoming_msg)
+        return handle_message(from_number, incoming_msg)
+
+    monkeypatch.setattr(webapp, 'handle_message', counted)
+    counting = CountingDatabase(webapp.db)
+    monkeypatch.setattr(webapp.message_dedup, 'db', counting)
+    client = webapp.app.test_client()
+    form = {'From': 'whatsapp:+919800000001', 'Body': 'hi', 'MessageSid': 'SMreplayed'}
+
+    first = client.post('/webhook', data=form)
+    assert first.status_code == 200
+    calls = counting.total()
+
+    for _ in range(3):
+        replay = client.post('/webhook', data=form)
+        assert replay.status_code == 200
+        assert replay.data == first.data
+
+    assert handled == ['hi']
+    assert counting.total() == calls
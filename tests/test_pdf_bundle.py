@@ -0,0 +1,53 @@
+"""Bundle pages show each complaint as PDFGenerator's form does."""
+import re
+
+import pdf_generator
+from pdf_bundle import complaint_pages
+from pdf_generator import PDFGenerator
+
+COMPLAINT = {
+    'id': 7, 'phone_number': 'whatsapp:+919876543210', 'name': 'Rajesh Kumar', 'mobile_no': '9876543210',
+    'dob': '02-03-1990', 'father_name': 'Suresh Kumar', 'district': 'Chennai', 'pin_code': '600001',
+    'status': 'Pending', 'created_at': '2025-01-02 10:00:00',
+    'transactions': [
+        {'date': '01-01-2025', 'time': '02:30 PM', 'bank_name': 'State Bank of India',
+         'account_no': '12345678901', 'amount': '₹5000.00', 'transaction_id': 'TXN1234567890'},
+        {'date': '02-01-2025', 'time': '03:45 PM', 'bank_name': 'HDFC Bank',
+         'account_no': '987654321098', 'amount': '₹7500.00', 'transaction_id': 'UPI98765432AB'},
+    ],
+}
+
+
+def form_body(texts):
+    """The (x, text) runs from the personal section to the last transaction field"""
+    start = texts.index((50, '1. PERSONAL INFORMATION'))
+    end = max(i for i, (x, text) in enumerate(texts) if text == 'Transaction ID:') + 2
+    return texts[start:end]
+
+
+def generator_texts(monkeypatch):
+    texts = []
+
+    class RecordingCanvas(pdf_generator.canvas.Canvas):
+        def drawString(self, x, y, text, *args, **kwargs):
+            # The bundle's standard fonts have no rupee sign
+            texts.append((x, str(text).replace('₹', 'Rs.')))
+            return super().drawString(x, y, text, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_generator.canvas, 'Canvas', RecordingCanvas)
+    PDFGenerator.generate_complaint_pdf(COMPLAINT)
+    return texts
+
+
+def bundle_texts():
+    texts = []
+    for page in complaint_pages(COMPLAINT):
+        for op in page.ops:
+            match = re.fullmatch(rb'BT /F\d \d+ Tf ([\d.]+) [\d.]+ Td \((.*)\) Tj ET', op)
+            if match:
+                texts.append((float(match.group(1)), match.group(2).decode('cp1252')))
+    return texts
+
+
+def test_bundle_pages_match_the_complaint_pdf(monkeypatch):
+    assert form_body(bundle_texts()) == form_body(generator_texts(monkeypatch))
@@ -0,0 +1,47 @@
+"""/register: open for the first admin only, admin-only after that."""
+import pytest
+
+from database import Database
+
+
+@pytest.fixture
+def client(webapp, monkeypatch, tmp_path):
+    """A test client on a user table of its own, with no users yet"""
+    db = Database(str(tmp_path / 'complaints.db'))
+    monkeypatch.setattr(webapp, 'db', db)
+    monkeypatch.setattr(webapp.auth, 'db', db)
+    return webapp.app.test_client()
+
+
+def register(client, username, role, token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return client.post('/register', json={'username': username, 'password': 'pass', 'role': role}, headers=headers)
+
+
+def login(client, username, role):
+    response = client.post('/login', json={'username': username, 'password': 'pass', 'role': role})
+    return response.get_json()['token']
+
+
+def test_first_registration_must_be_an_admin(client):
+    assert register(client, 'attender1', 'attender').status_code == 403
+    assert register(client, 'admin1', 'admin').status_code == 201
+
+
+def test_registration_needs_an_admin_once_one_exists(client):
+    register(client, 'admin1', 'admin')
+
+    assert register(client, 'admin2', 'admin').status_code == 401
+    assert register(client, 'attender1', 'attender').status_code == 401
+
+    admin = login(client, 'admin1', 'admin')
+    assert register(client, 'attender1', 'attender', admin).status_code == 201
+    attender = login(client, 'attender1', 'attender')
+    assert register(client, 'admin2', 'admin', attender).status_code == 403
+    assert register(client, 'admin2', 'admin', admin).status_code == 201
+
+
+def test_unknown_role_is_rejected(client):
+    register(client, 'admin1', 'admin')
+    admin = login(client, 'admin1', 'admin')
+    assert register(client, 'root', 'superuser', admin).status_code == 400
@@ -0,0 +1,101 @@
+"""Concurrent messages from one sender: no lost edits, one complaint per confirmation.
+
+Each case runs with the striped sender locks, and again without them (as
+separate workers would be), relying on the versioned session writes.
+"""
+import contextlib
+import itertools
+import threading
+import time
+
+import pytest
+
+from striped_lock import StripedLock
+
+SETUP = ['hi', 'yes', 'Rajesh Kumar', '9876543210', '2-3-1990', 'Suresh Kumar', 'Chennai',
+         '600001', '1', '1-1-2025', '14:30', 'sbi', '12345678901', '5000', 'TXN1234567890']
+EDITS = {
+    '2.1.1': ('2-1-2025', 'date', '02-01-2025'),
+    '2.1.2': ('3:45 PM', 'time', '03:45 PM'),
+    '2.1.4': ('987654321098', 'account_no', '987654321098'),
+    '2.1.5': ('7500', 'amount', '₹7500.00'),
+    '2.1.6': ('UPI98765432AB', 'transaction_id', 'UPI98765432AB'),
+}
+
+phones = (f"whatsapp:+9198{n:08d}" for n in itertools.count())
+
+
+class NoLock:
+    """Stands in for the striped locks to mimic requests on separate workers"""
+
+    def for_key(self, key):
+        return contextlib.nullcontext()
+
+
+@pytest.fixture(params=['striped locks', 'no locks'])
+def conversation(request, webapp, monkeypatch):
+    """A sender at the confirmation step, with PDFs 'rendered' slowly and not sent"""
+    locks = StripedLock(64) if request.param == 'striped locks' else NoLock()
+    monkeypatch.setattr(webapp, 'sender_locks', locks)
+
+    def render(complaint_data, timeout=None):
+        # Long enough for a competing confirmation to retry meanwhile
+        time.sleep(0.2)
+        return b'%PDF-1.4'
+
+    monkeypatch.setattr(webapp.pdf_service, 'render', render)
+    monkeypatch.setattr(webapp, 'send_pdf_to_whatsapp', lambda *args: (True, 'SM0'))
+
+    phone = next(phones)
+    client = webapp.app.test_client()
+    for body in SETUP:
+        assert client.post('/webhook', data={'Body': body, 'From': phone}).status_code == 200
+    assert webapp.db.get_session(phone)[0] == webapp.STATE_CONFIRM
+    return phone
+
+
+def send_at_once(webapp, phone, bodies):
+    """Post every body from `phone` at the same moment; returns the replies"""
+    barrier = threading.Barrier(len(bodies))
+    replies = [None] * len(bodies)
+
+    def job(index, body):
+        client = webapp.app.test_client()
+        barrier.wait()
+        replies[index] = client.post('/webhook', data={'Body': body, 'From': phone})
+
+    threads = [threading.Thread(target=job, args=item) for item in enumerate(bodies)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return replies
+
+
+def complaint_count(webapp, phone):
+    conn = webapp.db.get_connection()
+    try:
+        return conn.execute('SELECT COUNT(*) FROM complaints WHERE phone_number = ?', (phone,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_edits_are_all_kept(webapp, conversation):
+    client = webapp.app.test_client()
+    client.post('/webhook', data={'Body': 'no', 'From': conversation})
+
+    replies = send_at_once(webapp, conversation, [f"{serial} = {value}" for serial, (value, _, _) in EDITS.items()])
+    assert all(reply.status_code == 200 for reply in replies)
+
+    transaction = webapp.db.get_session(conversation)[1]['transactions'][0]
+    lost = [serial for serial, (_, key, expected) in EDITS.items() if transaction.get(key) != expected]
+    assert lost == []
+
+
+def test_concurrent_confirmations_save_one_complaint(webapp, conversation):
+    replies = send_at_once(webapp, conversation, ['yes', 'yes'])
+    assert all(reply.status_code == 200 for reply in replies)
+
+    assert complaint_count(webapp, conversation) == 1
+    # Nothing is left waiting for a confirmation or stuck mid-submission
+    assert webapp.db.get_session(conversation)[0] not in (webapp.STATE_CONFIRM, webapp.STATE_SUBMITTING)
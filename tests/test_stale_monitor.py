@@ -0,0 +1,88 @@
+"""Stale-case alerts: every worker's dashboards hear of each flag once.
+
+Two monitors on one database stand in for two server workers.
+"""
+import json
+
+import pytest
+
+from database import Database
+from stale_monitor import StaleCaseMonitor
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'complaints.db'))
+
+
+def add_old_complaint(db, phone):
+    """A Pending complaint created an hour ago"""
+    complaint_id = db.save_complaint({
+        'phone_number': phone, 'name': 'Rajesh Kumar', 'mobile_no': '9876543210', 'dob': '02-03-1990',
+        'father_name': 'Suresh Kumar', 'district': 'Chennai', 'pin_code': '600001', 'transactions': [],
+    })
+    conn = db.get_connection()
+    try:
+        conn.execute("UPDATE complaints SET created_at = datetime('now', '-1 hour') WHERE id = ?", (complaint_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    return complaint_id
+
+
+def drain(listener):
+    events = []
+    while not listener.empty():
+        events.append(listener.get_nowait())
+    return events
+
+
+def test_flag_reaches_every_worker_once(db):
+    first, second = StaleCaseMonitor(db, 60), StaleCaseMonitor(db, 60)
+    first.check()
+    second.check()
+    first_listener, second_listener = first.subscribe(), second.subscribe()
+
+    complaint_id = add_old_complaint(db, 'whatsapp:+919800000001')
+    assert [c['id'] for c in first.check()] == [complaint_id]
+    # The second worker flags nothing itself but still tells its dashboards
+    assert second.check() == []
+
+    for listener in (first_listener, second_listener):
+        assert [event['ids'] for event in drain(listener)] == [[complaint_id]]
+
+    first.check()
+    second.check()
+    assert drain(first_listener) == drain(second_listener) == []
+
+
+def test_stream_ends_after_its_lifetime(db):
+    monitor = StaleCaseMonitor(db, 60)
+    listener = monitor.subscribe()
+    chunks = list(monitor.stream(listener, heartbeat=0.05, lifetime=0.2))
+
+    assert chunks[0].startswith('retry:')
+    assert chunks[1:] and all(chunk == ': keep-alive\n\n' for chunk in chunks[1:])
+    assert monitor._subscribers == set()
+
+
+def test_reconnect_replays_missed_flags(db):
+    monitor = StaleCaseMonitor(db, 60)
+    seen = add_old_complaint(db, 'whatsapp:+919800000002')
+    monitor.check()
+    conn = db.get_connection()
+    try:
+        # Alerted a minute ago, before the dashboard's stream ended
+        conn.execute("UPDATE complaints SET stale_flagged_at = datetime('now', '-1 minute') WHERE id = ?", (seen,))
+        conn.commit()
+    finally:
+        conn.close()
+    last_event_id = db.get_stale_flags_since('')[0]['stale_flagged_at']
+    missed = add_old_complaint(db, 'whatsapp:+919800000003')
+    monitor.check()
+
+    stream = monitor.stream(monitor.subscribe(), lifetime=0, last_event_id=last_event_id)
+    assert next(stream).startswith('retry:')
+    replay = next(stream)
+    assert replay.startswith('id: ')
+    assert json.loads(replay.split('data: ', 1)[1])['ids'] == [missed]
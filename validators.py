@@ -2,6 +2,12 @@ import re
 from datetime import datetime
 import phonenumbers
 from phonenumbers import NumberParseException
+from pincode_index import default_index
+from bank_names import default_matcher
+
+# A typed district this close to one its PIN code serves is taken to mean that
+# district (the PIN confirms the spelling)
+DISTRICT_MATCH_THRESHOLD = 0.7
 
 class Validators:
     
@@ -124,11 +130,18 @@ class Validators:
         if not re.match(r"^[a-zA-Z\s]+$", district.strip()):
             return False, "District name should contain only alphabets and spaces"
         
+        # Known names and aliases are stored under one spelling ("trichy" ->
+        # Tiruchirappalli). Anything else is kept as typed: a near miss may be a
+        # real district the bundled list doesn't have (Tirupati is not Tirupathur)
+        canonical = default_index().canonical_district(district)
+        if canonical:
+            return True, canonical
+        
         return True, district.strip().title()
     
     @staticmethod
     def validate_pincode(pincode):
-        """Validate Indian PIN code (6 digits)"""
+        """Validate Indian PIN code (6 digits, not starting with 0)"""
         pincode = str(pincode).strip()
         
         if not re.match(r"^[1-9][0-9]{5}$", pincode):
@@ -136,6 +149,35 @@ class Validators:
         
         return True, pincode
     
+    @staticmethod
+    def pincode_mismatch(pincode, district):
+        """A warning if the PIN code index places `pincode` outside `district`, else None.
+        
+        The bundled index is a list of prefixes, not every post office, so a
+        mismatch is only a hint for the user to check; it never rejects.
+        """
+        if (not district or default_index().pincode_serves(pincode, district) is not False
+                or Validators.district_served_by(pincode, district)):
+            return None
+        candidates = default_index().districts_for(pincode)
+        names = ', '.join(name for name, state in candidates)
+        return f"PIN code {pincode} is usually in {names} ({candidates[0][1]}), not {district}"
+    
+    @staticmethod
+    def district_served_by(pincode, district):
+        """The canonical spelling of `district` if `pincode` serves it, allowing typos; else None"""
+        return default_index().serving_district(pincode, district, DISTRICT_MATCH_THRESHOLD)
+    
+    @staticmethod
+    def district_for_pincode(pincode):
+        """(district, state) for a PIN code that serves exactly one district, else None"""
+        pincode = str(pincode).strip()
+        if not re.match(r"^[1-9][0-9]{5}$", pincode):
+            return None
+        
+        candidates = default_index().districts_for(pincode)
+        return candidates[0] if len(candidates) == 1 else None
+    
     @staticmethod
     def validate_number(number, field_name="Number"):
         """Validate if input is a positive number"""
@@ -260,6 +302,12 @@ class Validators:
         if len(bank_name.strip()) > 100:
             return False, "Bank name must not exceed 100 characters"
         
+        # "SBI", "State bank of india" and "STATE BNK" are all stored as one bank;
+        # banks not in the bundled list are kept as typed
+        bank, confidence = default_matcher().match(bank_name)
+        if bank:
+            return True, bank.upper()
+        
         return True, bank_name.strip().upper()
     
     @staticmethod